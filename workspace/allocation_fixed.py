@@ -1,140 +1,705 @@
-from typing import List, Dict, Any, Set
+import heapq
+import logging
+import time
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple
 
-def run_allocation(students: List[Dict[str, Any]], internships: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+import numpy as np
+
+from allocation_flow import solve_assignment, UNASSIGNED
+from allocation_stats import collect_stats, count as count_stat, current_stats, phase, timed_scoring
+from candidate_pool import CandidatePool
+from skill_vocab import SkillVocabulary, normalize_list as _normalize_list, packed_match_counts, skill_match_score
+
+logger = logging.getLogger(__name__)
+
+ALLOCATION_ENGINES = ("greedy", "vectorized", "parallel", "optimal", "stable")
+
+# Sparse candidate graph of the optimal engine: best students per seat of a slot, best slots per student
+OPTIMAL_CANDIDATES_PER_SEAT = 4
+OPTIMAL_EDGES_PER_STUDENT = 16
+OPTIMAL_REFINE_ROUNDS = 8
+
+# Deferred acceptance: internships each student applies to, and its preference for its own location
+STABLE_PREFERENCES_PER_STUDENT = 20
+LOCATION_BONUS = 20.0
+
+
+def run_allocation(students: List[Dict[str, Any]], internships: List[Dict[str, Any]], engine: str = "greedy") -> List[Dict[str, Any]]:
     """
     Improved allocation algorithm with better error handling and data structure compatibility
+
+    ``engine`` selects the implementation: "greedy" scores students row by row,
+    "vectorized" encodes the cohort once and scores it with NumPy. Both produce
+    identical allocations, filling internships in table order, and so does
+    "parallel", which spreads the scoring over a process pool. "optimal"
+    maximises the total score over all internships at once instead, and
+    "stable" runs deferred acceptance so no student and internship would
+    both rather be matched to each other.
     """
-    allocations: List[Dict[str, Any]] = []
-    assigned_student_ids: Set[int] = set()
-    
-    print(f"🚀 Starting allocation with {len(students)} students and {len(internships)} internships")
+    if engine not in ALLOCATION_ENGINES:
+        raise ValueError(f"Unknown allocation engine '{engine}', expected one of {', '.join(ALLOCATION_ENGINES)}")
+
+    logger.info("Starting allocation with %s students and %s internships (%s engine)", len(students), len(internships), engine)
     
     if not students:
-        print("❌ No students found for allocation")
+        logger.warning("No students found for allocation")
         return []
     
     if not internships:
-        print("❌ No internships found for allocation")
+        logger.warning("No internships found for allocation")
         return []
 
+    if engine == "vectorized":
+        return _run_allocation_vectorized(students, internships)
+    if engine == "parallel":
+        # Imported here because the parallel engine builds on this module's helpers
+        from allocation_parallel import run_allocation_parallel
+        return run_allocation_parallel(students, internships)
+    if engine == "optimal":
+        return _run_allocation_optimal(students, internships)
+    if engine == "stable":
+        return _run_allocation_stable(students, internships)
+    return _run_allocation_greedy(students, internships)
+
+
+def run_allocation_with_stats(students: List[Dict[str, Any]], internships: List[Dict[str, Any]], engine: str = "greedy") -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Run ``run_allocation`` and also return its phase timers and counters
+
+    The stats hold normalization, scoring and candidate-selection seconds,
+    score evaluations, candidates pruned and seats filled per category; see
+    AllocationStats for what each counts.
+    """
+    with collect_stats(engine) as stats:
+        started = time.perf_counter()
+        allocations = run_allocation(students, internships, engine)
+        stats.finish(allocations, len(students), len(internships), time.perf_counter() - started)
+    return allocations, stats.to_dict()
+
+
+def _run_allocation_greedy(students: List[Dict[str, Any]], internships: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Allocate internships one by one, taking the best remaining students of each category"""
+    allocations: List[Dict[str, Any]] = []
+    stats = current_stats()
+    with phase("normalization"):
+        vocab = SkillVocabulary()
+        profiles = [_student_profile(s, vocab) for s in students]
+        pool = CandidatePool(students, profiles)
+
     for internship in internships:
-        internship_id = internship.get("id")
-        internship_name = internship.get("org_name") or internship.get("company") or "Unknown"
-        
-        # Handle both field name variations
-        required_skills = _normalize_list(
-            internship.get("skills_required") or 
-            internship.get("required_skills") or []
-        )
-        
-        sector = (internship.get("sector") or "").strip().lower()
-        
-        # Handle both 'seats' and 'total_positions' field names
-        seats = int(internship.get("seats") or internship.get("total_positions") or 0)
+        internship_id, internship_name, required_skills, sector, seats = _internship_terms(internship)
         
         if seats <= 0:
-            print(f"⚠️ Skipping {internship_name} - no seats available")
+            logger.debug("Skipping %s - no seats available", internship_name)
             continue
         
-        # Handle quota_json or individual quota fields
-        quotas_raw = internship.get("quota_json")
-        if not quotas_raw:
-            # Fallback to individual quota fields
-            quotas_raw = {
-                "GEN": internship.get("quota_gen", 0),
-                "OBC": internship.get("quota_obc", 0), 
-                "SC": internship.get("quota_sc", 0),
-                "ST": internship.get("quota_st", 0),
-                "EWS": internship.get("quota_ews", 0)
-            }
-        
-        print(f"📋 Processing {internship_name} - {seats} seats, sector: {sector}")
-        print(f"   Required skills: {required_skills}")
-        print(f"   Quotas: {quotas_raw}")
+        quotas = _internship_quotas(internship, internship_name, sector, seats, required_skills)
+        required_bits = vocab.encode(required_skills)
 
-        # Process quotas
-        quotas = {}
-        try:
-            for category, count in dict(quotas_raw).items():
-                try:
-                    c = int(count)
-                    if c > 0:
-                        quotas[str(category)] = c
-                except (ValueError, TypeError):
-                    continue
-        except Exception as e:
-            print(f"⚠️ Error processing quotas for {internship_name}: {e}")
-            quotas = {}
+        def score(i: int) -> float:
+            return _profile_score(profiles[i], sector, required_bits)
+
+        if stats is not None:
+            score = timed_scoring(score, stats)
 
         filled_quota = 0
         
         # Allocate based on quotas
         for category, quota_count in quotas.items():
-            if quota_count <= 0:
-                continue
-                
-            eligible = [
-                s for s in students
-                if s.get("id") not in assigned_student_ids and (s.get("category") or "") == category
-            ]
-            
-            print(f"   📊 Category {category}: {len(eligible)} eligible students for {quota_count} quota seats")
-            
-            if not eligible:
-                continue
-                
-            scored = [(s, _final_score(s, sector, required_skills)) for s in eligible]
-            scored.sort(key=lambda x: x[1], reverse=True)
-
-            to_allocate_count = min(quota_count, len(scored))
-            for i in range(to_allocate_count):
-                s = scored[i][0]
-                score = scored[i][1]
+            logger.debug("Category %s: %s eligible students for %s quota seats", category, pool.available(category), quota_count)
+
+            for i, score_value in _select(pool, category, quota_count, sector, score, required_bits):
+                s = students[i]
                 allocations.append({
                     "student_id": s.get("id"),
                     "internship_id": internship_id,
-                    "score": round(score, 4),
+                    "score": round(score_value, 4),
                     "allocation_type": "quota",
                     "reason": f"quota for {category}",
                 })
-                assigned_student_ids.add(s.get("id"))
+                pool.assign(i)
                 filled_quota += 1
-                print(f"   ✅ Allocated {s.get('name')} (score: {score:.2f}) to quota {category}")
+                logger.debug("Allocated %s (score: %.2f) to quota %s", s.get('name'), score_value, category)
 
         # Allocate remaining open seats
         remaining_seats = seats - filled_quota
         if remaining_seats > 0:
-            open_eligible = [
-                s for s in students
-                if s.get("id") not in assigned_student_ids
-            ]
-            
-            print(f"   🔓 {remaining_seats} open seats available, {len(open_eligible)} eligible students")
-            
-            if open_eligible:
-                scored_open = [(s, _final_score(s, sector, required_skills)) for s in open_eligible]
-                scored_open.sort(key=lambda x: x[1], reverse=True)
-
-                to_allocate_count = min(remaining_seats, len(scored_open))
-                for i in range(to_allocate_count):
-                    s = scored_open[i][0]
-                    score = scored_open[i][1]
-                    allocations.append({
-                        "student_id": s.get("id"),
-                        "internship_id": internship_id,
-                        "score": round(score, 4),
-                        "allocation_type": "open",
-                        "reason": "open seat",
-                    })
-                    assigned_student_ids.add(s.get("id"))
-                    print(f"   ✅ Allocated {s.get('name')} (score: {score:.2f}) to open seat")
-
-    print(f"🎉 Allocation complete! Generated {len(allocations)} allocations")
-    print(f"📈 Students allocated: {len(assigned_student_ids)} out of {len(students)}")
+            logger.debug("%s open seats available, %s eligible students", remaining_seats, pool.available())
+
+            for i, score_value in _select(pool, None, remaining_seats, sector, score, required_bits):
+                s = students[i]
+                allocations.append({
+                    "student_id": s.get("id"),
+                    "internship_id": internship_id,
+                    "score": round(score_value, 4),
+                    "allocation_type": "open",
+                    "reason": "open seat",
+                })
+                pool.assign(i)
+                logger.debug("Allocated %s (score: %.2f) to open seat", s.get('name'), score_value)
+
+    logger.info("Allocation complete: generated %s allocations", len(allocations))
+    logger.info("Students allocated: %s out of %s", pool.assigned_count, len(students))
     
     return allocations
 
 
+def _select(pool: CandidatePool, category: Optional[str], k: int, sector: str, score, required_bits: int) -> List[Tuple[int, float]]:
+    """``pool.select`` that counts its score evaluations, and the candidates its bound left unscored, into the run's stats"""
+    available = pool.available(category)
+    evaluations = pool.evaluations
+    selected = pool.select(category, k, sector, score, required_bits)
+    evaluated = pool.evaluations - evaluations
+    count_stat("score_evaluations", evaluated)
+    count_stat("candidates_pruned", max(0, available - evaluated))
+    return selected
+
+
+def _run_allocation_vectorized(students: List[Dict[str, Any]], internships: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Allocate internships from NumPy score vectors built over a one-time encoding of the cohort"""
+    allocations: List[Dict[str, Any]] = []
+    with phase("normalization"):
+        cohort = _encode_students(students)
+    category_masks: Dict[str, np.ndarray] = {}
+
+    # Students sharing an id are assigned together, exactly like the id set in the greedy engine
+    assigned_groups = np.zeros(cohort["group_count"], dtype=bool)
+    student_groups = cohort["groups"]
+
+    for internship in internships:
+        internship_id, internship_name, required_skills, sector, seats = _internship_terms(internship)
+
+        if seats <= 0:
+            logger.debug("Skipping %s - no seats available", internship_name)
+            continue
+
+        quotas = _internship_quotas(internship, internship_name, sector, seats, required_skills)
+        scores = _score_vector(cohort, sector, required_skills)
+        unassigned = ~assigned_groups[student_groups]
+
+        filled_quota = 0
+
+        for category, quota_count in quotas.items():
+            if category not in category_masks:
+                category_masks[category] = cohort["categories"] == cohort["category_ids"].get(category, -2)
+            eligible = np.flatnonzero(unassigned & category_masks[category])
+
+            logger.debug("Category %s: %s eligible students for %s quota seats", category, len(eligible), quota_count)
+
+            for idx in _top_k(eligible, scores, quota_count):
+                allocations.append({
+                    "student_id": students[idx].get("id"),
+                    "internship_id": internship_id,
+                    "score": round(float(scores[idx]), 4),
+                    "allocation_type": "quota",
+                    "reason": f"quota for {category}",
+                })
+                assigned_groups[student_groups[idx]] = True
+                filled_quota += 1
+            unassigned = ~assigned_groups[student_groups]
+
+        remaining_seats = seats - filled_quota
+        if remaining_seats > 0:
+            open_eligible = np.flatnonzero(unassigned)
+
+            logger.debug("%s open seats available, %s eligible students", remaining_seats, len(open_eligible))
+
+            for idx in _top_k(open_eligible, scores, remaining_seats):
+                allocations.append({
+                    "student_id": students[idx].get("id"),
+                    "internship_id": internship_id,
+                    "score": round(float(scores[idx]), 4),
+                    "allocation_type": "open",
+                    "reason": "open seat",
+                })
+                assigned_groups[student_groups[idx]] = True
+
+    logger.info("Allocation complete: generated %s allocations", len(allocations))
+    logger.info("Students allocated: %s out of %s", int(np.count_nonzero(assigned_groups)), len(students))
+
+    return allocations
+
+
+def _run_allocation_optimal(students: List[Dict[str, Any]], internships: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Allocate by maximising the total score with a capacitated assignment
+
+    Candidate edges are sparse: each student links to the slots of its
+    OPTIMAL_EDGES_PER_STUDENT best internships and each slot to its
+    OPTIMAL_CANDIDATES_PER_SEAT * capacity best eligible students.
+    """
+    allocations = _run_slot_engine(students, internships, _assign_slots)
+    logger.info("Objective (total score): %.4f", allocation_objective(allocations))
+    return allocations
+
+
+def _run_allocation_stable(students: List[Dict[str, Any]], internships: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Allocate with student-proposing deferred acceptance
+
+    The result is stable: no student and internship both prefer each other
+    to what they were given, within each student's STABLE_PREFERENCES_PER_STUDENT
+    most preferred internships.
+    """
+    return _run_slot_engine(students, internships, _deferred_acceptance)
+
+
+def _run_slot_engine(students: List[Dict[str, Any]], internships: List[Dict[str, Any]], solve) -> List[Dict[str, Any]]:
+    """
+    Allocate seats through ``solve(cohort, plans, slots, available)`` in two rounds
+
+    Every internship contributes one slot per quota category, holding that
+    many seats, and one open slot for the seats left over. Like the greedy
+    engine, quota seats come first: the second round offers the quota seats
+    left empty as open seats to the students still free.
+    """
+    with phase("normalization"):
+        cohort = _encode_students(students)
+    plans, slots = _slot_plans(internships)
+
+    # Only the first row of each student id takes part, since an id can be allocated once
+    available = np.zeros(cohort["count"], dtype=bool)
+    available[np.unique(cohort["groups"], return_index=True)[1]] = True
+
+    placed = solve(cohort, plans, slots, available)
+
+    released = []
+    for p, plan in enumerate(plans):
+        filled_quota = sum(len(placed.get((p, c), [])) for c in plan["quotas"])
+        remaining_seats = max(0, plan["seats"] - filled_quota) - len(placed.get((p, None), []))
+        if remaining_seats > 0:
+            released.append((p, None, remaining_seats))
+    for students_placed in placed.values():
+        available[[i for i, _ in students_placed]] = False
+    for key, students_placed in solve(cohort, plans, released, available).items():
+        placed.setdefault(key, []).extend(students_placed)
+
+    allocations: List[Dict[str, Any]] = []
+    for p, plan in enumerate(plans):
+        for category in list(plan["quotas"]) + [None]:
+            for i, score in sorted(placed.get((p, category), []), key=lambda x: (-x[1], x[0])):
+                allocations.append({
+                    "student_id": students[i].get("id"),
+                    "internship_id": plan["id"],
+                    "score": round(score, 4),
+                    "allocation_type": "quota" if category is not None else "open",
+                    "reason": f"quota for {category}" if category is not None else "open seat",
+                })
+
+    logger.info("Allocation complete: generated %s allocations", len(allocations))
+    logger.info("Students allocated: %s out of %s", len(allocations), len(students))
+
+    return allocations
+
+
+def _slot_plans(internships: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Tuple[int, Optional[str], int]]]:
+    """Describe every internship with seats as a plan and list its (plan, category, seats) slots"""
+    plans: List[Dict[str, Any]] = []
+    for internship in internships:
+        internship_id, internship_name, required_skills, sector, seats = _internship_terms(internship)
+
+        if seats <= 0:
+            logger.debug("Skipping %s - no seats available", internship_name)
+            continue
+
+        quotas = _internship_quotas(internship, internship_name, sector, seats, required_skills)
+        location = internship.get("location")
+        plans.append({
+            "id": internship_id,
+            "sector": sector,
+            "location": location.strip().lower() if isinstance(location, str) else "",
+            "required_skills": required_skills,
+            "seats": seats,
+            "quotas": quotas,
+        })
+
+    slots = []
+    for p, plan in enumerate(plans):
+        slots += [(p, category, count) for category, count in plan["quotas"].items()]
+        open_seats = plan["seats"] - sum(plan["quotas"].values())
+        if open_seats > 0:
+            slots.append((p, None, open_seats))
+    return plans, slots
+
+
+def _assign_slots(cohort: Dict[str, Any], plans: List[Dict[str, Any]], slots: List[Tuple[int, Optional[str], int]], available: np.ndarray) -> Dict[Tuple[int, Optional[str]], List[Tuple[int, float]]]:
+    """
+    Solve one maximum-score assignment of available students to slots, keyed by (plan, category)
+
+    A slot left short of students after all its candidates went elsewhere gets
+    OPTIMAL_CANDIDATES_PER_SEAT times more candidates and the graph is solved
+    again, up to OPTIMAL_REFINE_ROUNDS times.
+    """
+    wanted = [OPTIMAL_CANDIDATES_PER_SEAT * capacity for _, _, capacity in slots]
+    edges_by_student = _student_edges(cohort, plans, slots, available)
+    slot_candidates: List[List[Tuple[int, float]]] = [[] for _ in slots]
+    stale = set(range(len(slots)))
+
+    for attempt in range(OPTIMAL_REFINE_ROUNDS + 1):
+        slots_by_plan: Dict[int, List[int]] = {}
+        for j in sorted(stale):
+            slots_by_plan.setdefault(slots[j][0], []).append(j)
+        for p, slot_ids in slots_by_plan.items():
+            scores = _score_vector(cohort, plans[p]["sector"], plans[p]["required_skills"])
+            for j in slot_ids:
+                eligible = available & _slot_mask(cohort, slots[j][1])
+                slot_candidates[j] = [(int(i), float(scores[i])) for i in _top_k(np.flatnonzero(eligible), scores, wanted[j])]
+
+        candidates: Dict[int, Dict[int, float]] = {i: dict(student_edges) for i, student_edges in edges_by_student.items()}
+        for j, members in enumerate(slot_candidates):
+            for i, score in members:
+                candidates.setdefault(i, {})[j] = score
+
+        # Integer weights: scores at the 4 decimals they are stored with, then +1 so ties favour filling a seat
+        scale = cohort["count"] + 1
+        rows = list(candidates)
+        edges = [[(j, int(round(score * 10000)) * scale + 1) for j, score in candidates[i].items()] for i in rows]
+        order = sorted(range(len(rows)), key=lambda r: -max(weight for _, weight in edges[r]))
+        assignment = solve_assignment(edges, [capacity for _, _, capacity in slots], order)
+
+        filled = [0] * len(slots)
+        for j in assignment:
+            if j != UNASSIGNED:
+                filled[j] += 1
+        stale = {j for j, (_, _, capacity) in enumerate(slots) if filled[j] < capacity and len(slot_candidates[j]) == wanted[j]}
+        if not stale:
+            break
+        for j in stale:
+            wanted[j] *= OPTIMAL_CANDIDATES_PER_SEAT
+
+    placed: Dict[Tuple[int, Optional[str]], List[Tuple[int, float]]] = {}
+    for r, j in enumerate(assignment):
+        if j != UNASSIGNED:
+            p, category, _ = slots[j]
+            placed.setdefault((p, category), []).append((rows[r], candidates[rows[r]][j]))
+    return placed
+
+
+def _student_edges(cohort: Dict[str, Any], plans: List[Dict[str, Any]], slots: List[Tuple[int, Optional[str], int]], available: np.ndarray) -> Dict[int, Dict[int, float]]:
+    """Link every available student to the slots of its OPTIMAL_EDGES_PER_STUDENT best-scoring internships"""
+    slots_by_plan = _slots_by_plan(slots)
+    top_plans, top_scores, _ = _top_plans(cohort, plans, slots_by_plan, available, OPTIMAL_EDGES_PER_STUDENT)
+
+    category_names = {code: name for name, code in cohort["category_ids"].items()}
+    edges: Dict[int, Dict[int, float]] = {}
+    for i, c in zip(*np.nonzero(np.isfinite(top_scores))):
+        plan_slots = slots_by_plan[int(top_plans[i, c])]
+        score = float(top_scores[i, c])
+        for category in (category_names.get(int(cohort["categories"][i])), None):
+            if category in plan_slots:
+                edges.setdefault(int(i), {})[plan_slots[category]] = score
+    return edges
+
+
+def _slots_by_plan(slots: List[Tuple[int, Optional[str], int]]) -> Dict[int, Dict[Optional[str], int]]:
+    """Map each plan to its slots by category, None being the open slot"""
+    slots_by_plan: Dict[int, Dict[Optional[str], int]] = {}
+    for j, (p, category, _) in enumerate(slots):
+        slots_by_plan.setdefault(p, {})[category] = j
+    return slots_by_plan
+
+
+def _top_plans(cohort: Dict[str, Any], plans: List[Dict[str, Any]], slots_by_plan: Dict[int, Dict[Optional[str], int]], available: np.ndarray, width: int, location_bonus: float = 0.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find every available student's ``width`` most preferred plans among those it can take a slot in
+
+    A student's preference for a plan is its score plus ``location_bonus``
+    when the plan is at its preferred location. Returns plan ids, scores and
+    preferences as (students, width) arrays sorted by preference, best
+    first; -inf pads students with fewer eligible plans.
+    """
+    plan_ids = sorted(slots_by_plan)
+    count = cohort["count"]
+    width = min(width, len(plan_ids))
+    top_plans = np.zeros((count, 0), dtype=np.int64)
+    top_scores = np.full((count, 0), -np.inf)
+    top_values = np.full((count, 0), -np.inf)
+    # Score plans in blocks so memory stays at students x (block + width)
+    block_size = max(1, min(len(plan_ids), 4_000_000 // max(1, count)))
+    for start in range(0, len(plan_ids), block_size):
+        block = plan_ids[start:start + block_size]
+        block_scores = np.empty((count, len(block)))
+        block_values = np.empty((count, len(block)))
+        for c, p in enumerate(block):
+            eligible = available.copy()
+            if None not in slots_by_plan[p]:
+                eligible &= np.isin(cohort["categories"], [cohort["category_ids"].get(cat, -2) for cat in slots_by_plan[p]])
+            block_scores[:, c] = np.where(eligible, _score_vector(cohort, plans[p]["sector"], plans[p]["required_skills"]), -np.inf)
+            block_values[:, c] = block_scores[:, c]
+            if location_bonus:
+                at_location = cohort["location_prefs"] == cohort["location_ids"].get(plans[p]["location"], -2)
+                block_values[:, c] = np.where(at_location, block_scores[:, c] + location_bonus, block_scores[:, c])
+        top_plans = np.hstack([top_plans, np.broadcast_to(np.array(block, dtype=np.int64), (count, len(block)))])
+        top_scores = np.hstack([top_scores, block_scores])
+        top_values = np.hstack([top_values, block_values])
+        if top_values.shape[1] > width:
+            keep = np.argpartition(-top_values, width - 1, axis=1)[:, :width]
+            eligible_pairs = np.count_nonzero(np.isfinite(top_values))
+            top_plans = np.take_along_axis(top_plans, keep, axis=1)
+            top_scores = np.take_along_axis(top_scores, keep, axis=1)
+            top_values = np.take_along_axis(top_values, keep, axis=1)
+            count_stat("candidates_pruned", int(eligible_pairs - np.count_nonzero(np.isfinite(top_values))))
+
+    order = np.lexsort((top_plans, -top_values), axis=-1) if top_values.size else np.zeros((count, 0), dtype=np.int64)
+    return (np.take_along_axis(top_plans, order, axis=1),
+            np.take_along_axis(top_scores, order, axis=1),
+            np.take_along_axis(top_values, order, axis=1))
+
+
+def _deferred_acceptance(cohort: Dict[str, Any], plans: List[Dict[str, Any]], slots: List[Tuple[int, Optional[str], int]], available: np.ndarray) -> Dict[Tuple[int, Optional[str]], List[Tuple[int, float]]]:
+    """
+    Student-proposing deferred acceptance of available students into slots, keyed by (plan, category)
+
+    Students rank internships by score plus LOCATION_BONUS at their preferred
+    location; internships rank students by score. An internship holds the
+    best proposers of each category in that category's quota slot and the
+    best of the rest in its open slot, each slot a min-heap whose root is the
+    student it would drop first, so a proposal costs O(log seats).
+    """
+    slots_by_plan = _slots_by_plan(slots)
+    if not slots_by_plan:
+        return {}
+    top_plans, top_scores, _ = _top_plans(cohort, plans, slots_by_plan, available, STABLE_PREFERENCES_PER_STUDENT, LOCATION_BONUS)
+    category_names = {code: name for name, code in cohort["category_ids"].items()}
+    held: List[List[Tuple[float, int]]] = [[] for _ in slots]
+    next_choice = [0] * cohort["count"]
+    free = deque(int(i) for i in np.flatnonzero(np.isfinite(top_scores[:, 0]))) if top_scores.shape[1] else deque()
+
+    proposals = 0
+    while free:
+        i = free.popleft()
+        category = category_names.get(int(cohort["categories"][i]))
+        while next_choice[i] < top_scores.shape[1] and np.isfinite(top_scores[i, next_choice[i]]):
+            choice = next_choice[i]
+            next_choice[i] += 1
+            proposals += 1
+            plan_slots = slots_by_plan[int(top_plans[i, choice])]
+            rejected = _hold_proposal(held, slots, plan_slots, category, (float(top_scores[i, choice]), -i))
+            if rejected != i:
+                if rejected is not None:
+                    free.append(rejected)
+                break
+
+    logger.debug("Deferred acceptance settled after %s proposals", proposals)
+    placed: Dict[Tuple[int, Optional[str]], List[Tuple[int, float]]] = {}
+    for j, heap in enumerate(held):
+        p, category, _ = slots[j]
+        if heap:
+            placed[(p, category)] = [(-neg_index, score) for score, neg_index in heap]
+    return placed
+
+
+def _hold_proposal(held: List[List[Tuple[float, int]]], slots: List[Tuple[int, Optional[str], int]], plan_slots: Dict[Optional[str], int], category: Optional[str], item: Tuple[float, int]) -> Optional[int]:
+    """Offer a (score, -student) proposal to an internship's slots; returns the student it rejects, if any"""
+    targets = []
+    if category is not None and category in plan_slots:
+        targets.append(plan_slots[category])
+    if None in plan_slots:
+        targets.append(plan_slots[None])
+    # A student pushed out of a quota slot still competes for the open seats
+    for j in targets:
+        heap = held[j]
+        if len(heap) < slots[j][2]:
+            heapq.heappush(heap, item)
+            return None
+        if item > heap[0]:
+            item = heapq.heapreplace(heap, item)
+    return -item[1]
+
+
+def _slot_mask(cohort: Dict[str, Any], category: Optional[str]) -> np.ndarray:
+    """Students eligible for a slot: its category, or everyone for an open slot"""
+    if category is None:
+        return np.ones(cohort["count"], dtype=bool)
+    return cohort["categories"] == cohort["category_ids"].get(category, -2)
+
+
+def allocation_objective(allocations: List[Dict[str, Any]]) -> float:
+    """Total score of a set of allocations, the quantity the optimal engine maximises"""
+    return round(sum(float(a.get("score") or 0.0) for a in allocations), 4)
+
+
+def _internship_terms(internship: Dict[str, Any]) -> Tuple[Any, str, List[str], str, int]:
+    """Read id, display name, required skills, sector and seats from an internship row"""
+    internship_id = internship.get("id")
+    internship_name = internship.get("org_name") or internship.get("company") or "Unknown"
+    
+    # Handle both field name variations
+    required_skills = _normalize_list(
+        internship.get("skills_required") or 
+        internship.get("required_skills") or []
+    )
+    
+    sector = (internship.get("sector") or "").strip().lower()
+    
+    # Handle both 'seats' and 'total_positions' field names
+    seats = int(internship.get("seats") or internship.get("total_positions") or 0)
+    return internship_id, internship_name, required_skills, sector, seats
+
+
+def _internship_quotas(internship: Dict[str, Any], internship_name: str, sector: str, seats: int, required_skills: List[str]) -> Dict[str, int]:
+    """Read the positive per-category quota counts of an internship"""
+    logger.debug("Processing %s - %s seats, sector: %s", internship_name, seats, sector)
+    logger.debug("Required skills: %s", required_skills)
+    logger.debug("Quotas: %s", _raw_quotas(internship))
+
+    try:
+        return internship_quotas(internship)
+    except Exception as e:
+        logger.warning("Error processing quotas for %s: %s", internship_name, e)
+        return {}
+
+
+def internship_quotas(internship: Dict[str, Any]) -> Dict[str, int]:
+    """Positive per-category quota counts of an internship row, without logging; raises on a malformed quota_json"""
+    quotas = {}
+    for category, count in dict(_raw_quotas(internship)).items():
+        try:
+            c = int(count)
+            if c > 0:
+                quotas[str(category)] = c
+        except (ValueError, TypeError):
+            continue
+    return quotas
+
+
+def _raw_quotas(internship: Dict[str, Any]):
+    # Handle quota_json or individual quota fields
+    quotas_raw = internship.get("quota_json")
+    if not quotas_raw:
+        # Fallback to individual quota fields
+        quotas_raw = {
+            "GEN": internship.get("quota_gen", 0),
+            "OBC": internship.get("quota_obc", 0), 
+            "SC": internship.get("quota_sc", 0),
+            "ST": internship.get("quota_st", 0),
+            "EWS": internship.get("quota_ews", 0)
+        }
+    return quotas_raw
+
+
+def _student_profile(student: Dict[str, Any], vocab: SkillVocabulary) -> Optional[Tuple[float, str, int]]:
+    """
+    Parse the scoring inputs of a student once: marks, sector preference and skill bitset
+
+    Returns None when _final_score would fail for this student, which scores 0.0 everywhere.
+    """
+    try:
+        marks = float(student.get("marks") or 0.0)
+        student_sector_pref = (student.get("sector_pref") or "").strip().lower()
+    except Exception as e:
+        logger.warning("Error calculating score for student %s: %s", student.get('name', 'Unknown'), e)
+        return None
+    return marks, student_sector_pref, vocab.encode(student.get("skills") or [])
+
+
+def _profile_score(profile: Optional[Tuple[float, str, int]], internship_sector: str, required_bits: int) -> float:
+    """_final_score of a parsed student profile against an internship's required skill bitset"""
+    if profile is None:
+        return 0.0
+    marks, student_sector_pref, skill_bits = profile
+    skill_score = skill_match_score(skill_bits, required_bits)
+    sector_bonus = 20.0 if student_sector_pref and student_sector_pref == internship_sector else 0.0
+    return marks * 0.4 + skill_score * 0.4 + sector_bonus
+
+
+def _encode_students(students: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Encode marks, sector and location preferences, categories, skills and ids of all students into arrays"""
+    # Rows decoded from a snapshot (snapshot_store) come with the same encoding built from its columns
+    encoded_cohort = getattr(students, "encoded_cohort", None)
+    cohort = encoded_cohort() if encoded_cohort is not None else None
+    if cohort is not None:
+        return cohort
+
+    count = len(students)
+    marks = np.zeros(count, dtype=np.float64)
+    scorable = np.ones(count, dtype=bool)
+    sector_prefs = np.full(count, -1, dtype=np.int64)
+    location_prefs = np.full(count, -1, dtype=np.int64)
+    categories = np.full(count, -1, dtype=np.int64)
+    groups = np.zeros(count, dtype=np.int64)
+
+    vocab = SkillVocabulary()
+    skill_bits: List[int] = []
+    sector_ids: Dict[str, int] = {}
+    location_ids: Dict[str, int] = {}
+    category_ids: Dict[str, int] = {}
+    group_ids: Dict[Any, int] = {}
+
+    for i, student in enumerate(students):
+        groups[i] = group_ids.setdefault(student.get("id"), len(group_ids))
+
+        location_pref = student.get("location_pref")
+        if isinstance(location_pref, str) and location_pref.strip():
+            location_prefs[i] = location_ids.setdefault(location_pref.strip().lower(), len(location_ids))
+
+        category = student.get("category") or ""
+        if isinstance(category, str):
+            categories[i] = category_ids.setdefault(category, len(category_ids))
+
+        profile = _student_profile(student, vocab)
+        if profile is None:
+            scorable[i] = False
+            skill_bits.append(0)
+            continue
+        marks[i], sector_pref, bits = profile
+        if sector_pref:
+            sector_prefs[i] = sector_ids.setdefault(sector_pref, len(sector_ids))
+        skill_bits.append(bits)
+
+    return {
+        "count": count,
+        "marks": marks,
+        "scorable": scorable,
+        "sector_prefs": sector_prefs,
+        "sector_ids": sector_ids,
+        "location_prefs": location_prefs,
+        "location_ids": location_ids,
+        "categories": categories,
+        "category_ids": category_ids,
+        "groups": groups,
+        "group_count": len(group_ids),
+        "vocab": vocab,
+        "skills": vocab.pack(skill_bits),
+    }
+
+
+def _score_vector(cohort: Dict[str, Any], sector: str, required_skills: List[str]) -> np.ndarray:
+    """Compute _final_score of every encoded student against one internship"""
+    return _score_bits(cohort, cohort["sector_ids"].get(sector, -2), cohort["vocab"].encode(required_skills))
+
+
+def _score_bits(cohort: Dict[str, Any], sector_code: int, required_bits: int) -> np.ndarray:
+    """`_score_vector` for a sector already mapped to its code and skills already encoded"""
+    count_stat("score_evaluations", cohort["count"])
+    with phase("scoring"):
+        if required_bits:
+            # Skills no student has are interned past the packed width: they count in the denominator only
+            matches = packed_match_counts(cohort["skills"], required_bits)
+            skill_score = (matches / required_bits.bit_count()) * 100.0
+        else:
+            skill_score = np.full(cohort["count"], 100.0)
+
+        sector_bonus = np.where(cohort["sector_prefs"] == sector_code, 20.0, 0.0)
+        final = cohort["marks"] * 0.4 + skill_score * 0.4 + sector_bonus
+        final[~cohort["scorable"]] = 0.0
+    return final
+
+
+def _top_k(candidates: np.ndarray, scores: np.ndarray, k: int) -> np.ndarray:
+    """Return the k best candidates in the order of a stable descending sort by score"""
+    candidate_scores = scores[candidates]
+    if k < len(candidates):
+        count_stat("candidates_pruned", len(candidates) - k)
+        kth = np.partition(candidate_scores, len(candidates) - k)[len(candidates) - k]
+        above = candidates[candidate_scores > kth]
+        tied = candidates[candidate_scores == kth][:k - len(above)]
+        candidates = np.concatenate([above, tied])
+        candidate_scores = scores[candidates]
+    return candidates[np.argsort(-candidate_scores, kind="stable")]
+
+
 def _final_score(student: Dict[str, Any], internship_sector: str, required_skills: List[str]) -> float:
     """Calculate final score for student-internship match"""
     try:
@@ -147,7 +712,7 @@ def _final_score(student: Dict[str, Any], internship_sector: str, required_skill
         final = marks * 0.4 + skill_score * 0.4 + sector_bonus
         return final
     except Exception as e:
-        print(f"⚠️ Error calculating score for student {student.get('name', 'Unknown')}: {e}")
+        logger.warning("Error calculating score for student %s: %s", student.get('name', 'Unknown'), e)
         return 0.0
 
 
@@ -163,21 +728,6 @@ def _skill_match_score(student_skills: List[str], required_skills: List[str]) ->
         score = (matches / len(rset)) * 100.0
         return score
     except Exception as e:
-        print(f"⚠️ Error calculating skill match: {e}")
+        logger.warning("Error calculating skill match: %s", e)
         return 0.0
 
-
-def _normalize_list(value: Any) -> List[str]:
-    """Normalize various input formats to a list of strings"""
-    if not value:
-        return []
-    
-    try:
-        if isinstance(value, str):
-            return [s.strip() for s in value.split(",") if s.strip()]
-        if isinstance(value, list):
-            return [str(s).strip() for s in value if str(s).strip()]
-        return [str(value).strip()] if str(value).strip() else []
-    except Exception as e:
-        print(f"⚠️ Error normalizing list: {e}")
-        return []
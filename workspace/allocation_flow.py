@@ -0,0 +1,99 @@
+import heapq
+from typing import List, Tuple
+
+UNASSIGNED = -1
+
+
+def solve_assignment(edges: List[List[Tuple[int, int]]], capacities: List[int], order: List[int] = None) -> List[int]:
+    """
+    Maximum-weight capacitated assignment of students to slots
+
+    ``edges[s]`` lists the (slot, weight) pairs student ``s`` may take, with
+    integer weights; ``capacities[j]`` is the number of students slot ``j``
+    holds. Every student may also stay unassigned at weight 0, so the result
+    maximises the total weight and never assigns a non-positive edge.
+
+    This is min-cost flow on source -> student -> slot -> sink with unit
+    student arcs and slot arcs of capacity ``capacities[j]``, solved by
+    successive shortest augmenting paths (Jonker-Volgenant style): students
+    are inserted one at a time and Dijkstra runs over slots only, using slot
+    prices as potentials so reduced costs stay non-negative. A search stops
+    at the first slot with free capacity, or at "unassigned", which is
+    always free at reduced distance 0, so most insertions touch only the few
+    slots whose price the student can still beat.
+
+    Returns the slot of every student, or UNASSIGNED.
+    """
+    slot_count = len(capacities)
+    dummy = slot_count
+    prices = [0] * (slot_count + 1)
+    occupants: List[dict] = [dict() for _ in range(slot_count)]  # slot -> {student: cost of its edge}
+    assigned = [UNASSIGNED] * len(edges)
+    # Free slots keep price 0 and slots never empty again once full, which keeps the duals feasible
+    for s in (order if order is not None else range(len(edges))):
+        _augment(s, edges, capacities, prices, occupants, assigned, dummy)
+    return assigned
+
+
+def _augment(s, edges, capacities, prices, occupants, assigned, dummy):
+    dist = {dummy: 0}
+    pred = {dummy: None}
+    heap = [(0, 0, dummy)]  # (distance, 0 for "unassigned" so it wins ties, slot)
+    for j, weight in edges[s]:
+        d = -weight - prices[j]
+        if d < dist.get(j, 0):
+            dist[j] = d
+            pred[j] = None
+            heapq.heappush(heap, (d, 1, j))
+
+    scanned = []
+    done = set()
+    while True:
+        d, _, j = heapq.heappop(heap)
+        if j in done or d > dist[j]:
+            continue
+        if j == dummy or len(occupants[j]) < capacities[j]:
+            end = j
+            break
+        done.add(j)
+        scanned.append(j)
+        price = prices[j]
+        for t, cost in occupants[j].items():
+            # t's matched edge is tight: moving t from j to j2 costs its reduced cost on j2
+            offset = d - cost + price
+            if offset < dist[dummy]:
+                dist[dummy] = offset
+                pred[dummy] = (t, j)
+                heapq.heappush(heap, (offset, 0, dummy))
+            # Nothing at or beyond the current distance of "unassigned" can end the search earlier
+            limit = dist[dummy]
+            for j2, weight in edges[t]:
+                nd = offset - weight - prices[j2]
+                if nd < limit and nd < dist.get(j2, limit) and j2 not in done:
+                    dist[j2] = nd
+                    pred[j2] = (t, j)
+                    heapq.heappush(heap, (nd, 1, j2))
+
+    shortest = dist[end]
+    for j in scanned:
+        prices[j] += dist[j] - shortest
+
+    # Walk back from the free slot: each student on the path moves one slot forward
+    j = end
+    while True:
+        step = pred[j]
+        mover, source_slot = (s, None) if step is None else step
+        if j != dummy:
+            occupants[j][mover] = -_weight(edges[mover], j)
+        assigned[mover] = j if j != dummy else UNASSIGNED
+        if step is None:
+            return
+        del occupants[source_slot][mover]
+        j = source_slot
+
+
+def _weight(student_edges: List[Tuple[int, int]], slot: int) -> int:
+    for j, weight in student_edges:
+        if j == slot:
+            return weight
+    raise KeyError(slot)
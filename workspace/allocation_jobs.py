@@ -0,0 +1,333 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Allocation runs executing at once; a run holds the whole cohort in memory
+DEFAULT_JOB_WORKERS = 1
+# Finished jobs kept for polling before the oldest are forgotten
+DEFAULT_KEPT_JOBS = 50
+# Seconds between reads of a job that another process is running, while waiting on it
+STORED_JOB_POLL_SECONDS = 0.1
+# Lock file in the state directory held by the process running a job
+CLAIM_FILE = "active.lock"
+# A finished job's result is stored apart from its state, which every listing and poll reads
+RESULT_SUFFIX = ".result.json"
+
+# Work reports progress as (phase, percent) and returns the JSON body with its HTTP status
+Progress = Callable[[str, int], None]
+JobWork = Callable[[Progress], Tuple[Dict[str, Any], int]]
+
+
+class AllocationJob:
+    def __init__(self, job_id: str, engine: str):
+        self.id = job_id
+        self.engine = engine
+        self.status = "queued"  # queued, running, succeeded or failed
+        self.phase = "queued"
+        self.percent = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.status_code: Optional[int] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._done = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self._done.is_set()
+
+    def progress(self, phase: str, percent: int):
+        self.phase = phase
+        self.percent = max(self.percent, min(100, int(percent)))
+
+    def finish(self, result: Dict[str, Any], status_code: int):
+        self.result = result
+        self.status_code = status_code
+        self.status = "succeeded" if status_code < 400 else "failed"
+        self.phase = "done"
+        if self.status == "succeeded":
+            self.percent = 100
+        self.finished_at = time.time()
+        self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    @property
+    def stats(self) -> Optional[Dict[str, Any]]:
+        return self.result.get("stats") if self.result else None
+
+    def restore(self, data: Dict[str, Any]):
+        """Take on the state recorded by ``to_dict`` (plus ``status_code``), as another process saved it"""
+        for field in ("status", "phase", "percent", "created_at", "started_at", "finished_at"):
+            setattr(self, field, data.get(field))
+        self.result = data.get("result")
+        self.status_code = data.get("status_code")
+        if self.status in ("succeeded", "failed"):
+            self._done.set()
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        job = {
+            "job_id": self.id,
+            "engine": self.engine,
+            "status": self.status,
+            "phase": self.phase,
+            "percent": self.percent,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.finished and self.stats is not None:
+            # Engine stats stay in the job listing so runs can be compared without their allocations
+            job["stats"] = self.stats
+        if include_result and self.finished:
+            job["result"] = self.result
+        return job
+
+
+class StoredAllocationJob(AllocationJob):
+    """
+    A job run by another process sharing the state directory, read back from its state file
+
+    The state file holds the progress and stats; the result is read from its
+    own file the first time it is asked for, once the job has finished.
+    """
+
+    def __init__(self, path: str, data: Dict[str, Any]):
+        self._result = None
+        self._stats = None
+        super().__init__(data["job_id"], data["engine"])
+        self.path = path
+        self.restore(data)
+
+    @property
+    def result(self) -> Optional[Dict[str, Any]]:
+        if self._result is None and self.finished:
+            self._result = _read_state(_result_path(self.path))
+        return self._result
+
+    @result.setter
+    def result(self, result: Optional[Dict[str, Any]]):
+        self._result = result
+
+    @property
+    def stats(self) -> Optional[Dict[str, Any]]:
+        return self._stats
+
+    def restore(self, data: Dict[str, Any]):
+        super().restore(data)
+        self._stats = data.get("stats")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.finished:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(STORED_JOB_POLL_SECONDS)
+            data = _read_state(self.path)
+            if data is not None:
+                self.restore(data)
+        return True
+
+
+class AllocationJobRunner:
+    """
+    Runs allocation jobs on a bounded worker pool, at most one at a time per runner
+
+    ``submit`` while a job is queued or running hands back that job instead of
+    starting another, so two admins pressing "run" cannot upsert the same
+    cohort twice. Finished jobs stay available to ``get`` until ``kept_jobs``
+    newer ones have finished.
+
+    Runners in several processes (the workers of serve.py) share jobs through
+    ``state_dir``: each job's state is written there as JSON (its result to a
+    file of its own, read only when a finished job is fetched), ``get`` and
+    ``jobs`` read the jobs of the other processes back, and a lock file keeps
+    the one-run-at-a-time rule across all of them. A job left "running" by a
+    process that died is marked failed when the next run claims the lock.
+    """
+
+    def __init__(self, workers: int = DEFAULT_JOB_WORKERS, kept_jobs: int = DEFAULT_KEPT_JOBS, state_dir: Optional[str] = None):
+        self.kept_jobs = kept_jobs
+        self.state_dir = state_dir
+        self._claim = None
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="allocation-job")
+        self._lock = threading.Lock()
+        # Serializes submits, which may wait on another process's claim without holding up get and jobs
+        self._submitting = threading.Lock()
+        self._jobs: "OrderedDict[str, AllocationJob]" = OrderedDict()
+        self._active: Optional[AllocationJob] = None
+
+    def submit(self, engine: str, work: JobWork) -> Tuple[AllocationJob, bool]:
+        """Start ``work`` as a job, or return the job already in flight; the flag is True for a new job"""
+        with self._submitting:
+            with self._lock:
+                if self._active is not None and not self._active.finished:
+                    return self._active, False
+            running = self._claim_runs() if self.state_dir else None
+            if running is not None:
+                return running, False
+            job = AllocationJob(uuid.uuid4().hex, engine)
+            with self._lock:
+                self._jobs[job.id] = job
+                self._active = job
+                self._forget_old_jobs()
+            try:
+                self._save(job)
+            except Exception as e:
+                # The job still runs; _run records it again and releases the claim however it ends
+                logger.error("Could not record allocation job %s: %s", job.id, e)
+        self._executor.submit(self._run, job, work)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[AllocationJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.state_dir and re.fullmatch(r"[0-9a-f]{32}", job_id):
+            job = self._load(os.path.join(self.state_dir, f"{job_id}.json"))
+        return job
+
+    def jobs(self) -> List[AllocationJob]:
+        """Known jobs, newest first"""
+        with self._lock:
+            local = list(reversed(self._jobs.values()))
+        if not self.state_dir:
+            return local
+        known = {job.id: job for job in self._stored_jobs()}
+        known.update((job.id, job) for job in local)
+        return sorted(known.values(), key=lambda job: job.created_at, reverse=True)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: AllocationJob, work: JobWork):
+        job.status = "running"
+        job.started_at = time.time()
+
+        def progress(phase: str, percent: int):
+            job.progress(phase, percent)
+            self._save(job)
+
+        result, status_code = {"error": "Allocation failed", "message": "The allocation job stopped unexpectedly"}, 500
+        try:
+            self._save(job)
+            result, status_code = work(progress)
+        except Exception as e:
+            logger.error("Allocation job %s failed: %s", job.id, e)
+            result, status_code = {"error": "Allocation failed", "message": str(e)}, 500
+        finally:
+            # However the job ended it must finish and give up the claim, or every later submit returns it
+            job.finish(result, status_code)
+            if self.state_dir:
+                try:
+                    self._save_result(job)
+                    self._save(job)
+                    self._forget_old_states()
+                except Exception as e:
+                    logger.error("Could not record allocation job %s: %s", job.id, e)
+                finally:
+                    self._release_runs()
+
+    def _forget_old_jobs(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.kept_jobs)]:
+            del self._jobs[job_id]
+
+    def _claim_runs(self) -> Optional[AllocationJob]:
+        """Take the cross-process run lock, or return the job another process holds it for"""
+        # The holder saves its job right after claiming, so give a new one a moment to appear
+        for _ in range(50):
+            if self._try_claim():
+                return None
+            running = [job for job in self._stored_jobs() if not job.finished]
+            if running:
+                return running[0]
+            time.sleep(0.02)
+        raise RuntimeError("Another process holds the allocation lock without a running job")
+
+    def _try_claim(self) -> bool:
+        import fcntl
+
+        claim = open(os.path.join(self.state_dir, CLAIM_FILE), "a")
+        try:
+            fcntl.flock(claim, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            claim.close()
+            return False
+        self._claim = claim
+        # Nothing else can be running now, so a job still marked running lost its process
+        for stale in self._stored_jobs():
+            if not stale.finished:
+                logger.warning("Allocation job %s was left %s by an exited process", stale.id, stale.status)
+                stale.finish({"error": "Allocation failed", "message": "The process running this job exited"}, 500)
+                self._save_result(stale)
+                self._save(stale)
+        return True
+
+    def _release_runs(self):
+        import fcntl
+
+        # Not under self._submitting: submit holds it while waiting for this very release
+        claim, self._claim = self._claim, None
+        if claim is not None:
+            fcntl.flock(claim, fcntl.LOCK_UN)
+            claim.close()
+
+    def _save(self, job: AllocationJob):
+        if self.state_dir:
+            _write_state(os.path.join(self.state_dir, f"{job.id}.json"), dict(job.to_dict(include_result=False), status_code=job.status_code))
+
+    def _save_result(self, job: AllocationJob):
+        # Written before the finished state, so a reader that sees the job finished finds its result
+        if self.state_dir:
+            _write_state(os.path.join(self.state_dir, f"{job.id}{RESULT_SUFFIX}"), job.result)
+
+    def _load(self, path: str) -> Optional[StoredAllocationJob]:
+        data = _read_state(path)
+        return None if data is None else StoredAllocationJob(path, data)
+
+    def _stored_jobs(self) -> List[StoredAllocationJob]:
+        """Jobs saved by every process, newest first"""
+        names = [name for name in os.listdir(self.state_dir) if name.endswith(".json") and not name.endswith(RESULT_SUFFIX)]
+        jobs = [job for job in (self._load(os.path.join(self.state_dir, name)) for name in names) if job is not None]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def _forget_old_states(self):
+        finished = sorted((job for job in self._stored_jobs() if job.finished), key=lambda job: job.finished_at or 0)
+        for job in finished[:max(0, len(finished) - self.kept_jobs)]:
+            for path in (job.path, _result_path(job.path)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def _result_path(state_path: str) -> str:
+    return state_path[:-len(".json")] + RESULT_SUFFIX
+
+
+def _write_state(path: str, data: Any):
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary, "w") as f:
+        json.dump(data, f, default=str)
+    # Readers in other processes see the old state or the new one, never half a file
+    os.replace(temporary, path)
+
+
+def _read_state(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,245 @@
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from allocation_stats import count as count_stat, phase
+from allocation_fixed import _encode_students, _internship_terms, _internship_quotas, _score_bits, _top_k
+
+logger = logging.getLogger(__name__)
+
+# Candidates a worker ranks per seat of a pass; running out only costs a rescore in the parent
+PARALLEL_CANDIDATES_PER_SEAT = 8
+# Partitions are split into about this many tasks per worker so uneven partitions still balance
+TASKS_PER_WORKER = 4
+
+_SHARED_FIELDS = ("marks", "scorable", "sector_prefs", "categories", "skills")
+
+# Set in each worker process by _attach
+_worker_cohort: Optional[Dict[str, Any]] = None
+_worker_buffers: List[shared_memory.SharedMemory] = []
+
+# (internship index, sector code, required skill bits, [(category code or None, depth)])
+Spec = Tuple[int, int, int, List[Tuple[Optional[int], int]]]
+# category code or None -> (students best first, their scores, whether the list holds every candidate)
+Ranking = Dict[Optional[int], Tuple[np.ndarray, np.ndarray, bool]]
+
+
+class SharedCohort:
+    """
+    Encoded cohort arrays copied once into shared memory
+
+    Workers map the buffers in place of unpickling the student rows, so a
+    task only carries the internship terms it scores. Use as a context
+    manager: the buffers are unlinked on exit.
+    """
+
+    def __init__(self, cohort: Dict[str, Any]):
+        self.count = cohort["count"]
+        self.layout: Dict[str, Tuple[str, Tuple[int, ...], str]] = {}
+        self._buffers: List[shared_memory.SharedMemory] = []
+        try:
+            for field in _SHARED_FIELDS:
+                array = np.ascontiguousarray(cohort[field])
+                buffer = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+                self._buffers.append(buffer)
+                np.ndarray(array.shape, array.dtype, buffer=buffer.buf)[...] = array
+                self.layout[field] = (buffer.name, array.shape, array.dtype.str)
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self) -> "SharedCohort":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for buffer in self._buffers:
+            buffer.close()
+            buffer.unlink()
+        self._buffers = []
+
+
+def run_allocation_parallel(students: List[Dict[str, Any]], internships: List[Dict[str, Any]], workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Allocate like the vectorized engine with scoring spread over a process pool
+
+    Scoring is independent of who is already assigned, so internships are
+    partitioned by sector and location and each worker ranks, per quota
+    category and for the open pass, the best PARALLEL_CANDIDATES_PER_SEAT
+    students per seat in the order of a stable descending sort. The parent
+    then fills internships in table order, walking each ranking past
+    students already taken. A ranking is a prefix of the exact order, so the
+    result is identical to the vectorized engine; when too many of its
+    students are gone the parent rescores that internship itself.
+    """
+    workers = workers or os.cpu_count() or 1
+    with phase("normalization"):
+        cohort = _encode_students(students)
+
+    terms = []
+    partitions: Dict[Tuple[str, str], List[Spec]] = {}
+    partition_seats: Dict[Tuple[str, str], int] = {}
+    for t, internship in enumerate(internships):
+        internship_id, internship_name, required_skills, sector, seats = _internship_terms(internship)
+
+        if seats <= 0:
+            logger.debug("Skipping %s - no seats available", internship_name)
+            continue
+
+        quotas = _internship_quotas(internship, internship_name, sector, seats, required_skills)
+        sector_code = cohort["sector_ids"].get(sector, -2)
+        required_bits = cohort["vocab"].encode(required_skills)
+        location = internship.get("location")
+        key = (sector, location.strip().lower() if isinstance(location, str) else "")
+        # Earlier internships of a partition want the same students, so rank past the seats they can take
+        taken = partition_seats.get(key, 0)
+        partition_seats[key] = taken + seats
+        wanted = [(cohort["category_ids"].get(c, -2), count * PARALLEL_CANDIDATES_PER_SEAT + taken) for c, count in quotas.items()]
+        wanted.append((None, seats * PARALLEL_CANDIDATES_PER_SEAT + taken))
+        terms.append((t, internship_id, seats, quotas, sector_code, required_bits))
+        partitions.setdefault(key, []).append((t, sector_code, required_bits, wanted))
+
+    tasks = _split_partitions(list(partitions.values()), workers * TASKS_PER_WORKER)
+    rankings: Dict[int, Ranking] = {}
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            rankings.update(_rank_specs(cohort, task))
+    else:
+        with phase("scoring"), SharedCohort(cohort) as shared:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_attach, initargs=(shared.layout, shared.count)) as executor:
+                for result in executor.map(_rank_partition, tasks):
+                    rankings.update(result)
+        _count_worker_stats(cohort, tasks)
+
+    allocations, assigned_count, rescored = _merge_rankings(students, cohort, terms, rankings)
+
+    logger.debug("Scored %s internships in %s partitions on %s workers, rescored %s passes", len(terms), len(partitions), min(workers, max(1, len(tasks))), rescored)
+    logger.info("Allocation complete: generated %s allocations", len(allocations))
+    logger.info("Students allocated: %s out of %s", assigned_count, len(students))
+
+    return allocations
+
+
+def _count_worker_stats(cohort: Dict[str, Any], tasks: List[List[Spec]]):
+    """Count the score evaluations and top-k cuts of the workers, whose own counts stay in their processes"""
+    category_sizes = np.bincount(cohort["categories"][cohort["categories"] >= 0])
+    for task in tasks:
+        for _, _, _, wanted in task:
+            count_stat("score_evaluations", cohort["count"])
+            for code, depth in wanted:
+                if code is None:
+                    size = cohort["count"]
+                else:
+                    size = int(category_sizes[code]) if 0 <= code < len(category_sizes) else 0
+                count_stat("candidates_pruned", max(0, size - depth))
+
+
+def _split_partitions(partitions: List[List[Spec]], task_count: int) -> List[List[Spec]]:
+    """Cut partitions into tasks of at most ceil(internships / task_count) specs, keeping each task within one partition"""
+    total = sum(len(specs) for specs in partitions)
+    size = max(1, math.ceil(total / max(1, task_count)))
+    return [specs[start:start + size] for specs in partitions for start in range(0, len(specs), size)]
+
+
+def _attach(layout: Dict[str, Tuple[str, Tuple[int, ...], str]], count: int):
+    """Worker initializer: map the shared cohort arrays"""
+    global _worker_cohort
+    cohort: Dict[str, Any] = {"count": count}
+    for field, (name, shape, dtype) in layout.items():
+        buffer = shared_memory.SharedMemory(name=name)
+        _worker_buffers.append(buffer)
+        cohort[field] = np.ndarray(shape, np.dtype(dtype), buffer=buffer.buf)
+    _worker_cohort = cohort
+
+
+def _rank_partition(specs: List[Spec]) -> Dict[int, Ranking]:
+    return _rank_specs(_worker_cohort, specs)
+
+
+def _rank_specs(cohort: Dict[str, Any], specs: List[Spec]) -> Dict[int, Ranking]:
+    """Rank the best candidates of every pass of every internship in a task"""
+    everyone = np.arange(cohort["count"])
+    members: Dict[int, np.ndarray] = {}
+    rankings: Dict[int, Ranking] = {}
+    for t, sector_code, required_bits, wanted in specs:
+        scores = _score_bits(cohort, sector_code, required_bits)
+        ranking: Ranking = {}
+        for code, depth in wanted:
+            if code is None:
+                candidates = everyone
+            else:
+                if code not in members:
+                    members[code] = np.flatnonzero(cohort["categories"] == code)
+                candidates = members[code]
+            best = _top_k(candidates, scores, depth)
+            ranking[code] = (best, scores[best], depth >= len(candidates))
+        rankings[t] = ranking
+    return rankings
+
+
+def _merge_rankings(students: List[Dict[str, Any]], cohort: Dict[str, Any], terms: List[Tuple], rankings: Dict[int, Ranking]) -> Tuple[List[Dict[str, Any]], int, int]:
+    """Fill internships in table order from their rankings; returns allocations, students allocated and passes rescored"""
+    allocations: List[Dict[str, Any]] = []
+    assigned_groups = np.zeros(cohort["group_count"], dtype=bool)
+    student_groups = cohort["groups"]
+    rescored = 0
+
+    for t, internship_id, seats, quotas, sector_code, required_bits in terms:
+        ranking = rankings[t]
+        scores = None
+        filled_quota = 0
+        passes = [(category, cohort["category_ids"].get(category, -2), count) for category, count in quotas.items()]
+        passes.append((None, None, None))
+
+        for category, code, count in passes:
+            if category is None:
+                count = seats - filled_quota
+                if count <= 0:
+                    break
+            chosen = _walk_ranking(ranking[code], count, assigned_groups, student_groups)
+            if chosen is None:
+                # Too many ranked students were taken: rank this pass exactly over everyone left
+                rescored += 1
+                if scores is None:
+                    scores = _score_bits(cohort, sector_code, required_bits)
+                eligible = ~assigned_groups[student_groups]
+                if code is not None:
+                    eligible &= cohort["categories"] == code
+                best = _top_k(np.flatnonzero(eligible), scores, count)
+                chosen = list(zip(best.tolist(), scores[best].tolist()))
+
+            for idx, score in chosen:
+                allocations.append({
+                    "student_id": students[idx].get("id"),
+                    "internship_id": internship_id,
+                    "score": round(score, 4),
+                    "allocation_type": "quota" if category is not None else "open",
+                    "reason": f"quota for {category}" if category is not None else "open seat",
+                })
+                assigned_groups[student_groups[idx]] = True
+            if category is not None:
+                filled_quota += len(chosen)
+
+    return allocations, int(np.count_nonzero(assigned_groups)), rescored
+
+
+def _walk_ranking(ranking: Tuple[np.ndarray, np.ndarray, bool], count: int, assigned_groups: np.ndarray, student_groups: np.ndarray) -> Optional[List[Tuple[int, float]]]:
+    """Take the first ``count`` ranked students still free, or None when a cut ranking runs out first"""
+    best, scores, complete = ranking
+    chosen = []
+    for idx, score in zip(best.tolist(), scores.tolist()):
+        if len(chosen) == count:
+            break
+        # Assignments land after the pass, so rows sharing an id can be chosen together, as in the other engines
+        if not assigned_groups[student_groups[idx]]:
+            chosen.append((idx, score))
+    if len(chosen) < count and not complete:
+        return None
+    return chosen
@@ -0,0 +1,115 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Stats of the allocation run in progress on this thread, if it is being measured
+_current: ContextVar[Optional["AllocationStats"]] = ContextVar("allocation_stats", default=None)
+
+PHASES = ("normalization", "scoring", "selection")
+
+
+class AllocationStats:
+    """
+    Phase timers and counters of one allocation run
+
+    Normalization is encoding the cohort (profiles, skill bits, category and
+    sector codes). Scoring is computing match scores, and selection is the rest
+    of the engine: ranking, solving and filling seats. A score evaluation is
+    one student scored against one internship. A candidate is pruned when the
+    engine drops it without ranking it: the greedy pool's score bound rules it
+    out unscored, a partial top-k sort cuts it, or the slot engines keep only a
+    student's best internships as edges.
+    """
+
+    def __init__(self, engine: str):
+        self.engine = engine
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.total_seconds = 0.0
+        self.counters = Counter()
+        self.seats_filled_by_category: Dict[str, int] = {}
+        self._open_phase: Optional[str] = None
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] += int(amount)
+
+    def finish(self, allocations: List[Dict[str, Any]], students: int, internships: int, total_seconds: float):
+        """Fill in the totals that follow from the allocations themselves"""
+        filled = Counter()
+        for allocation in allocations:
+            reason = allocation.get("reason") or ""
+            filled[reason[len("quota for "):] if reason.startswith("quota for ") else "open"] += 1
+        self.seats_filled_by_category = dict(filled)
+        self.counters["students"] = students
+        self.counters["internships"] = internships
+        self.counters["allocations"] = len(allocations)
+        self.total_seconds = total_seconds
+        # Whatever the engine did outside normalization and scoring was selecting candidates
+        self.seconds["selection"] = max(0.0, total_seconds - self.seconds["normalization"] - self.seconds["scoring"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "engine": self.engine,
+            "students": self.counters["students"],
+            "internships": self.counters["internships"],
+            "allocations": self.counters["allocations"],
+            "normalization_seconds": round(self.seconds["normalization"], 6),
+            "scoring_seconds": round(self.seconds["scoring"], 6),
+            "selection_seconds": round(self.seconds["selection"], 6),
+            "total_seconds": round(self.total_seconds, 6),
+            "score_evaluations": self.counters["score_evaluations"],
+            "candidates_pruned": self.counters["candidates_pruned"],
+            "seats_filled_by_category": self.seats_filled_by_category,
+        }
+
+
+@contextmanager
+def collect_stats(engine: str) -> Iterator[AllocationStats]:
+    """Measure the allocation run inside the block into the yielded stats"""
+    stats = AllocationStats(engine)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def current_stats() -> Optional[AllocationStats]:
+    return _current.get()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Add the time spent in the block to ``name``; nested phases are counted by the outermost one"""
+    stats = _current.get()
+    if stats is None or stats._open_phase is not None:
+        yield
+        return
+    stats._open_phase = name
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.seconds[name] += time.perf_counter() - started
+        stats._open_phase = None
+
+
+def count(name: str, amount: int = 1):
+    """Add to a counter of the run being measured, if any"""
+    stats = _current.get()
+    if stats is not None:
+        stats.count(name, amount)
+
+
+def timed_scoring(score: Callable[[int], float], stats: AllocationStats) -> Callable[[int], float]:
+    """Wrap a per-student score function so its calls add to the scoring time of ``stats``"""
+    seconds = stats.seconds
+    clock = time.perf_counter
+
+    def timed(i: int) -> float:
+        started = clock()
+        value = score(i)
+        seconds["scoring"] += clock() - started
+        return value
+    return timed
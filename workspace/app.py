@@ -1,30 +1,105 @@
 import os
-from flask import Flask, request, jsonify, session, send_from_directory, redirect
+import logging
+from datetime import datetime, timezone
+from functools import partial
+from flask import Flask, request, jsonify, session, redirect, abort
 from flask_cors import CORS
 from werkzeug.exceptions import HTTPException
 from dotenv import load_dotenv
 
 from supabase_client import get_supabase
-from allocation_fixed import run_allocation
+from supabase_async import execute_concurrently, query_executor
+from allocation_fixed import run_allocation, run_allocation_with_stats, allocation_objective, ALLOCATION_ENGINES
+from http_caching import table_version, content_etag, conditional_json, compress_response, DEFAULT_COMPRESS_MIN_BYTES
+from dashboard_aggregates import DashboardAggregates, DEFAULT_RECONCILE_SECONDS
+from allocation_jobs import AllocationJobRunner, DEFAULT_JOB_WORKERS
+from metrics import AppMetrics
+from request_profiler import RequestProfiler, DEFAULT_KEEP as DEFAULT_PROFILE_KEEP
+from static_assets import DistAssets, DEFAULT_MEMORY_MAX_BYTES as DEFAULT_STATIC_MEMORY_MAX_BYTES
+from snapshot_store import SnapshotStore
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+def configure_logging():
+    """Send app logs to stderr at LOG_LEVEL; the default WARNING keeps per-request debug output off"""
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "WARNING").upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
 def create_app():
     app = Flask(__name__, static_url_path='', static_folder='dist')
 
-    # Serve static assets from dist/assets/
-    # ...existing code...
+    # Indexed once here (before serve.py forks): a hit is a dict lookup, and small files never touch the disk
+    dist = DistAssets(app.static_folder, int(os.getenv("STATIC_MEMORY_MAX_BYTES", DEFAULT_STATIC_MEMORY_MAX_BYTES)))
+    app.extensions['dist_assets'] = dist
+
+    def index_html():
+        """The SPA's index.html from memory, or a JSON 404 when the frontend has not been built"""
+        response = dist.response('index.html')
+        if response is None:
+            return jsonify({"error": "Not Found", "message": "The frontend has not been built", "status": 404}), 404
+        return response
+
+    def dist_file(filename):
+        response = dist.response(filename)
+        if response is None:
+            abort(404)
+        return response
+
+    # Flask's static route (every path under dist/) goes through the index too
+    app.view_functions['static'] = dist_file
 
     # Catch-all route for SPA (React) - serve index.html for any unknown route
     @app.errorhandler(404)
     def not_found(e):
-        return send_from_directory(app.static_folder, 'index.html')
+        return index_html()
     app.secret_key = os.getenv("SECRET_KEY", "dev-secret")
     app.config['SESSION_COOKIE_SECURE'] = False  # Set to True in production with HTTPS
     app.config['SESSION_COOKIE_HTTPONLY'] = True
     app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
     app.config['PERMANENT_SESSION_LIFETIME'] = 3600  # 1 hour
     CORS(app, supports_credentials=True)
+    configure_logging()
+
+    # Registered before the other after_request hooks so its latency covers them too
+    metrics = AppMetrics(cache_stats=lambda: getattr(get_supabase(), "cache_stats", dict)())
+    metrics.install(app, token=os.getenv("METRICS_TOKEN"))
+    app.extensions['metrics'] = metrics
+
+    # Opt-in: without PROFILE_DIR no profiling hooks are installed at all
+    if os.getenv("PROFILE_DIR"):
+        profiler = RequestProfiler(
+            os.getenv("PROFILE_DIR"),
+            sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", 0)),
+            keep=int(os.getenv("PROFILE_KEEP", DEFAULT_PROFILE_KEEP)),
+        )
+        profiler.install(app, is_admin=lambda: bool(session.get("logged_in")) and session.get("user_type") == "admin")
+        app.extensions['profiler'] = profiler
+    app.config['COMPRESS_MIN_BYTES'] = int(os.getenv("COMPRESS_MIN_BYTES", DEFAULT_COMPRESS_MIN_BYTES))
+
+    @app.after_request
+    def compress(response):
+        return compress_response(response, app.config['COMPRESS_MIN_BYTES'])
+
+    aggregates = DashboardAggregates(float(os.getenv("DASHBOARD_RECONCILE_SECONDS", DEFAULT_RECONCILE_SECONDS)))
+    app.extensions['dashboard_aggregates'] = aggregates
+    # serve.py points its workers at one ALLOCATION_JOB_DIR so a job can be polled from any of them
+    jobs = AllocationJobRunner(int(os.getenv("ALLOCATION_JOB_WORKERS", DEFAULT_JOB_WORKERS)), state_dir=os.getenv("ALLOCATION_JOB_DIR") or None)
+    app.extensions['allocation_jobs'] = jobs
+    # Opt-in: with SNAPSHOT_DIR, full reads of students and internships come from mmap'd snapshots while current
+    snapshots = SnapshotStore(os.getenv("SNAPSHOT_DIR")) if os.getenv("SNAPSHOT_DIR") else None
+    app.extensions['snapshots'] = snapshots
+
+    def table_rows(supabase, table, version=None, fetch=None):
+        """Every row of ``table``: from its snapshot when SNAPSHOT_DIR is set, else ``fetch()`` or a full read"""
+        if snapshots is not None:
+            return snapshots.rows(supabase, table, version)
+        if fetch is not None:
+            return fetch()
+        return supabase.table(table).select("*").execute_all().data
 
     @app.errorhandler(Exception)
     def handle_exception(err):
@@ -47,7 +122,7 @@ def create_app():
     @app.route("/session_status", methods=["GET"])
     def session_status():
         logged_in = session.get("logged_in", False)
-        print(f"Session status check - logged_in: {logged_in}")
+        logger.debug("Session status check - logged_in: %s", logged_in)
         return jsonify({
             "logged_in": logged_in,
             "session_id": session.get("_id", "none")
@@ -60,18 +135,19 @@ def create_app():
         
         try:
             supabase = get_supabase()
-            client_type = str(type(supabase))
-            print(f"Supabase client type: {client_type}")
+            # The read cache wraps the real client
+            client_type = str(type(getattr(supabase, "client", supabase)))
+            logger.debug("Supabase client type: %s", client_type)
             
             # Check all tables
             students = supabase.table("students").select("*").execute()
             internships = supabase.table("internships").select("*").execute()
             allocations = supabase.table("allocations").select("*").execute()
             
-            print(f"Students: {len(students.data)}")
-            print(f"Internships: {len(internships.data)}")
-            print(f"Allocations: {len(allocations.data)}")
-            print(f"Allocations data: {allocations.data}")
+            logger.debug("Students: %s", len(students.data))
+            logger.debug("Internships: %s", len(internships.data))
+            logger.debug("Allocations: %s", len(allocations.data))
+            logger.debug("Allocations data: %s", allocations.data)
             
             return jsonify({
                 "client_type": client_type,
@@ -81,10 +157,11 @@ def create_app():
                 "allocations_count": len(allocations.data),
                 "allocations_data": allocations.data,
                 "students_sample": students.data[:2] if students.data else [],
-                "internships_sample": internships.data[:2] if internships.data else []
+                "internships_sample": internships.data[:2] if internships.data else [],
+                "cache_stats": supabase.cache_stats() if hasattr(supabase, "cache_stats") else {}
             })
         except Exception as e:
-            print(f"Debug DB error: {e}")
+            logger.error("Debug DB error: %s", e)
             return jsonify({"error": str(e)}), 500
     
     @app.route("/test_allocation_insert", methods=["POST"])
@@ -110,14 +187,14 @@ def create_app():
                 "reason": "test - test allocation"
             }
             
-            print(f"Testing allocation insert: {test_record}")
+            logger.debug("Testing allocation insert: %s", test_record)
             result = supabase.table("allocations").insert([test_record]).execute()
-            print(f"Insert result: {result.data}")
+            logger.debug("Insert result: %s", result.data)
             
             # Verify it was inserted
             all_allocations = supabase.table("allocations").select("*").execute()
-            print(f"Total allocations after test insert: {len(all_allocations.data)}")
-            print(f"All allocations data: {all_allocations.data}")
+            logger.debug("Total allocations after test insert: %s", len(all_allocations.data))
+            logger.debug("All allocations data: %s", all_allocations.data)
             
             return jsonify({
                 "message": "Test allocation inserted",
@@ -126,7 +203,7 @@ def create_app():
                 "all_allocations": all_allocations.data
             })
         except Exception as e:
-            print(f"Test insert error: {e}")
+            logger.error("Test insert error: %s", e)
             return jsonify({"error": str(e)}), 500
     
     @app.route("/raw_allocations", methods=["GET"])
@@ -139,11 +216,11 @@ def create_app():
             
             # Get raw allocations data
             allocations = supabase.table("allocations").select("*").execute()
-            print(f"=== RAW ALLOCATIONS CHECK ===")
-            print(f"Raw response: {allocations}")
-            print(f"Raw data: {allocations.data}")
-            print(f"Data type: {type(allocations.data)}")
-            print(f"Data length: {len(allocations.data) if allocations.data else 'None'}")
+            logger.debug("=== RAW ALLOCATIONS CHECK ===")
+            logger.debug("Raw response: %s", allocations)
+            logger.debug("Raw data: %s", allocations.data)
+            logger.debug("Data type: %s", type(allocations.data))
+            logger.debug("Data length: %s", len(allocations.data) if allocations.data else 'None')
             
             return jsonify({
                 "raw_response": str(allocations),
@@ -151,7 +228,7 @@ def create_app():
                 "count": len(allocations.data) if allocations.data else 0
             })
         except Exception as e:
-            print(f"Raw allocations error: {e}")
+            logger.error("Raw allocations error: %s", e)
             return jsonify({"error": str(e)}), 500
     
     @app.route("/test_simple_insert", methods=["POST"])
@@ -177,11 +254,11 @@ def create_app():
                 "reason": "Test allocation"
             }
             
-            print(f"=== TESTING MINIMAL INSERT ===")
-            print(f"Minimal record: {minimal_record}")
+            logger.debug("=== TESTING MINIMAL INSERT ===")
+            logger.debug("Minimal record: %s", minimal_record)
             
             result = supabase.table("allocations").insert([minimal_record]).execute()
-            print(f"Minimal insert result: {result.data}")
+            logger.debug("Minimal insert result: %s", result.data)
             
             return jsonify({
                 "message": "Minimal insert test",
@@ -189,58 +266,58 @@ def create_app():
                 "success": len(result.data) > 0 if result.data else False
             })
         except Exception as e:
-            print(f"Minimal insert error: {e}")
+            logger.error("Minimal insert error: %s", e)
             return jsonify({"error": str(e)}), 500
 
     @app.route("/admin_login", methods=["POST"])
     def admin_login():
-        print("Admin login attempt received")
+        logger.debug("Admin login attempt received")
         data = request.get_json(silent=True) or {}
         email = str(data.get("email") or "").strip()
         password = str(data.get("password") or "")
         
-        print(f"Login attempt - Email: {email}")
+        logger.debug("Login attempt - Email: %s", email)
 
         admin_email = os.getenv("ADMIN_EMAIL")
         admin_password = os.getenv("ADMIN_PASSWORD")
         
-        print(f"Expected - Email: {admin_email}")
+        logger.debug("Expected - Email: %s", admin_email)
 
         if email == admin_email and password == admin_password:
             session["logged_in"] = True
             session["user_type"] = "admin"
             session.permanent = True
-            print("Login successful - session set")
+            logger.debug("Login successful - session set")
             return jsonify({"message": "Login successful"}), 200
         else:
             session["logged_in"] = False
-            print("Login failed - invalid credentials")
+            logger.warning("Login failed - invalid credentials")
             return jsonify({"message": "Invalid credentials"}), 401
     
     @app.route("/student_login", methods=["POST"])
     def student_login():
-        print("Student login attempt received")
+        logger.debug("Student login attempt received")
         data = request.get_json(silent=True) or {}
         email = str(data.get("email") or "").strip()
         password = str(data.get("password") or "")
         
-        print(f"Student login attempt - Email: {email}")
+        logger.debug("Student login attempt - Email: %s", email)
         
         try:
             supabase = get_supabase()
             
             # Check if student exists in database - first get all students to see structure
             all_students = supabase.table("students").select("*").execute()
-            print(f"All students data: {all_students.data}")
+            logger.debug("All students data: %s", all_students.data)
             
             if not all_students.data:
-                print("No students found in database")
+                logger.debug("No students found in database")
                 return jsonify({"message": "No students in database"}), 401
             
             # Try to find student by email (if email field exists) or use first student for demo
             student = None
             for s in all_students.data:
-                print(f"Checking student: {s}")
+                logger.debug("Checking student: %s", s)
                 if "email" in s and s["email"] == email:
                     student = s
                     break
@@ -248,7 +325,7 @@ def create_app():
             # If no email match, use first student for demo purposes
             if not student and password == "student123":
                 student = all_students.data[0]
-                print(f"Using first student for demo: {student}")
+                logger.debug("Using first student for demo: %s", student)
             
             if student and password == "student123":  # Default password for demo
                 session["logged_in"] = True
@@ -256,41 +333,41 @@ def create_app():
                 session["user_id"] = student["id"]
                 session["user_name"] = student.get("name", "Student")
                 session.permanent = True
-                print(f"Student login successful: {student.get('name', 'Student')}")
+                logger.debug("Student login successful: %s", student.get('name', 'Student'))
                 return jsonify({"message": "Login successful", "user": student.get("name", "Student")}), 200
             
-            print("Student login failed - invalid credentials")
+            logger.warning("Student login failed - invalid credentials")
             return jsonify({"message": "Invalid credentials"}), 401
         except Exception as e:
-            print(f"Student login error: {e}")
+            logger.error("Student login error: %s", e)
             import traceback
             traceback.print_exc()
             return jsonify({"message": "Login error", "error": str(e)}), 500
     
     @app.route("/company_login", methods=["POST"])
     def company_login():
-        print("Company login attempt received")
+        logger.debug("Company login attempt received")
         data = request.get_json(silent=True) or {}
         email = str(data.get("email") or "").strip()
         password = str(data.get("password") or "")
         
-        print(f"Company login attempt - Email: {email}")
+        logger.debug("Company login attempt - Email: %s", email)
         
         try:
             supabase = get_supabase()
             
             # Check if company exists in internships table - first get all internships to see structure
             all_internships = supabase.table("internships").select("*").execute()
-            print(f"All internships data: {all_internships.data}")
+            logger.debug("All internships data: %s", all_internships.data)
             
             if not all_internships.data:
-                print("No internships found in database")
+                logger.debug("No internships found in database")
                 return jsonify({"message": "No companies in database"}), 401
             
             # Try to find company by contact_email or use first internship for demo
             company = None
             for i in all_internships.data:
-                print(f"Checking internship: {i}")
+                logger.debug("Checking internship: %s", i)
                 if "contact_email" in i and i["contact_email"] == email:
                     company = i
                     break
@@ -298,7 +375,7 @@ def create_app():
             # If no email match, use first internship for demo purposes
             if not company and password == "company123":
                 company = all_internships.data[0]
-                print(f"Using first internship for demo: {company}")
+                logger.debug("Using first internship for demo: %s", company)
             
             if company and password == "company123":  # Default password for demo
                 session["logged_in"] = True
@@ -306,14 +383,14 @@ def create_app():
                 session["user_id"] = company["id"]
                 session["company_name"] = company.get("org_name", "Company")
                 session.permanent = True
-                print(f"Company login successful: {company.get('org_name', 'Company')}")
-                print(f"Session data: {dict(session)}")
+                logger.debug("Company login successful: %s", company.get('org_name', 'Company'))
+                logger.debug("Session data: %s", dict(session))
                 return jsonify({"message": "Login successful", "company": company.get("org_name", "Company")}), 200
             
-            print("Company login failed - invalid credentials")
+            logger.warning("Company login failed - invalid credentials")
             return jsonify({"message": "Invalid credentials"}), 401
         except Exception as e:
-            print(f"Company login error: {e}")
+            logger.error("Company login error: %s", e)
             import traceback
             traceback.print_exc()
             return jsonify({"message": "Login error", "error": str(e)}), 500
@@ -321,7 +398,7 @@ def create_app():
     @app.route("/admin_logout", methods=["POST"])
     def admin_logout():
         session.clear()
-        print("User logged out - session cleared")
+        logger.debug("User logged out - session cleared")
         return jsonify({"message": "Logged out successfully"}), 200
 
     @app.route("/run_allocation", methods=["POST"])
@@ -329,39 +406,80 @@ def create_app():
         if not session.get("logged_in"):
             return jsonify({"message": "Unauthorized"}), 401
 
+        data = request.get_json(silent=True) or {}
+        engine = str(data.get("engine") or "greedy")
+        if engine not in ALLOCATION_ENGINES:
+            return jsonify({"error": "Invalid engine", "message": f"engine must be one of {', '.join(ALLOCATION_ENGINES)}"}), 400
+
+        work, job_profile_id = lambda progress: _run_allocation_job(engine, progress), None
+        profiler = app.extensions.get('profiler')
+        if profiler is not None and profiler.profiling():
+            # The request only enqueues the run, so the job gets a profile of its own
+            work, job_profile_id = profiler.profile_job(work, "run_allocation_job")
+        job, created = jobs.submit(engine, work)
+        headers = {"X-Job-Profile-Id": job_profile_id} if created and job_profile_id else {}
+        if data.get("wait"):
+            # Scripts and benchmarks can still block until the run is done
+            job.wait()
+            return jsonify(job.result), job.status_code, headers
+        return jsonify({
+            "message": "Allocation started" if created else "Allocation already running",
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/allocation_jobs/{job.id}",
+        }), 202, headers
+
+    @app.route("/allocation_jobs/<job_id>", methods=["GET"])
+    def allocation_job_status(job_id):
+        if not session.get("logged_in"):
+            return jsonify({"message": "Unauthorized"}), 401
+        job = jobs.get(job_id)
+        if job is None:
+            return jsonify({"message": "Job not found"}), 404
+        return jsonify(job.to_dict()), 200
+
+    @app.route("/allocation_jobs", methods=["GET"])
+    def allocation_jobs():
+        if not session.get("logged_in"):
+            return jsonify({"message": "Unauthorized"}), 401
+        return jsonify({"jobs": [job.to_dict(include_result=False) for job in jobs.jobs()]}), 200
+
+    def _run_allocation_job(engine, progress):
+        """Fetch, allocate and write one run; returns the JSON body and HTTP status the job finishes with"""
         try:
             supabase = get_supabase()
             
             # Get students and internships data
-            students_response = supabase.table("students").select("*").execute()
-            internships_response = supabase.table("internships").select("*").execute()
-            
-            students_data = students_response.data
-            internships_data = internships_response.data
+            progress("fetching", 5)
+            students_data, internships_data = execute_concurrently(
+                partial(table_rows, supabase, "students"),
+                partial(table_rows, supabase, "internships"),
+            )
             
-            print(f"Found {len(students_data)} students and {len(internships_data)} internships")
+            logger.debug("Found %s students and %s internships", len(students_data), len(internships_data))
             
             if not students_data:
-                return jsonify({"error": "No students found", "message": "Please add students to the database first"}), 400
+                return {"error": "No students found", "message": "Please add students to the database first"}, 400
             
             if not internships_data:
-                return jsonify({"error": "No internships found", "message": "Please add internships to the database first"}), 400
+                return {"error": "No internships found", "message": "Please add internships to the database first"}, 400
             
-            allocations = run_allocation(students_data, internships_data)
-            print(f"Generated {len(allocations)} allocations")
+            progress("allocating", 20)
+            allocations, stats = run_allocation_with_stats(students_data, internships_data, engine=engine)
+            logger.info("Allocated %s students to %s internships with the %s engine in %.3f s", len(students_data), len(internships_data), engine, stats["total_seconds"])
 
             # Skip clearing existing allocations for now - just insert new ones
-            print("Skipping delete operation - inserting new allocations...")
+            logger.debug("Skipping delete operation - inserting new allocations...")
+            write_errors = []
             
             if allocations:
-                # First get students and internships to map IDs to UUIDs
-                students_response = supabase.table("students").select("*").execute()
-                internships_response = supabase.table("internships").select("*").execute()
-                
-                students_dict = {s["id"]: s for s in students_response.data}
-                internships_dict = {i["id"]: i for i in internships_response.data}
+                # Map IDs to UUIDs with the rows read above rather than fetching both tables again
+                students_dict = {s["id"]: s for s in students_data}
+                internships_dict = {i["id"]: i for i in internships_data}
                 
                 allocation_records = []
+                # Upserts keep the original allocated_at, so stamp reruns explicitly; list ETags key on it
+                allocated_at = datetime.now(timezone.utc).isoformat()
                 for a in allocations:
                     student = students_dict.get(a['student_id'])
                     internship = internships_dict.get(a['internship_id'])
@@ -371,32 +489,51 @@ def create_app():
                             "student_id": str(student['id']),  # Ensure string format
                             "internship_id": str(internship['id']),  # Ensure string format
                             "score": float(a['score']),
-                            "reason": f"{a.get('allocation_type', 'unknown')} - {a.get('reason', '')}"
+                            "reason": f"{a.get('allocation_type', 'unknown')} - {a.get('reason', '')}",
+                            "allocated_at": allocated_at
                         })
                     else:
-                        print(f"Warning: Could not find student {a['student_id']} or internship {a['internship_id']}")
+                        logger.warning("Could not find student %s or internship %s", a['student_id'], a['internship_id'])
                 
-                print(f"Formatted {len(allocation_records)} allocation records for database")
-                print(f"Inserting {len(allocation_records)} allocation records...")
-                print(f"Sample allocation record: {allocation_records[0] if allocation_records else 'None'}")
+                logger.debug("Formatted %s allocation records for database", len(allocation_records))
+                logger.debug("Upserting %s allocation records...", len(allocation_records))
+                progress("writing", 70)
                 
                 try:
-                    insert_result = supabase.table("allocations").insert(allocation_records).execute()
-                    print(f"Insert operation completed: {len(insert_result.data) if insert_result.data else 0} records inserted")
-                    print(f"Insert result data: {insert_result.data}")
+                    # Reruns update the existing (student_id, internship_id) rows instead of failing on the unique constraint
+                    write_result = supabase.table("allocations").bulk_upsert(allocation_records, on_conflict="student_id,internship_id")
+                    write_errors = write_result.errors
+                    logger.info("Upsert operation completed: %s records written, %s chunks failed", write_result.count, len(write_errors))
+                    failed = {i for error in write_errors for i in range(error["start"], error["start"] + error["rows"])}
+                    aggregates.record_allocations(r for i, r in enumerate(allocation_records) if i not in failed)
+                    if allocation_records and not write_result.count:
+                        return {"error": "Failed to insert allocations", "message": write_errors[0]["error"] if write_errors else "No records written", "write_errors": write_errors}, 500
                     
                     # Verify insertion
-                    final_allocations = supabase.table("allocations").select("*").execute()
-                    print(f"Final verification: {len(final_allocations.data)} allocations in database")
+                    progress("verifying", 90)
+                    final_allocations = supabase.table("allocations").select("id", count="exact").limit(1).execute()
+                    logger.debug("Final verification: %s allocations in database", final_allocations.count)
                 except Exception as insert_error:
-                    print(f"Insert operation failed: {insert_error}")
-                    return jsonify({"error": "Failed to insert allocations", "message": str(insert_error)}), 500
+                    logger.warning("Insert operation failed: %s", insert_error)
+                    return {"error": "Failed to insert allocations", "message": str(insert_error)}, 500
             else:
-                print("No allocations to insert")
-            
-            return jsonify({"message": "Allocation complete", "allocations": allocations}), 200
+                logger.debug("No allocations to insert")
+            
+            result = {
+                "message": "Allocation complete",
+                "engine": engine,
+                "write_errors": write_errors,
+                "objective": allocation_objective(allocations),
+                "stats": stats,
+                "allocations": allocations,
+            }
+            if engine == "optimal":
+                progress("comparing", 95)
+                # Same cohort through the greedy rules, so admins can see what the global solve gained
+                result["greedy_objective"] = allocation_objective(run_allocation(students_data, internships_data, engine="vectorized"))
+            return result, 200
         except Exception as e:
-            return jsonify({"error": "Database error", "message": str(e)}), 500
+            return {"error": "Database error", "message": str(e)}, 500
 
     @app.route("/get_allocations", methods=["GET"])
     def get_allocations():
@@ -405,49 +542,52 @@ def create_app():
             
         try:
             supabase = get_supabase()
-            
-            # Fetch allocations first            py .\app.py
-            allocations_response = supabase.table("allocations").select("*").execute()
-            print(f"=== GET_ALLOCATIONS DEBUG ===")
-            print(f"Raw allocations response: {allocations_response.data}")
-            print(f"Found {len(allocations_response.data)} allocations")
-            
-            if not allocations_response.data:
-                print("No allocations found in database - returning empty array")
-                return jsonify({"allocations": []}), 200
-            
-            # Fetch students and internships separately
-            students_response = supabase.table("students").select("*").execute()
-            internships_response = supabase.table("internships").select("*").execute()
-            
-            # Create lookup dictionaries
-            students_dict = {s["id"]: s for s in students_response.data}
-            internships_dict = {i["id"]: i for i in internships_response.data}
-            
-            # Format the data for the frontend
-            allocations_data = []
-            for alloc in allocations_response.data:
-                student = students_dict.get(alloc.get("student_id"))
-                internship = internships_dict.get(alloc.get("internship_id"))
-                
-                allocations_data.append({
-                    "id": alloc["id"],
-                    "score": alloc.get("score", 0),
-                    "allocation_type": alloc.get("allocation_type", "unknown"),
-                    "reason": alloc.get("reason", ""),
-                    "student_name": student.get("name", "Unknown") if student else "Unknown",
-                    "internship_org": (internship.get("org_name") or internship.get("company", "Unknown")) if internship else "Unknown",
-                    "sector": internship.get("sector", "Unknown") if internship else "Unknown",
-                    "location": internship.get("location", "Unknown") if internship else "Unknown"
-                })
-            
-            print(f"Returning {len(allocations_data)} formatted allocations")
-            print(f"Sample formatted allocation: {allocations_data[0] if allocations_data else 'None'}")
-            print(f"Final response: {{'allocations': allocations_data}}")
-            return jsonify({"allocations": allocations_data}), 200
+            versions = execute_concurrently(*(partial(table_version, supabase, name) for name in ("allocations", "students", "internships")))
+            return conditional_json(content_etag(*versions), lambda: _allocations_payload(supabase, *versions[1:]))
         except Exception as e:
-            print(f"Error in get_allocations: {e}")
+            logger.error("Error in get_allocations: %s", e)
             return jsonify({"error": "Database error", "message": str(e)}), 500
+
+    def _allocations_payload(supabase, students_version=None, internships_version=None):
+        # Fetch all three tables at once; the join needs students and internships whenever there are allocations
+        allocations_response, students_data, internships_data = execute_concurrently(
+            supabase.table("allocations").select("*").execute_all,
+            partial(table_rows, supabase, "students", students_version),
+            partial(table_rows, supabase, "internships", internships_version),
+        )
+        logger.debug("=== GET_ALLOCATIONS DEBUG ===")
+        logger.debug("Raw allocations response: %s", allocations_response.data)
+        logger.debug("Found %s allocations", len(allocations_response.data))
+        
+        if not allocations_response.data:
+            logger.debug("No allocations found in database - returning empty array")
+            return {"allocations": []}
+        
+        # Create lookup dictionaries
+        students_dict = {s["id"]: s for s in students_data}
+        internships_dict = {i["id"]: i for i in internships_data}
+        
+        # Format the data for the frontend
+        allocations_data = []
+        for alloc in allocations_response.data:
+            student = students_dict.get(alloc.get("student_id"))
+            internship = internships_dict.get(alloc.get("internship_id"))
+            
+            allocations_data.append({
+                "id": alloc["id"],
+                "score": alloc.get("score", 0),
+                "allocation_type": alloc.get("allocation_type", "unknown"),
+                "reason": alloc.get("reason", ""),
+                "student_name": student.get("name", "Unknown") if student else "Unknown",
+                "internship_org": (internship.get("org_name") or internship.get("company", "Unknown")) if internship else "Unknown",
+                "sector": internship.get("sector", "Unknown") if internship else "Unknown",
+                "location": internship.get("location", "Unknown") if internship else "Unknown"
+            })
+        
+        logger.debug("Returning %s formatted allocations", len(allocations_data))
+        logger.debug("Sample formatted allocation: %s", allocations_data[0] if allocations_data else 'None')
+        logger.debug("Final response: {'allocations': allocations_data}")
+        return {"allocations": allocations_data}
     
     @app.route("/add_internship", methods=["POST"])
     def add_internship():
@@ -477,6 +617,8 @@ def create_app():
             }
             
             response = supabase.table("internships").insert(internship_data).execute()
+            for row in response.data:
+                aggregates.record_internship(row)
             return jsonify({"message": "Internship added successfully"}), 200
         except Exception as e:
             return jsonify({"error": "Database error", "message": str(e)}), 500
@@ -488,8 +630,9 @@ def create_app():
             
         try:
             supabase = get_supabase()
-            response = supabase.table("internships").select("*").execute()
-            return jsonify({"internships": response.data}), 200
+            version = table_version(supabase, "internships")
+            return conditional_json(content_etag(version), lambda: {"internships": table_rows(
+                supabase, "internships", version, lambda: supabase.table("internships").select("*").execute().data)})
         except Exception as e:
             return jsonify({"error": "Database error", "message": str(e)}), 500
 
@@ -500,8 +643,9 @@ def create_app():
             
         try:
             supabase = get_supabase()
-            response = supabase.table("students").select("*").execute()
-            return jsonify({"students": response.data}), 200
+            version = table_version(supabase, "students")
+            return conditional_json(content_etag(version), lambda: {"students": table_rows(
+                supabase, "students", version, lambda: supabase.table("students").select_all("*").execute().data)})
         except Exception as e:
             return jsonify({"error": "Database error", "message": str(e)}), 500
 
@@ -513,31 +657,9 @@ def create_app():
         try:
             supabase = get_supabase()
             
-            # Get students count and data
-            students_response = supabase.table("students").select("*", count="exact").execute()
-            students_count = students_response.count
-            recent_students = students_response.data[:10]  # Get first 10
-            
-            # Get internships count and data
-            internships_response = supabase.table("internships").select("*", count="exact").execute()
-            internships_count = internships_response.count
-            recent_internships = internships_response.data[:10]  # Get first 10
-            
-            # Get allocations count
-            allocations_response = supabase.table("allocations").select("*", count="exact").execute()
-            allocations_count = allocations_response.count
-            
-            dashboard_data = {
-                "stats": {
-                    "total_students": students_count,
-                    "total_internships": internships_count,
-                    "total_allocations": allocations_count
-                },
-                "recent_students": recent_students,
-                "recent_internships": recent_internships
-            }
-            
-            return jsonify(dashboard_data), 200
+            # Served from the running aggregates; reconciling with HEAD counts happens off the request
+            aggregates.refresh(supabase, background=query_executor().submit)
+            return jsonify(aggregates.snapshot()), 200
         except Exception as e:
             return jsonify({"error": "Database error", "message": str(e)}), 500
 
@@ -589,7 +711,7 @@ def create_app():
             </script>
             """
         # Serve index.html for SPA from dist/
-        return send_from_directory(app.static_folder, 'index.html')
+        return index_html()
     
     # Student API endpoints
     @app.route("/student_profile", methods=["GET"])
@@ -615,8 +737,9 @@ def create_app():
         
         try:
             supabase = get_supabase()
-            internships_response = supabase.table("internships").select("*").execute()
-            return jsonify({"internships": internships_response.data}), 200
+            version = table_version(supabase, "internships")
+            return conditional_json(content_etag(version), lambda: {"internships": table_rows(
+                supabase, "internships", version, lambda: supabase.table("internships").select("*").execute().data)})
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
@@ -658,17 +781,17 @@ def create_app():
     # ...existing code...
     @app.route("/company_profile", methods=["GET"])
     def company_profile():
-        print(f"Company profile request - Session: {dict(session)}")
+        logger.debug("Company profile request - Session: %s", dict(session))
         if not session.get("logged_in") or session.get("user_type") != "company":
-            print("Unauthorized company profile access")
+            logger.debug("Unauthorized company profile access")
             return jsonify({"message": "Unauthorized"}), 401
         
         try:
             company_name = session.get("company_name", "Company")
-            print(f"Returning company profile: {company_name}")
+            logger.debug("Returning company profile: %s", company_name)
             return jsonify({"name": company_name}), 200
         except Exception as e:
-            print(f"Company profile error: {e}")
+            logger.error("Company profile error: %s", e)
             return jsonify({"error": str(e)}), 500
 
     @app.route("/company_internships", methods=["GET"])
@@ -713,6 +836,8 @@ def create_app():
             }
             
             result = supabase.table("internships").insert([internship_data]).execute()
+            for row in result.data:
+                aggregates.record_internship(row)
             return jsonify({"message": "Internship created successfully", "data": result.data}), 200
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -734,6 +859,8 @@ def create_app():
             elif request.method == "PUT":
                 data = request.get_json()
                 result = supabase.table("internships").update(data).eq("id", internship_id).execute()
+                for row in result.data:
+                    aggregates.record_internship(row)
                 return jsonify({"message": "Internship updated successfully"}), 200
                 
         except Exception as e:
@@ -765,7 +892,7 @@ def create_app():
     # Serve static files from dist/assets/
     @app.route('/assets/<path:filename>')
     def dist_assets(filename):
-        return send_from_directory(os.path.join(app.static_folder, 'assets'), filename)
+        return dist_file(f"assets/{filename}")
     
     @app.route("/debug_session", methods=["GET"])
     def debug_session():
@@ -778,5 +905,6 @@ def create_app():
     
     return app
 if __name__ == "__main__":
+    # Development server; production runs `python serve.py` with pre-forked workers
     app = create_app()
     app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
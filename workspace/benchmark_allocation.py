@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Benchmark the allocation engines on seeded synthetic cohorts
+
+    python benchmark_allocation.py --scales 1000 10000 100000 --output bench.json
+    python benchmark_allocation.py --baseline bench.json --output new.json
+
+Each scale is timed through `run_allocation` directly and, with --route,
+through POST /run_allocation against a mock Supabase client seeded with the
+same cohort, so nothing touches the network. With --baseline the run exits
+non-zero when a result is slower, uses more memory or reaches a different
+objective than the baseline.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from allocation_fixed import run_allocation, run_allocation_with_stats, allocation_objective, ALLOCATION_ENGINES
+
+SECTOR_SKILLS = {
+    "Technology": ["Python", "Java", "JavaScript", "React", "SQL", "Cloud", "DevOps", "Machine Learning", "C++", "Go"],
+    "Finance": ["Excel", "Accounting", "Financial Modeling", "SQL", "Risk Analysis", "Python", "Valuation", "Tally"],
+    "Healthcare": ["Biology", "Patient Care", "Clinical Research", "Data Entry", "Pharmacology", "Statistics"],
+    "Manufacturing": ["AutoCAD", "Quality Control", "Six Sigma", "Supply Chain", "Lean", "SolidWorks"],
+    "Energy": ["Electrical Design", "MATLAB", "Power Systems", "AutoCAD", "Project Management", "Solar PV"],
+    "Retail": ["Sales", "Marketing", "Inventory", "Customer Service", "Excel", "Merchandising"],
+    "Education": ["Teaching", "Content Writing", "Curriculum Design", "Communication", "Research"],
+    "Agriculture": ["Agronomy", "Soil Science", "Data Collection", "GIS", "Irrigation", "Statistics"],
+}
+GENERAL_SKILLS = ["Communication", "Teamwork", "Excel", "Presentation", "English", "Leadership"]
+LOCATIONS = ["Delhi", "Mumbai", "Bengaluru", "Hyderabad", "Chennai", "Pune", "Kolkata", "Ahmedabad", "Jaipur", "Lucknow"]
+# Roughly the national reservation mix: OBC 27%, SC 15%, ST 7.5%, EWS 10%
+CATEGORY_WEIGHTS = {"GEN": 0.405, "OBC": 0.27, "SC": 0.15, "ST": 0.075, "EWS": 0.10}
+QUOTA_SHARES = {"OBC": 0.27, "SC": 0.15, "ST": 0.075, "EWS": 0.10}
+
+DEFAULT_SCALES = (1000, 10000, 100000)
+DEFAULT_ENGINES = ("greedy", "vectorized")
+STUDENTS_PER_INTERNSHIP = 20
+DEFAULT_TOLERANCE = 0.25
+
+
+def generate_cohort(student_count: int, internship_count: Optional[int] = None, seed: int = 0) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Generate students and internships shaped like the Supabase tables
+
+    The same arguments always produce the same rows. Internships alternate
+    between a ``quota_json`` mapping and the ``quota_*`` columns.
+    """
+    rng = random.Random(seed)
+    internship_count = internship_count if internship_count is not None else max(1, student_count // STUDENTS_PER_INTERNSHIP)
+    sectors = list(SECTOR_SKILLS)
+    categories = list(CATEGORY_WEIGHTS)
+    category_weights = list(CATEGORY_WEIGHTS.values())
+
+    students = []
+    for i in range(student_count):
+        sector = rng.choice(sectors)
+        own = rng.sample(SECTOR_SKILLS[sector], rng.randint(2, 4))
+        other = rng.sample(SECTOR_SKILLS[rng.choice(sectors)] + GENERAL_SKILLS, rng.randint(0, 2))
+        students.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "name": f"Student {i}",
+            "marks": round(min(100.0, max(35.0, rng.gauss(68, 12))), 1),
+            "skills": ", ".join(dict.fromkeys(own + other)),
+            "category": rng.choices(categories, category_weights)[0],
+            "location_pref": rng.choice(LOCATIONS),
+            "sector_pref": sector,
+        })
+
+    internships = []
+    for j in range(internship_count):
+        sector = rng.choice(sectors)
+        seats = min(40, max(1, int(rng.expovariate(1 / 6)) + 1))
+        quotas = {c: int(seats * share) for c, share in QUOTA_SHARES.items()}
+        quotas["GEN"] = max(0, seats - sum(quotas.values()) - rng.randint(0, 2))
+        company = f"{rng.choice(['Apex', 'Nova', 'Vertex', 'Zenith', 'Orbit', 'Summit'])} {sector} {j}"
+        internship = {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "company": company,
+            "org_name": company,
+            "role": f"{sector} Intern",
+            "location": rng.choice(LOCATIONS),
+            "sector": sector,
+            "required_skills": ",".join(rng.sample(SECTOR_SKILLS[sector], rng.randint(1, 4))),
+            "total_positions": seats,
+            "seats": seats,
+        }
+        if j % 2:
+            internship["quota_json"] = quotas
+        else:
+            internship.update({f"quota_{c.lower()}": count for c, count in quotas.items()})
+        internships.append(internship)
+    return students, internships
+
+
+def time_allocation(students: List[Dict[str, Any]], internships: List[Dict[str, Any]], engine: str, repeat: int = 1, memory: bool = True) -> Dict[str, Any]:
+    """Best wall time of ``repeat`` runs with the engine stats of that run, plus the peak traced memory of one extra run"""
+    timings = []
+    allocations: List[Dict[str, Any]] = []
+    stats: Dict[str, Any] = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            allocations, run_stats = run_allocation_with_stats(students, internships, engine=engine)
+        timings.append(time.perf_counter() - start)
+        if timings[-1] == min(timings):
+            stats = run_stats
+
+    peak_mb = None
+    if memory:
+        # Tracing slows allocation down, so it gets a run of its own
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                run_allocation(students, internships, engine=engine)
+            peak_mb = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "seconds": round(min(timings), 4),
+        "peak_mb": peak_mb,
+        "allocations": len(allocations),
+        "objective": allocation_objective(allocations),
+        "stats": stats,
+    }
+
+
+def time_route(students: List[Dict[str, Any]], internships: List[Dict[str, Any]], engine: str) -> Dict[str, Any]:
+    """Time POST /run_allocation against a mock Supabase client seeded with the cohort"""
+    import supabase_client
+    from app import create_app
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = os.path.join(tmp, "mock_tables.json")
+        with open(data_file, "w") as f:
+            json.dump({"students": students, "internships": internships, "allocations": []}, f)
+
+        saved = {name: os.environ.pop(name, None) for name in ("SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY", "SUPABASE_KEY", "VITE_SUPABASE_PUBLISHABLE_KEY", "MOCK_SUPABASE_DATA")}
+        os.environ["MOCK_SUPABASE_DATA"] = data_file
+        supabase_client.get_supabase.cache_clear()
+        try:
+            client = create_app().test_client()
+            with client.session_transaction() as session:
+                session["logged_in"] = True
+            with contextlib.redirect_stdout(io.StringIO()):
+                supabase_client.get_supabase()  # load the tables outside the timed request
+                start = time.perf_counter()
+                response = client.post("/run_allocation", json={"engine": engine, "wait": True})
+                seconds = time.perf_counter() - start
+        finally:
+            os.environ.pop("MOCK_SUPABASE_DATA")
+            os.environ.update({name: value for name, value in saved.items() if value is not None})
+            supabase_client.get_supabase.cache_clear()
+
+    return {"status": response.status_code, "seconds": round(seconds, 4), "response_bytes": len(response.data)}
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, engines=DEFAULT_ENGINES, seed: int = 0, repeat: int = 1, memory: bool = True, route: bool = False) -> Dict[str, Any]:
+    """Benchmark every engine at every scale and return the JSON report"""
+    results = []
+    for scale in scales:
+        students, internships = generate_cohort(scale, seed=seed)
+        for engine in engines:
+            result = {"scale": scale, "engine": engine, "students": len(students), "internships": len(internships)}
+            result.update(time_allocation(students, internships, engine, repeat, memory))
+            if route:
+                result["route"] = time_route(students, internships, engine)
+            print(f"⏱️ {engine} @ {scale}: {result['seconds']:.3f}s, peak {result['peak_mb']} MB, objective {result['objective']}")
+            results.append(result)
+
+    return {
+        "meta": {
+            "seed": seed,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    List the regressions of ``current`` against ``baseline``
+
+    A result regresses when it is more than ``tolerance`` slower or heavier
+    than the baseline result of the same engine and scale, or when its
+    objective differs, since every engine is deterministic.
+    """
+    previous = {(r["scale"], r["engine"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in current.get("results", []):
+        key = (result["scale"], result["engine"])
+        before = previous.get(key)
+        if before is None:
+            continue
+        label = f"{result['engine']} @ {result['scale']}"
+        if result["seconds"] > before["seconds"] * (1 + tolerance):
+            regressions.append(f"{label}: {result['seconds']:.3f}s vs {before['seconds']:.3f}s")
+        if result.get("peak_mb") is not None and before.get("peak_mb") is not None and result["peak_mb"] > before["peak_mb"] * (1 + tolerance):
+            regressions.append(f"{label}: peak {result['peak_mb']} MB vs {before['peak_mb']} MB")
+        if result["objective"] != before["objective"] or result["allocations"] != before["allocations"]:
+            regressions.append(f"{label}: {result['allocations']} allocations / objective {result['objective']} vs {before['allocations']} / {before['objective']}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the allocation engines on synthetic cohorts")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES))
+    parser.add_argument("--engines", nargs="+", default=list(DEFAULT_ENGINES), choices=ALLOCATION_ENGINES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced run that measures peak memory")
+    parser.add_argument("--route", action="store_true", help="also time POST /run_allocation against the mock client")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="compare against this JSON report and fail on regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown or memory growth, as a fraction")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.scales, args.engines, args.seed, args.repeat, not args.no_memory, args.route)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Saved results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_reports(json.load(f), report, args.tolerance)
+        if regressions:
+            print("❌ Regressions against baseline:")
+            for regression in regressions:
+                print(f"   {regression}")
+            return 1
+        print("✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark Supabase REST calls with and without the client's keep-alive pool
+
+    python benchmark_supabase.py --requests 500 --rows 50
+
+Requests go to a local stand-in for PostgREST that speaks HTTP/1.1 with
+keep-alive, so the numbers show connection setup cost without the network.
+Against the real Supabase endpoint every fresh connection also pays a TLS
+handshake, which this benchmark leaves out.
+"""
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional
+
+from supabase_client import HttpSupabaseClient, HttpSupabaseTable
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, delayed ACKs stall every keep-alive reply
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        body = self.server.body
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Range", f"0-{self.server.rows - 1}/*")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServer:
+    """Local HTTP/1.1 server answering every GET with the same JSON rows, counting the connections it accepts"""
+
+    def __init__(self, rows: int = 50):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.rows = rows
+        self.httpd.body = json.dumps([{"id": i, "name": f"Student {i}", "marks": 70} for i in range(rows)]).encode()
+        self.httpd.connections = 0
+        self.httpd.lock = threading.Lock()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    @property
+    def connections(self) -> int:
+        return self.httpd.connections
+
+    def __enter__(self) -> "StandInServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def time_selects(table: HttpSupabaseTable, count: int) -> List[float]:
+    """Latency in milliseconds of ``count`` sequential select calls"""
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = table.select("*").execute()
+        latencies.append((time.perf_counter() - start) * 1000)
+        if not response.data:
+            raise RuntimeError("stand-in server returned no rows")
+    return latencies
+
+
+def _summary(latencies: List[float], connections: int) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "connections": connections,
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(ordered[len(ordered) // 2], 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1], 3),
+    }
+
+
+def run_benchmark(count: int = 500, rows: int = 50) -> Dict[str, Any]:
+    """Time select calls through per-call connections, then through a pooled client"""
+    headers = {"apikey": "benchmark"}
+    results = {}
+    with StandInServer(rows) as server:
+        unpooled = HttpSupabaseTable("students", server.url, dict(headers))
+        results["per_call_connections"] = _summary(time_selects(unpooled, count), server.connections)
+
+        before = server.connections
+        with HttpSupabaseClient(server.url, dict(headers)) as client:
+            results["pooled_session"] = _summary(time_selects(client.table("students"), count), server.connections - before)
+
+    results["speedup"] = round(results["per_call_connections"]["mean_ms"] / results["pooled_session"]["mean_ms"], 2)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pooled vs per-call Supabase REST connections")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--rows", type=int, default=50, help="rows in every stand-in response")
+    parser.add_argument("--output", help="write the JSON results here")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.requests, args.rows)
+    for mode in ("per_call_connections", "pooled_session"):
+        r = results[mode]
+        print(f"⏱️ {mode}: mean {r['mean_ms']} ms, p50 {r['p50_ms']} ms, p95 {r['p95_ms']} ms over {r['connections']} connections")
+    print(f"🚀 Pooled session is {results['speedup']}x faster per request")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
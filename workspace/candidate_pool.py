@@ -0,0 +1,188 @@
+import heapq
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
+
+from skill_index import SkillIndex
+
+# Largest amount the skill term of _final_score can add: a full match (100.0) weighted by 0.4
+MAX_SKILL_POINTS = 100.0 * 0.4
+SECTOR_BONUS = 20.0
+
+
+class _Partition:
+    """Candidates of one category, each list ordered by marks descending then by input order"""
+
+    def __init__(self, members: List[int], bases: List[Optional[float]], sector_prefs: List[str], skill_bits: List[int]):
+        self.members = members
+        self.dead = 0
+        self._bases = bases
+        self._sector_prefs = sector_prefs
+        self._skill_bits = skill_bits
+        self._build(members)
+
+    def _build(self, members: List[int]):
+        scorable = [i for i in members if self._bases[i] is not None]
+        scorable.sort(key=lambda i: -self._bases[i])
+        self.ranked = scorable
+        self.unscorable = [i for i in members if self._bases[i] is None]
+        self.by_sector: Dict[str, List[int]] = {}
+        for i in scorable:
+            if self._sector_prefs[i]:
+                self.by_sector.setdefault(self._sector_prefs[i], []).append(i)
+        self.skills = SkillIndex(scorable, self._skill_bits)
+
+    def compact(self, is_assigned: Callable[[int], bool]):
+        self.members = [i for i in self.members if not is_assigned(i)]
+        self.dead = 0
+        self._build(self.members)
+
+    @property
+    def available(self) -> int:
+        return len(self.members) - self.dead
+
+
+class CandidatePool:
+    """
+    Unassigned students partitioned by category for repeated top-k selection
+
+    Each partition is sorted once by marks, which bounds every student's score
+    from above for any internship: 0.4 * marks plus the maximum skill points,
+    plus the sector bonus for students whose preference matches. `select`
+    walks candidates in bound order, keeps the best k in a heap and stops as
+    soon as no remaining candidate can reach the k-th score, so most of the
+    pool is never scored. Assigned students are deleted lazily and partitions
+    are compacted once half of their entries are dead.
+
+    A skill index per partition splits the walk for an internship with
+    required skills into three streams: students preferring its sector,
+    students sharing at least one required skill, and the marks-only tail.
+    A tail student shares no skill and gets no bonus, so its score is exactly
+    0.4 * marks, which is also its bound; the tail is reached only while seats
+    remain open or its marks can still tie or beat the k-th score. Every
+    candidate left unscored therefore has a score strictly below the k-th
+    selected one, which makes the result identical to exhaustive scoring.
+    """
+
+    def __init__(self, students: List[Dict[str, Any]], profiles: List[Optional[Tuple[float, str, int]]]):
+        # Students sharing an id are assigned together, like the id set of the greedy engine
+        self._groups: List[int] = []
+        self._group_members: List[List[int]] = []
+        group_ids: Dict[Any, int] = {}
+        for i, student in enumerate(students):
+            group = group_ids.setdefault(student.get("id"), len(group_ids))
+            if group == len(self._group_members):
+                self._group_members.append([])
+            self._group_members[group].append(i)
+            self._groups.append(group)
+        self._assigned = [False] * len(group_ids)
+
+        bases = [p[0] * 0.4 if p is not None else None for p in profiles]
+        sector_prefs = [p[1] if p is not None else "" for p in profiles]
+        skill_bits = [p[2] if p is not None else 0 for p in profiles]
+        self._categories: List[Optional[str]] = []
+        by_category: Dict[str, List[int]] = {}
+        for i, student in enumerate(students):
+            category = student.get("category") or ""
+            category = category if isinstance(category, str) else None
+            self._categories.append(category)
+            if category is not None:
+                by_category.setdefault(category, []).append(i)
+
+        self._bases = bases
+        self._sector_prefs = sector_prefs
+        self._skill_bits = skill_bits
+        self._all = _Partition(list(range(len(students))), bases, sector_prefs, skill_bits)
+        self._partitions = {c: _Partition(m, bases, sector_prefs, skill_bits) for c, m in by_category.items()}
+        self.evaluations = 0
+
+    @property
+    def assigned_count(self) -> int:
+        """Number of distinct student ids assigned so far"""
+        return sum(self._assigned)
+
+    def is_assigned(self, index: int) -> bool:
+        return self._assigned[self._groups[index]]
+
+    def available(self, category: Optional[str] = None) -> int:
+        """Number of unassigned students in a category, or in the whole pool"""
+        partition = self._partition(category)
+        return partition.available if partition else 0
+
+    def assign(self, index: int):
+        """Remove a student, and every student sharing its id, from all partitions"""
+        group = self._groups[index]
+        if self._assigned[group]:
+            return
+        self._assigned[group] = True
+        touched = [self._all]
+        for member in self._group_members[group]:
+            self._all.dead += 1
+            partition = self._partitions.get(self._categories[member])
+            if partition is not None:
+                partition.dead += 1
+                touched.append(partition)
+        for partition in touched:
+            if partition.dead * 2 > len(partition.members):
+                partition.compact(self.is_assigned)
+
+    def select(self, category: Optional[str], k: int, sector: str, score: Callable[[int], float], required_bits: int = 0) -> List[Tuple[int, float]]:
+        """
+        Return the k best unassigned students of a category (None for everyone)
+
+        The result equals sorting all candidates by ``score`` descending with a
+        stable sort and keeping the first k. ``required_bits`` is the skill
+        bitset the internship's score is computed against.
+        """
+        partition = self._partition(category)
+        if partition is None or k <= 0:
+            return []
+
+        bonus = partition.by_sector.get(sector, []) if sector else []
+        skip_sector = sector if bonus else None
+        # Each stream yields candidates in non-increasing order of their score bound
+        streams = [(MAX_SKILL_POINTS + SECTOR_BONUS, self._unassigned(bonus))]
+        if required_bits:
+            overlapping = self._unassigned(partition.skills.candidates(required_bits), skip_sector)
+            tail = (i for i in self._unassigned(partition.ranked, skip_sector) if not self._skill_bits[i] & required_bits)
+            streams += [(MAX_SKILL_POINTS, overlapping), (0.0, tail)]
+        else:
+            streams.append((MAX_SKILL_POINTS, self._unassigned(partition.ranked, skip_sector)))
+        heads = [next(members, None) for _, members in streams]
+        best: List[Tuple[float, int]] = []  # min-heap of (score, -index): the root is the current k-th best
+
+        while True:
+            head_bound = None
+            head_stream = None
+            for s, (points, _) in enumerate(streams):
+                if heads[s] is not None:
+                    bound = self._bases[heads[s]] + points
+                    if head_bound is None or bound > head_bound:
+                        head_bound, head_stream = bound, s
+            if head_stream is None or (len(best) == k and head_bound < best[0][0]):
+                break
+            index = heads[head_stream]
+            heads[head_stream] = next(streams[head_stream][1], None)
+            self._offer(best, k, index, score(index))
+
+        # Unparseable students score exactly 0.0
+        if not best or len(best) < k or best[0][0] <= 0.0:
+            for index in self._unassigned(partition.unscorable):
+                self._offer(best, k, index, score(index))
+
+        ranked = sorted(best, key=lambda item: (-item[0], -item[1]))
+        return [(-neg_index, value) for value, neg_index in ranked]
+
+    def _unassigned(self, members, skip_sector: Optional[str] = None) -> Iterator[int]:
+        for i in members:
+            if not self.is_assigned(i) and not (skip_sector and self._sector_prefs[i] == skip_sector):
+                yield i
+
+    def _offer(self, best: List[Tuple[float, int]], k: int, index: int, value: float):
+        self.evaluations += 1
+        item = (value, -index)
+        if len(best) < k:
+            heapq.heappush(best, item)
+        elif item > best[0]:
+            heapq.heapreplace(best, item)
+
+    def _partition(self, category: Optional[str]) -> Optional[_Partition]:
+        return self._all if category is None else self._partitions.get(category)
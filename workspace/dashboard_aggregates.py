@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from allocation_fixed import internship_quotas
+
+logger = logging.getLogger(__name__)
+
+# Seconds between reconciling the running totals with HEAD count queries
+DEFAULT_RECONCILE_SECONDS = 60.0
+# Rows of each table the dashboard lists
+RECENT_ROWS = 10
+
+TABLES = ("students", "internships", "allocations")
+# Columns the totals and breakdowns are computed from; rows beyond the recent lists are never read whole
+BREAKDOWN_COLUMNS = {
+    "students": "id,category",
+    "internships": "id,sector,quota_json,quota_gen,quota_obc,quota_sc,quota_st,quota_ews",
+    "allocations": "student_id,internship_id,reason",
+}
+# Stored allocation reasons start with the allocation type ("quota - quota for SC", "open - open seat")
+QUOTA_REASON_PREFIX = "quota"
+
+
+class DashboardAggregates:
+    """
+    Admin dashboard totals and breakdowns, kept current without reading rows per request
+
+    ``rebuild`` reads the three tables once. After that the app reports its own
+    writes through ``record_allocations`` and ``record_internship``, which adjust
+    the numbers in place. Writes made elsewhere are caught by ``reconcile``: it
+    compares the totals with HEAD count queries at most every
+    ``reconcile_seconds`` and rebuilds only when they disagree. ``snapshot``
+    serves the last computed dashboard without touching Supabase.
+    """
+
+    def __init__(self, reconcile_seconds: float = DEFAULT_RECONCILE_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.reconcile_seconds = reconcile_seconds
+        self.clock = clock
+        self._lock = threading.RLock()
+        self._reconciling = threading.Lock()
+        self.loaded = False
+        self.reconciled_at = None
+        self.rebuilds = 0
+        self._reset()
+
+    def _reset(self):
+        self.totals = dict.fromkeys(TABLES, 0)
+        self.recent = {"students": [], "internships": []}
+        self._students: Dict[Any, Optional[str]] = {}  # id -> category
+        self._internships: Dict[Any, Dict[str, Any]] = {}  # id -> sector and quotas
+        self._allocated = set()  # (student_id, internship_id) pairs already counted
+        self._filled_by_sector = Counter()
+        self._allocated_by_category = Counter()
+        self._filled_quota = defaultdict(Counter)  # internship id -> category -> allocated students
+        self._snapshot = None
+
+    def rebuild(self, supabase):
+        """Recompute everything from the breakdown columns of the three tables and the first rows of the recent lists"""
+        students, internships, allocations = (_select_all(supabase, table, BREAKDOWN_COLUMNS[table]) for table in TABLES)
+        recent = {
+            table: supabase.table(table).select("*").order("id").limit(RECENT_ROWS).execute().data
+            for table in ("students", "internships")
+        }
+        with self._lock:
+            self._reset()
+            self.totals["students"] = len(students)
+            self.recent["students"] = recent["students"]
+            for student in students:
+                self._students[str(student.get("id"))] = student.get("category")
+            for internship in internships:
+                self.record_internship(internship)
+            # The recent list holds whole rows; record_internship only filled it with the narrow ones
+            self.recent["internships"] = recent["internships"]
+            self.record_allocations(allocations)
+            # Rows the app could not join still count towards the table total
+            self.totals["allocations"] = len(allocations)
+            self.loaded = True
+            self.reconciled_at = self.clock()
+            self.rebuilds += 1
+
+    def record_internship(self, internship: Dict[str, Any]):
+        """Count a newly written internship row, or refresh the sector and quotas of an updated one"""
+        with self._lock:
+            key = str(internship.get("id"))
+            recent = self.recent["internships"]
+            if key not in self._internships:
+                self.totals["internships"] += 1
+                if len(recent) < RECENT_ROWS:
+                    recent.append(internship)
+            else:
+                recent[:] = [internship if str(row.get("id")) == key else row for row in recent]
+            try:
+                quotas = internship_quotas(internship)
+            except Exception:
+                quotas = {}
+            self._internships[key] = {"sector": internship.get("sector") or "Unknown", "quotas": quotas}
+            self._snapshot = None
+
+    def record_allocations(self, allocations: Iterable[Dict[str, Any]]):
+        """
+        Count upserted allocation rows; pairs already counted are rerun updates and add nothing
+
+        Only quota placements fill a quota seat; students placed in open seats
+        leave the internship's unfilled quota as it was.
+        """
+        with self._lock:
+            for allocation in allocations:
+                student_id, internship_id = str(allocation.get("student_id")), str(allocation.get("internship_id"))
+                if (student_id, internship_id) in self._allocated:
+                    continue
+                self._allocated.add((student_id, internship_id))
+                self.totals["allocations"] += 1
+                internship = self._internships.get(internship_id)
+                category = self._students.get(student_id) or "Unknown"
+                self._filled_by_sector[internship["sector"] if internship else "Unknown"] += 1
+                self._allocated_by_category[category] += 1
+                if (allocation.get("reason") or "").startswith(QUOTA_REASON_PREFIX):
+                    self._filled_quota[internship_id][category] += 1
+            self._snapshot = None
+
+    def reconcile(self, supabase) -> bool:
+        """Compare the totals with HEAD counts and rebuild on any mismatch; True if a rebuild ran"""
+        counts = {table: supabase.table(table).select("id", count="exact", head=True).execute().count for table in TABLES}
+        with self._lock:
+            self.reconciled_at = self.clock()
+            stale = any(count is not None and count != self.totals[table] for table, count in counts.items())
+        if stale:
+            self.rebuild(supabase)
+        return stale
+
+    def refresh(self, supabase, background: Callable[[Callable[[], None]], Any] = None):
+        """
+        Load on first use, then reconcile once ``reconcile_seconds`` have passed
+
+        With ``background`` (e.g. an executor's submit) the reconcile runs off the
+        request and the current numbers are served meanwhile; one reconcile runs at a time.
+        """
+        if not self.loaded:
+            with self._reconciling:
+                if not self.loaded:
+                    self.rebuild(supabase)
+            return
+        if self.clock() - self.reconciled_at < self.reconcile_seconds or not self._reconciling.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.reconcile(supabase)
+            except Exception as e:
+                logger.warning("Dashboard reconcile failed: %s", e)
+            finally:
+                self._reconciling.release()
+
+        if background is None:
+            run()
+        else:
+            background(run)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The dashboard payload; recomputed only after a change"""
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = {
+                    "stats": {
+                        "total_students": self.totals["students"],
+                        "total_internships": self.totals["internships"],
+                        "total_allocations": self.totals["allocations"],
+                    },
+                    "breakdowns": {
+                        "seats_filled_by_sector": dict(self._filled_by_sector),
+                        "allocated_by_category": dict(self._allocated_by_category),
+                        "unfilled_quota_seats": self._unfilled_quota_seats(),
+                    },
+                    "recent_students": list(self.recent["students"]),
+                    "recent_internships": list(self.recent["internships"]),
+                }
+            return self._snapshot
+
+    def _unfilled_quota_seats(self) -> Dict[str, int]:
+        unfilled = {}
+        for key, internship in self._internships.items():
+            filled = self._filled_quota.get(key, {})
+            unfilled[key] = sum(max(0, quota - filled.get(category, 0)) for category, quota in internship["quotas"].items())
+        return unfilled
+
+
+def _select_all(supabase, table: str, columns: str):
+    """Every row of ``table`` with just ``columns``, or whole rows when the table lacks one of them"""
+    response = supabase.table(table).select(columns, count="exact").execute_all()
+    if response.count is None:
+        # A failed read has no count; the quota columns in particular differ between schemas
+        logger.warning("Reading %s of %s failed, reading whole rows instead", columns, table)
+        response = supabase.table(table).select("*").execute_all()
+    return response.data
@@ -0,0 +1,104 @@
+import gzip
+import hashlib
+from typing import Any, Callable, Collection, Optional
+
+from flask import Response, jsonify, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it responses fall back to gzip
+    brotli = None
+
+# Column that moves whenever a row is written, per table; the migrations keep updated_at current with triggers
+VERSION_COLUMNS = {"students": "updated_at", "internships": "updated_at", "allocations": "allocated_at"}
+# JSON bodies smaller than this go out uncompressed
+DEFAULT_COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def table_version(supabase, table_name: str) -> Optional[str]:
+    """
+    Cheap content version of a table: its row count plus the newest write timestamp
+
+    One request returning at most one row. Returns None when the count is
+    unknown, so callers skip conditional handling: the clients answer a
+    failed request with no count, never with a count of 0.
+    """
+    column = VERSION_COLUMNS.get(table_name, "id")
+    response = supabase.table(table_name).select(column, count="exact").order(column, desc=True).limit(1).execute()
+    if response.count is None:
+        return None
+    latest = response.data[0].get(column) if response.data else None
+    return f"{table_name}:{response.count}:{latest}"
+
+
+def content_etag(*versions: Optional[str]) -> Optional[str]:
+    """Strong ETag for the current path built from table versions, or None if any version is unknown"""
+    if any(version is None for version in versions):
+        return None
+    return hashlib.sha1("|".join((request.path,) + versions).encode()).hexdigest()
+
+
+def conditional_json(etag: Optional[str], build: Callable[[], Any]) -> Response:
+    """
+    Answer with the JSON ``build()`` returns, tagged with ``etag``
+
+    When the client's If-None-Match already holds the ETag (in any of its
+    encoded variants) the answer is an empty 304 and ``build`` never runs.
+    """
+    if etag is not None and _client_has(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    if etag is not None:
+        response.set_etag(etag)
+        # Lists depend on the session, so shared caches must not keep them and browsers must revalidate
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def compress_response(response: Response, min_bytes: int = DEFAULT_COMPRESS_MIN_BYTES) -> Response:
+    """Brotli or gzip a JSON response for clients that accept it, once the body reaches ``min_bytes``"""
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.mimetype != "application/json"
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    encoding = _negotiate_encoding()
+    if encoding is None or len(data) < min_bytes:
+        return response
+
+    if encoding == "br":
+        response.set_data(brotli.compress(data, quality=BROTLI_QUALITY))
+    else:
+        response.set_data(gzip.compress(data, compresslevel=GZIP_LEVEL))
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        # Each encoding is a different byte sequence, so a strong ETag has to differ too
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
+
+def _client_has(etag: str) -> bool:
+    tags = request.if_none_match
+    return any(tags.contains(etag + suffix) for suffix in ("", "-gzip", "-br"))
+
+
+def negotiate_encoding(available: Collection[str]) -> Optional[str]:
+    """The encoding of ``available`` ("br", "gzip") the client accepts best, brotli on a tie, or None for identity"""
+    accepted = request.accept_encodings
+    gzip_quality = accepted.quality("gzip") if "gzip" in available else 0
+    br_quality = accepted.quality("br") if "br" in available else 0
+    if br_quality and br_quality >= gzip_quality:
+        return "br"
+    return "gzip" if gzip_quality else None
+
+
+def _negotiate_encoding() -> Optional[str]:
+    return negotiate_encoding(("br", "gzip") if brotli is not None else ("gzip",))
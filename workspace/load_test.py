@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Load test the Flask API with concurrent logged-in users and report latency per route
+
+    python load_test.py --local --students 10000 --concurrency 16 --duration 30 --output load.json
+    python load_test.py --base-url http://127.0.0.1:5000 --rate 100 --duration 60
+    python load_test.py --local --mix available_internships=8,get_allocations=1,run_allocation=1
+    python load_test.py --local --serve-workers 4 --serve-threads 8 --concurrency 32
+
+Each worker thread logs in through /admin_login, /student_login and
+/company_login for the roles its routes need, then sends requests picked at
+random from the weighted route mix. run_allocation waits for the allocation
+job to finish, so it measures the whole run; run_allocation_enqueue measures
+only the 202 that starts (or joins) a job. With --concurrency alone every worker
+sends its next request as soon as the last one returns. With --rate requests
+start on a fixed schedule and latency counts from the scheduled start, so a
+server that falls behind shows it in the tail instead of quietly lowering the
+load. --local seeds a local Supabase database (see supabase_local) and serves
+the app from it in a child process, so nothing touches the network; with
+--serve-workers that child is serve.py instead of the development server.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+# Route name -> (role whose session sends it, method, path, JSON body)
+ROUTES = {
+    "available_internships": ("student", "GET", "/available_internships", None),
+    "company_internships": ("company", "GET", "/company_internships", None),
+    "get_allocations": ("admin", "GET", "/get_allocations", None),
+    # Waits for the job, so its latency is the whole run a client waits for (or joins, when one is in flight)
+    "run_allocation": ("admin", "POST", "/run_allocation", {"engine": "vectorized", "wait": True}),
+    # The 202 an admin's browser gets back before polling the job
+    "run_allocation_enqueue": ("admin", "POST", "/run_allocation", {"engine": "vectorized"}),
+}
+DEFAULT_MIX = {"available_internships": 60, "company_internships": 25, "get_allocations": 12, "run_allocation": 3}
+LOGIN_ROUTES = {"admin": "/admin_login", "student": "/student_login", "company": "/company_login"}
+# The demo passwords the student and company logins accept
+DEFAULT_PASSWORDS = {"student": "student123", "company": "company123"}
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_DURATION = 10.0
+DEFAULT_TIMEOUT = 30.0
+PERCENTILES = (50, 95, 99)
+
+# Child process serving the app for --local; the port comes in argv
+_SERVE_LOCAL = (
+    "import logging, sys\n"
+    "from werkzeug.serving import run_simple\n"
+    "from app import create_app\n"
+    "logging.getLogger('werkzeug').setLevel(logging.ERROR)\n"
+    "run_simple('127.0.0.1', int(sys.argv[1]), create_app(), threaded=True)\n"
+)
+
+# (route, status or None for a failed request, latency in seconds)
+Sample = Tuple[str, Optional[int], float]
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Parse "available_internships=8,run_allocation=1" into route weights"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ROUTES:
+            raise ValueError(f"Unknown route '{name}', expected one of {', '.join(ROUTES)}")
+        mix[name] = float(weight) if weight else 1.0
+    if not any(mix.values()):
+        raise ValueError("The route mix needs at least one positive weight")
+    return mix
+
+
+def login(base_url: str, role: str, credentials: Dict[str, Dict[str, str]], timeout: float = DEFAULT_TIMEOUT) -> Tuple[requests.Session, int]:
+    """A session logged in as ``role``, with the status of the login request"""
+    session = requests.Session()
+    try:
+        status = session.post(base_url + LOGIN_ROUTES[role], json=credentials.get(role, {}), timeout=timeout).status_code
+    except requests.RequestException:
+        status = 0
+    return session, status
+
+
+def run_load(base_url: str, mix: Dict[str, float] = None, concurrency: int = DEFAULT_CONCURRENCY, duration: float = DEFAULT_DURATION,
+             rate: Optional[float] = None, credentials: Optional[Dict[str, Dict[str, str]]] = None, timeout: float = DEFAULT_TIMEOUT,
+             seed: int = 0) -> Dict[str, Any]:
+    """
+    Drive ``base_url`` with ``concurrency`` workers for ``duration`` seconds and return the JSON report
+
+    Without ``rate`` the workers run a closed loop; with it they share a
+    schedule of ``rate`` request starts per second, and at most
+    ``concurrency`` requests are in flight.
+    """
+    mix = {name: weight for name, weight in (mix or DEFAULT_MIX).items() if weight > 0}
+    credentials = credentials or default_credentials()
+    roles = sorted({ROUTES[name][0] for name in mix})
+    names, weights = list(mix), list(mix.values())
+
+    # Log every worker in before the clock starts
+    workers: List[Dict[str, requests.Session]] = []
+    logins = {role: {"ok": 0, "failed": 0} for role in roles}
+    for _ in range(concurrency):
+        sessions = {}
+        for role in roles:
+            sessions[role], status = login(base_url, role, credentials, timeout)
+            logins[role]["ok" if status == 200 else "failed"] += 1
+        workers.append(sessions)
+
+    samples: List[List[Sample]] = [[] for _ in workers]
+    schedule_lock = threading.Lock()
+    next_start = [0]
+    started = time.perf_counter()
+    deadline = started + duration
+
+    def scheduled_start() -> Optional[float]:
+        if rate is None:
+            now = time.perf_counter()
+            return now if now < deadline else None
+        with schedule_lock:
+            start = started + next_start[0] / rate
+            next_start[0] += 1
+        if start >= deadline:
+            return None
+        delay = start - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        return start
+
+    def work(index: int):
+        rng = random.Random(seed * 1_000_003 + index)
+        sessions, recorded = workers[index], samples[index]
+        while True:
+            start = scheduled_start()
+            if start is None:
+                return
+            name = rng.choices(names, weights)[0]
+            role, method, path, body = ROUTES[name]
+            try:
+                status = sessions[role].request(method, base_url + path, json=body, timeout=timeout).status_code
+            except requests.RequestException:
+                status = None
+            recorded.append((name, status, time.perf_counter() - start))
+
+    threads = [threading.Thread(target=work, args=(i,), daemon=True) for i in range(len(workers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    for sessions in workers:
+        for session in sessions.values():
+            session.close()
+
+    all_samples = [sample for recorded in samples for sample in recorded]
+    return {
+        "meta": {
+            "base_url": base_url,
+            "mix": mix,
+            "concurrency": concurrency,
+            "rate": rate,
+            "duration": duration,
+            "elapsed": round(elapsed, 3),
+            "seed": seed,
+        },
+        "logins": logins,
+        "total": summarize(all_samples, elapsed),
+        "routes": {name: summarize([s for s in all_samples if s[0] == name], elapsed) for name in names},
+    }
+
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict[str, Any]:
+    """Requests, throughput, error rate, status codes and latency percentiles (ms) of some samples"""
+    latencies = sorted(latency for _, _, latency in samples)
+    errors = sum(1 for _, status, _ in samples if status is None or status >= 400)
+    statuses: Dict[str, int] = {}
+    for _, status, _ in samples:
+        key = str(status) if status is not None else "error"
+        statuses[key] = statuses.get(key, 0) + 1
+    summary = {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed > 0 else 0.0,
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "status_codes": statuses,
+    }
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = round(percentile(latencies, p) * 1000, 2) if latencies else None
+    summary["mean_ms"] = round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None
+    summary["max_ms"] = round(latencies[-1] * 1000, 2) if latencies else None
+    return summary
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+def default_credentials() -> Dict[str, Dict[str, str]]:
+    """Admin credentials from ADMIN_EMAIL / ADMIN_PASSWORD, and the demo student and company passwords"""
+    return {
+        "admin": {"email": os.getenv("ADMIN_EMAIL", ""), "password": os.getenv("ADMIN_PASSWORD", "")},
+        "student": {"email": "", "password": DEFAULT_PASSWORDS["student"]},
+        "company": {"email": "", "password": DEFAULT_PASSWORDS["company"]},
+    }
+
+
+class LocalServer:
+    """
+    The app served from a seeded local Supabase database in a child process
+
+    The database holds a synthetic cohort from benchmark_allocation. The child
+    gets its own interpreter, so the load generator's threads do not compete
+    with the server for the GIL. With ``workers`` set the child is serve.py
+    with that many workers of ``threads`` each, else the development server.
+    """
+
+    def __init__(self, students: int = 1000, internships: Optional[int] = None, seed: int = 0, admin: Optional[Dict[str, str]] = None,
+                 workers: Optional[int] = None, threads: Optional[int] = None):
+        self.students = students
+        self.internships = internships
+        self.seed = seed
+        self.admin = admin or {"email": "admin@example.com", "password": "admin"}
+        self.workers = workers
+        self.threads = threads
+        self.url = None
+        self._tmp = None
+        self._process = None
+
+    def __enter__(self):
+        from benchmark_allocation import generate_cohort
+        from supabase_local import LocalSupabaseClient
+
+        self._tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self._tmp.name, "load_test.db")
+        students, internships = generate_cohort(self.students, self.internships, self.seed)
+        with LocalSupabaseClient(path) as client:
+            client.load({"students": students, "internships": internships})
+
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        env = dict(os.environ, SUPABASE_LOCAL_DB=path, ADMIN_EMAIL=self.admin["email"], ADMIN_PASSWORD=self.admin["password"])
+        env.pop("MOCK_SUPABASE_DATA", None)
+        env.setdefault("LOG_LEVEL", "ERROR")
+        command = [sys.executable, "-c", _SERVE_LOCAL, str(port)]
+        if self.workers:
+            command = [sys.executable, "serve.py", "--bind", f"127.0.0.1:{port}", "--workers", str(self.workers), "--health-bind", "off"]
+            if self.threads:
+                command += ["--threads", str(self.threads)]
+        self._process = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env, stdout=subprocess.DEVNULL)
+        self.url = f"http://127.0.0.1:{port}"
+        self._wait_ready()
+        return self
+
+    def _wait_ready(self, timeout: float = 30.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"Local server exited with code {self._process.returncode}")
+            try:
+                if requests.get(self.url + "/health", timeout=1).status_code == 200:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.1)
+        raise RuntimeError("Local server did not become ready")
+
+    def __exit__(self, *exc_info):
+        if self._process is not None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        if self._tmp is not None:
+            self._tmp.cleanup()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the Flask API and report latency per route")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--base-url", help="URL of a running app, e.g. one started with SUPABASE_LOCAL_DB")
+    target.add_argument("--local", action="store_true", help="serve the app from a seeded local database in a child process")
+    parser.add_argument("--students", type=int, default=1000, help="cohort size seeded with --local")
+    parser.add_argument("--internships", type=int, help="internships seeded with --local; defaults to one per 20 students")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help=f"route weights, from {', '.join(ROUTES)}")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="worker threads, each with its own logged-in sessions")
+    parser.add_argument("--rate", type=float, help="target requests per second; without it workers send back to back")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds to send requests for")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument("--serve-workers", type=int, help="serve --local with serve.py and this many workers instead of the development server")
+    parser.add_argument("--serve-threads", type=int, help="threads per serve.py worker with --serve-workers")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    credentials = default_credentials()
+    if args.local:
+        with LocalServer(args.students, args.internships, args.seed, workers=args.serve_workers, threads=args.serve_threads) as server:
+            credentials["admin"] = server.admin
+            report = run_load(server.url, args.mix, args.concurrency, args.duration, args.rate, credentials, args.timeout, args.seed)
+        report["meta"]["local_students"] = args.students
+        report["meta"]["local_server"] = f"serve.py x{args.serve_workers}" if args.serve_workers else "development"
+    else:
+        report = run_load(args.base_url.rstrip("/"), args.mix, args.concurrency, args.duration, args.rate, credentials, args.timeout, args.seed)
+
+    for name, summary in report["routes"].items():
+        print(f"⏱️ {name}: {summary['requests']} requests, {summary['throughput_rps']} req/s, p50 {summary['p50_ms']} ms, "
+              f"p95 {summary['p95_ms']} ms, p99 {summary['p99_ms']} ms, errors {summary['error_rate']:.2%}", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Saved report to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,190 @@
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import Flask, Response, g, request
+
+import supabase_client
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CALL_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+BYTE_BUCKETS = (1024, 10240, 102400, 1048576, 10485760, 104857600)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Installed AppMetrics, fed by the one observer this module registers with supabase_client
+_installed = weakref.WeakSet()
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple, List[float]] = {}  # per label set: bucket counts, then sum and count
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * (len(self.buckets) + 2))
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), key + (_number(bound),))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), key + ('+Inf',))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series[-2])}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    """Gauge whose samples are read from ``collect`` at scrape time"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str], collect: Callable[[], Iterable[Tuple[Tuple, float]]]):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for key, value in sorted(self.collect()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+
+class AppMetrics:
+    """
+    Per-route request metrics for a Flask app, served in Prometheus text format
+
+    Every request records its latency, status, and the Supabase calls and bytes
+    it caused, including calls made from worker threads on its behalf. Process
+    wide Supabase traffic and read cache hit ratios are exported alongside.
+    """
+
+    def __init__(self, cache_stats: Optional[Callable[[], Dict[str, Dict[str, int]]]] = None):
+        self.registry = MetricsRegistry()
+        self.requests = self.registry.register(Counter("http_requests_total", "HTTP requests by route, method and status", ("route", "method", "status")))
+        self.latency = self.registry.register(Histogram("http_request_duration_seconds", "HTTP request latency", ("route", "method")))
+        self.calls = self.registry.register(Histogram("supabase_calls_per_request", "Supabase calls made while serving a request", ("route",), CALL_BUCKETS))
+        self.request_bytes = self.registry.register(Histogram("supabase_bytes_per_request", "Supabase bytes sent and received while serving a request", ("route",), BYTE_BUCKETS))
+        self.supabase_requests = self.registry.register(Counter("supabase_requests_total", "Supabase REST requests by method and status", ("method", "status")))
+        self.supabase_bytes = self.registry.register(Counter("supabase_bytes_total", "Supabase REST bytes by direction", ("direction",)))
+        self.cache_stats = cache_stats
+        for counter in ("hits", "misses", "evictions", "invalidations"):
+            self.registry.register(Gauge(f"supabase_cache_{counter}", f"Read cache {counter} by table", ("table",), self._cache_counter(counter)))
+        self.registry.register(Gauge("supabase_cache_hit_ratio", "Read cache hits over lookups by table", ("table",), self._cache_hit_ratios))
+
+    def install(self, app: Flask, path: str = "/metrics", token: Optional[str] = None):
+        """Time every request of ``app`` and serve the metrics at ``path``, behind a bearer ``token`` if given"""
+        _installed.add(self)
+        if _observe_call not in supabase_client.call_observers:
+            supabase_client.call_observers.append(_observe_call)
+
+        @app.before_request
+        def start_timer():
+            g.metrics_started = time.perf_counter()
+            g.metrics_call_stats, g.metrics_call_token = supabase_client.start_call_tracking()
+
+        @app.after_request
+        def record(response):
+            started = g.pop("metrics_started", None)
+            if started is None:
+                return response
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            stats = g.pop("metrics_call_stats")
+            supabase_client.stop_call_tracking(g.pop("metrics_call_token"))
+            self.requests.inc(route=route, method=request.method, status=response.status_code)
+            self.latency.observe(time.perf_counter() - started, route=route, method=request.method)
+            self.calls.observe(stats["calls"], route=route)
+            self.request_bytes.observe(stats["bytes_sent"] + stats["bytes_received"], route=route)
+            return response
+
+        @app.route(path, methods=["GET"])
+        def metrics():
+            if token and request.headers.get("Authorization") != f"Bearer {token}":
+                return Response("Unauthorized\n", status=401, mimetype="text/plain")
+            return Response(self.registry.render(), content_type=CONTENT_TYPE)
+
+    def _observe_call(self, method: str, status: int, sent: int, received: int):
+        self.supabase_requests.inc(method=method, status=status)
+        self.supabase_bytes.inc(sent, direction="sent")
+        self.supabase_bytes.inc(received, direction="received")
+
+    def _cache_counter(self, counter: str):
+        def collect():
+            stats = self.cache_stats() if self.cache_stats else {}
+            return [((table,), values[counter]) for table, values in stats.items()]
+        return collect
+
+    def _cache_hit_ratios(self):
+        stats = self.cache_stats() if self.cache_stats else {}
+        return [((table,), values["hits"] / (values["hits"] + values["misses"])) for table, values in stats.items() if values["hits"] + values["misses"]]
+
+
+def _observe_call(method: str, status: int, sent: int, received: int):
+    """Forward a Supabase call to every installed AppMetrics; apps that were dropped stop counting"""
+    for metrics in list(_installed):
+        metrics._observe_call(method, status, sent, received)
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
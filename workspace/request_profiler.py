@@ -0,0 +1,177 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Tuple
+
+from flask import Flask, g, jsonify, request, send_from_directory
+
+logger = logging.getLogger(__name__)
+
+# Request header an admin sets to have that request profiled
+PROFILE_HEADER = "X-Profile"
+# Profiles kept on disk before the oldest are deleted
+DEFAULT_KEEP = 100
+# Functions listed in the text summary written next to each profile
+SUMMARY_ROWS = 40
+
+
+class RequestProfiler:
+    """
+    Runs selected requests under cProfile and writes the results to ``directory``
+
+    A request is profiled when an admin sends ``X-Profile: 1`` or when it falls
+    in the ``sample_rate`` fraction. Each profile is a ``.prof`` file (pstats
+    format; open it with snakeviz or flameprof for a call tree or flame graph)
+    and a ``.txt`` summary of the slowest functions by cumulative time. Only
+    the request's own thread is profiled, and one request at a time: others
+    arriving meanwhile run unprofiled. Work a profiled request hands to another
+    thread (an allocation job, say) is profiled separately through
+    ``profile_job``. Nothing is installed unless profiling is configured, so a
+    disabled profiler costs nothing.
+    """
+
+    def __init__(self, directory: str, sample_rate: float = 0.0, keep: int = DEFAULT_KEEP, sample: Callable[[], float] = random.random):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.keep = keep
+        self.sample = sample
+        self._busy = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def install(self, app: Flask, is_admin: Callable[[], bool]):
+        """Profile selected requests of ``app`` and serve the profile list under /admin/profiles"""
+
+        @app.before_request
+        def start_profile():
+            requested = request.headers.get(PROFILE_HEADER) == "1" and is_admin()
+            if not (requested or (self.sample_rate and self.sample() < self.sample_rate)):
+                return
+            if not self._busy.acquire(blocking=False):
+                return
+            g.profiler = cProfile.Profile()
+            g.profile_started = time.perf_counter()
+            g.profiler.enable()
+
+        @app.after_request
+        def finish_profile(response):
+            profiler = g.pop("profiler", None)
+            if profiler is not None:
+                profiler.disable()
+                seconds = time.perf_counter() - g.pop("profile_started")
+                self._busy.release()
+                profile_id = self._new_id(request.path)
+                header = f"{request.method} {request.full_path.rstrip('?')} {response.status_code} {seconds * 1000:.1f} ms"
+                self._write(profile_id, profiler, header)
+                logger.info("Profiled %s %s in %.1f ms: %s", request.method, request.path, seconds * 1000, profile_id)
+                response.headers["X-Profile-Id"] = profile_id
+            return response
+
+        @app.teardown_request
+        def abandon_profile(exc):
+            # after_request is skipped when the request fails outside the view
+            profiler = g.pop("profiler", None)
+            if profiler is not None:
+                profiler.disable()
+                self._busy.release()
+
+        @app.route("/admin/profiles", methods=["GET"])
+        def list_profiles():
+            if not is_admin():
+                return jsonify({"message": "Unauthorized"}), 401
+            return jsonify({"profiles": self.profiles(int(request.args.get("limit", 50)))}), 200
+
+        @app.route("/admin/profiles/<name>", methods=["GET"])
+        def get_profile(name):
+            if not is_admin():
+                return jsonify({"message": "Unauthorized"}), 401
+            if not re.fullmatch(r"[\w.-]+\.(prof|txt)", name) or not os.path.isfile(os.path.join(self.directory, name)):
+                return jsonify({"message": "Profile not found"}), 404
+            return send_from_directory(self.directory, name, as_attachment=name.endswith(".prof"))
+
+    def profiling(self) -> bool:
+        """Whether the current request is being profiled"""
+        return g.get("profiler") is not None
+
+    def profile_job(self, work: Callable[..., Tuple[Any, int]], name: str) -> Tuple[Callable[..., Tuple[Any, int]], str]:
+        """
+        Wrap ``work``, which returns a (body, status) pair, to run under its own cProfile
+
+        For work the current request hands to another thread. The profile is
+        written when ``work`` returns, as ``name`` with the request line; returns
+        the wrapped callable and the id its profile will have.
+        """
+        profile_id = self._new_id(name)
+        request_line = f"{request.method} {request.full_path.rstrip('?')}"
+
+        def run(*args, **kwargs):
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            status = 500
+            profiler.enable()
+            try:
+                result = work(*args, **kwargs)
+                status = result[1]
+                return result
+            finally:
+                profiler.disable()
+                seconds = time.perf_counter() - started
+                try:
+                    self._write(profile_id, profiler, f"{request_line} {name} {status} {seconds * 1000:.1f} ms")
+                    logger.info("Profiled %s for %s in %.1f ms: %s", name, request_line, seconds * 1000, profile_id)
+                except OSError as e:
+                    logger.warning("Could not write profile %s: %s", profile_id, e)
+
+        return run, profile_id
+
+    def profiles(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Recent profiles, newest first, with the request line recorded in each summary"""
+        names = sorted((n for n in os.listdir(self.directory) if n.endswith(".prof")), reverse=True)[:limit]
+        listed = []
+        for name in names:
+            profile_id = name[:-len(".prof")]
+            summary = os.path.join(self.directory, f"{profile_id}.txt")
+            try:
+                with open(summary) as f:
+                    request_line = f.readline().strip()
+            except OSError:
+                request_line = ""
+            listed.append({
+                "id": profile_id,
+                "request": request_line,
+                "profile": f"/admin/profiles/{name}",
+                "summary": f"/admin/profiles/{profile_id}.txt",
+                "bytes": os.path.getsize(os.path.join(self.directory, name)),
+            })
+        return listed
+
+    def _new_id(self, name: str) -> str:
+        route = re.sub(r"\W+", "_", name).strip("_") or "root"
+        now = time.time()
+        return f"{time.strftime('%Y%m%dT%H%M%S', time.localtime(now))}{int(now * 1000) % 1000:03d}-{route}-{uuid.uuid4().hex[:8]}"
+
+    def _write(self, profile_id: str, profiler: cProfile.Profile, header: str):
+        path = os.path.join(self.directory, profile_id)
+        profiler.dump_stats(f"{path}.prof")
+
+        summary = io.StringIO()
+        summary.write(f"{header}\n\n")
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(SUMMARY_ROWS)
+        with open(f"{path}.txt", "w") as f:
+            f.write(summary.getvalue())
+        self._prune()
+
+    def _prune(self):
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(".prof"))
+        for name in names[:max(0, len(names) - self.keep)]:
+            for suffix in (".prof", ".txt"):
+                try:
+                    os.remove(os.path.join(self.directory, name[:-len(".prof")] + suffix))
+                except OSError:
+                    pass
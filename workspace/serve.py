@@ -0,0 +1,386 @@
+"""
+Pre-forking production server for the Flask app
+
+    python serve.py
+    python serve.py --workers 4 --threads 8 --bind 0.0.0.0:5000
+    python serve.py --health-bind 127.0.0.1:5001 --graceful-timeout 30
+
+The master process builds the app once, connects to Supabase, warms the read
+cache and the dashboard aggregates, and only then forks the workers, so each
+one starts with all of it in memory. The workers accept on one shared
+listening socket and each serves up to --threads requests at a time.
+
+Signals to the master:
+    TERM, INT   stop accepting, let requests in flight finish, then exit
+    HUP         fork fresh workers, then drain and retire the old ones
+
+The master answers probes on --health-bind, apart from the app's /health so
+a probe never queues behind slow requests: GET /livez is 200 while the master
+runs, GET /readyz is 200 while workers are serving and nothing is draining.
+Caches, metrics and profiles stay per worker; allocation jobs are shared
+through ALLOCATION_JOB_DIR.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import Flask
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+logger = logging.getLogger(__name__)
+
+# Address the app is served on
+DEFAULT_BIND = "0.0.0.0:5000"
+# Address of the master's liveness and readiness probes; "off" disables them
+DEFAULT_HEALTH_BIND = "127.0.0.1:5001"
+# Worker processes; allocation runs are CPU bound, so one per core
+DEFAULT_WORKERS = os.cpu_count() or 2
+# Requests each worker serves at once; most of a request is waiting on Supabase
+DEFAULT_THREADS = 8
+# Seconds a draining worker gets to finish its requests before it is killed
+DEFAULT_GRACEFUL_TIMEOUT = 30.0
+# Connections the kernel queues while every worker thread is busy
+DEFAULT_BACKLOG = 2048
+# Seconds a worker with every thread busy waits before it looks at the socket again
+SLOT_WAIT_SECONDS = 0.05
+# Seconds before a worker that exited on its own is replaced, so a crash cannot spin
+RESPAWN_DELAY_SECONDS = 1.0
+
+
+class _RequestHandler(WSGIRequestHandler):
+    # One request per connection: an idle keep-alive client would otherwise hold a worker thread
+    protocol_version = "HTTP/1.0"
+
+
+class WorkerServer(BaseWSGIServer):
+    """
+    The WSGI server of one worker, on the listening socket it inherited
+
+    It accepts a connection only while one of its ``threads`` is free, so a
+    busy worker leaves new connections queued for an idle one instead of
+    taking them on. ``drain`` waits for the requests in flight.
+    """
+
+    multithread = True
+
+    def __init__(self, listener: socket.socket, app: Flask, threads: int):
+        host, port = listener.getsockname()[:2]
+        super().__init__(host, port, app, handler=_RequestHandler, fd=listener.fileno())
+        # Every worker wakes for a new connection and all but one find it taken
+        self.socket.setblocking(False)
+        self.threads = threads
+        self._slots = threading.BoundedSemaphore(threads)
+
+    def get_request(self) -> Tuple[socket.socket, Any]:
+        # An OSError here makes the serve loop skip this turn and select again
+        if not self._slots.acquire(timeout=SLOT_WAIT_SECONDS):
+            raise BlockingIOError("every worker thread is busy")
+        try:
+            connection, address = self.socket.accept()
+        except OSError:
+            self._slots.release()
+            raise
+        connection.setblocking(True)
+        return connection, address
+
+    def process_request(self, request, client_address):
+        threading.Thread(target=self._process, args=(request, client_address), daemon=True).start()
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def drain(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for the requests in flight; True when all of them finished"""
+        deadline = time.monotonic() + timeout
+        taken = 0
+        while taken < self.threads and self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            taken += 1
+        for _ in range(taken):
+            self._slots.release()
+        return taken == self.threads
+
+
+class PreforkServer:
+    """
+    Master process: forks ``workers`` copies of the loaded app and keeps them running
+
+    A worker that exits on its own is replaced. ``reload`` (SIGHUP) forks a
+    new generation before retiring the old one, so the socket never stops
+    accepting. ``post_fork`` runs in each new worker before it serves, to
+    replace what must not be shared across processes (pooled connections).
+    """
+
+    def __init__(self, app: Flask, bind: str = DEFAULT_BIND, workers: int = DEFAULT_WORKERS, threads: int = DEFAULT_THREADS,
+                 graceful_timeout: float = DEFAULT_GRACEFUL_TIMEOUT, health_bind: Optional[str] = DEFAULT_HEALTH_BIND,
+                 post_fork: Optional[Callable[[], None]] = None, backlog: int = DEFAULT_BACKLOG):
+        self.app = app
+        self.workers = workers
+        self.threads = threads
+        self.graceful_timeout = graceful_timeout
+        self.post_fork = post_fork
+        self.listener = _listen(bind, backlog)
+        self.health = None
+        if health_bind and health_bind != "off":
+            self.health = ThreadingHTTPServer(_parse_bind(health_bind), _HealthHandler)
+            self.health.daemon_threads = True
+            self.health.prefork = self
+        self.generation = 0
+        self.draining = False
+        self.started_at = time.time()
+        self._children: Dict[int, int] = {}  # worker pid -> generation
+        self._signals: List[int] = []
+        self._next_spawn = 0.0
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.listener.getsockname()[:2]
+
+    @property
+    def health_address(self) -> Optional[Tuple[str, int]]:
+        return self.health.server_address[:2] if self.health else None
+
+    def run(self) -> int:
+        """Serve until SIGTERM or SIGINT; returns the exit code"""
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, lambda signum, frame: self._signals.append(signum))
+        self._spawn_missing()
+        if self.health:
+            threading.Thread(target=self.health.serve_forever, name="health-probe", daemon=True).start()
+        try:
+            while True:
+                self._reap()
+                while self._signals:
+                    signum = self._signals.pop(0)
+                    if signum == signal.SIGHUP:
+                        self.reload()
+                    else:
+                        logger.info("Received %s, draining", signal.Signals(signum).name)
+                        return self.stop()
+                self._spawn_missing()
+                time.sleep(0.1)
+        except BaseException:
+            self.stop()
+            raise
+
+    def reload(self):
+        """Replace every worker: fork the new generation, then drain the old one"""
+        self.generation += 1
+        old = [pid for pid, generation in self._children.items() if generation < self.generation]
+        self._spawn_missing()
+        logger.info("Reloading: generation %s started, retiring %s workers", self.generation, len(old))
+        self._signal_workers(signal.SIGTERM, old)
+
+    def stop(self) -> int:
+        """Drain every worker, kill the ones past the graceful timeout and close the sockets"""
+        self.draining = True
+        self._signal_workers(signal.SIGTERM, list(self._children))
+        deadline = time.monotonic() + self.graceful_timeout + 1.0
+        while self._children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+        if self._children:
+            logger.warning("Killing %s workers still busy after %s s", len(self._children), self.graceful_timeout)
+            self._signal_workers(signal.SIGKILL, list(self._children))
+            while self._children:
+                self._reap()
+                time.sleep(0.05)
+        if self.health:
+            self.health.shutdown()
+            self.health.server_close()
+        self.listener.close()
+        return 0
+
+    def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        serving = sum(1 for generation in self._children.values() if generation == self.generation)
+        ready = serving > 0 and not self.draining
+        return ready, {
+            "status": "ready" if ready else "unavailable",
+            "workers": serving,
+            "expected_workers": self.workers,
+            "threads": self.threads,
+            "generation": self.generation,
+            "draining": self.draining,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+        }
+
+    def _spawn_missing(self):
+        if self.draining or time.monotonic() < self._next_spawn:
+            return
+        current = sum(1 for generation in self._children.values() if generation == self.generation)
+        for _ in range(self.workers - current):
+            pid = os.fork()
+            if pid == 0:
+                os._exit(self._serve_worker())
+            self._children[pid] = self.generation
+
+    def _serve_worker(self) -> int:
+        """Body of a forked worker; returns its exit code"""
+        server = None
+        stopping = threading.Event()
+
+        def drain(signum, frame):
+            stopping.set()
+            if server is not None:
+                # shutdown() waits for the serve loop, which this handler has interrupted
+                threading.Thread(target=server.shutdown, daemon=True).start()
+
+        try:
+            # The master coordinates Ctrl-C and reloads; workers only answer its SIGTERM
+            signal.signal(signal.SIGTERM, drain)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            if self.health:
+                self.health.socket.close()
+            if self.post_fork:
+                self.post_fork()
+            server = WorkerServer(self.listener, self.app, self.threads)
+            if not stopping.is_set():
+                server.serve_forever(poll_interval=0.5)
+            self.listener.close()
+            if not server.drain(self.graceful_timeout):
+                logger.warning("Worker %s stopped with requests still in flight", os.getpid())
+            return 0
+        except BaseException:
+            logger.exception("Worker %s failed", os.getpid())
+            return 1
+
+    def _reap(self):
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self._children.clear()
+                return
+            if pid == 0:
+                return
+            generation = self._children.pop(pid, None)
+            code = os.waitstatus_to_exitcode(status)
+            if generation == self.generation and not self.draining:
+                logger.error("Worker %s exited with code %s; replacing it", pid, code)
+                self._next_spawn = time.monotonic() + RESPAWN_DELAY_SECONDS
+
+    def _signal_workers(self, signum: int, pids: List[int]):
+        for pid in pids:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+
+class _HealthHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/livez":
+            status, body = 200, {"status": "alive", "pid": os.getpid()}
+        elif self.path == "/readyz":
+            ready, body = self.server.prefork.readiness()
+            status = 200 if ready else 503
+        else:
+            status, body = 404, {"message": "Not found"}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def warm_up(app: Flask, supabase) -> Dict[str, Any]:
+    """
+    Do the work the first requests would otherwise pay for, before the workers fork
+
+    Connects to Supabase, fills the read cache with the cohort queries the
+    list routes and allocation runs make, builds the dashboard aggregates and
+    sends one request through Flask so its lazily built state exists. With
+    SNAPSHOT_DIR set the table snapshots are taken and decoded as well.
+    """
+    started = time.perf_counter()
+    students = supabase.table("students").select("*").execute_all().data
+    supabase.table("students").select_all("*").execute()
+    internships = supabase.table("internships").select("*").execute_all().data
+    supabase.table("internships").select("*").execute()
+    app.extensions['dashboard_aggregates'].rebuild(supabase)
+    snapshots = app.extensions.get('snapshots')
+    if snapshots is not None:
+        # Workers inherit the decoded rows and the encoded cohort instead of each building their own
+        snapshots.rows(supabase, "internships")
+        snapshots.rows(supabase, "students")
+        snapshots.rows(supabase, "students").encoded_cohort()
+    app.test_client().get("/health")
+    return {"students": len(students), "internships": len(internships), "seconds": round(time.perf_counter() - started, 3)}
+
+
+def _parse_bind(bind: str) -> Tuple[str, int]:
+    host, _, port = bind.rpartition(":")
+    return host.strip("[]") or "0.0.0.0", int(port)
+
+
+def _listen(bind: str, backlog: int) -> socket.socket:
+    host, port = _parse_bind(bind)
+    listener = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(backlog)
+    return listener
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the Flask app with pre-forked workers")
+    parser.add_argument("--bind", default=os.getenv("SERVE_BIND", DEFAULT_BIND), help="host:port to serve the app on")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SERVE_WORKERS", DEFAULT_WORKERS)))
+    parser.add_argument("--threads", type=int, default=int(os.getenv("SERVE_THREADS", DEFAULT_THREADS)), help="requests each worker serves at once")
+    parser.add_argument("--graceful-timeout", type=float, default=float(os.getenv("SERVE_GRACEFUL_TIMEOUT", DEFAULT_GRACEFUL_TIMEOUT)),
+                        help="seconds a stopping worker gets to finish its requests")
+    parser.add_argument("--health-bind", default=os.getenv("SERVE_HEALTH_BIND", DEFAULT_HEALTH_BIND),
+                        help="host:port of the /livez and /readyz probes, or off")
+    parser.add_argument("--no-warm", action="store_true", help="fork without loading the cache and aggregates first")
+    args = parser.parse_args(argv)
+
+    # Jobs must be visible from every worker, whichever one a poll lands on
+    job_dir = None
+    if not os.getenv("ALLOCATION_JOB_DIR"):
+        job_dir = os.environ["ALLOCATION_JOB_DIR"] = tempfile.mkdtemp(prefix="allocation-jobs-")
+
+    from app import create_app
+    from supabase_client import get_supabase
+
+    app = create_app()
+    # Access lines follow LOG_LEVEL; werkzeug would otherwise log every request at INFO
+    logging.getLogger("werkzeug").setLevel(logging.getLogger().level)
+    supabase = get_supabase()
+    if not args.no_warm:
+        warmed = warm_up(app, supabase)
+        print(f"🔥 Warmed up with {warmed['students']} students and {warmed['internships']} internships in {warmed['seconds']} s")
+
+    server = PreforkServer(app, args.bind, args.workers, args.threads, args.graceful_timeout, args.health_bind,
+                           post_fork=getattr(supabase, "after_fork", None))
+    host, port = server.address
+    print(f"🚀 Serving on http://{host}:{port} with {args.workers} workers x {args.threads} threads")
+    if server.health_address:
+        print(f"🩺 Probes on http://{server.health_address[0]}:{server.health_address[1]}/readyz")
+    try:
+        return server.run()
+    finally:
+        if job_dir:
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,38 @@
+import heapq
+from typing import List, Dict, Iterator, Optional
+
+from skill_vocab import bit_ids
+
+
+class SkillIndex:
+    """
+    Inverted index from skill id to the students holding that skill
+
+    Posting lists keep the order of ``members``, so when members are ranked
+    (e.g. by marks) `candidates` yields overlapping students in that rank
+    order without touching anyone who shares no skill with the query.
+    """
+
+    def __init__(self, members: List[int], skill_bits: List[int]):
+        self._rank = {member: position for position, member in enumerate(members)}
+        self._postings: Dict[int, List[int]] = {}
+        for member in members:
+            for skill_id in bit_ids(skill_bits[member]):
+                self._postings.setdefault(skill_id, []).append(member)
+
+    def postings(self, skill_id: int) -> List[int]:
+        return self._postings.get(skill_id, [])
+
+    def overlap_size(self, required_bits: int) -> int:
+        """Upper bound on the number of students sharing a skill with ``required_bits``"""
+        return sum(len(self.postings(skill_id)) for skill_id in bit_ids(required_bits))
+
+    def candidates(self, required_bits: int, skip: Optional[set] = None) -> Iterator[int]:
+        """Yield each member sharing at least one skill with ``required_bits`` once, in member order"""
+        lists = [self._postings[skill_id] for skill_id in bit_ids(required_bits) if skill_id in self._postings]
+        seen = set() if skip is None else skip
+        merged = lists[0] if len(lists) == 1 else heapq.merge(*lists, key=self._rank.__getitem__)
+        for member in merged:
+            if member not in seen:
+                seen.add(member)
+                yield member
@@ -0,0 +1,147 @@
+import logging
+from typing import List, Dict, Any, Iterable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SkillVocabulary:
+    """
+    Interns skill names to integer ids and stores skill sets as packed bitsets
+
+    Skills are compared case-insensitively with surrounding whitespace removed,
+    the same way `_skill_match_score` compares them. A single skill set is a
+    Python int with bit ``id`` set for every skill it contains; many skill sets
+    can be packed into a ``(rows, words)`` uint64 matrix for NumPy scoring.
+    """
+
+    def __init__(self, skills: Iterable[str] = ()):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        for skill in skills:
+            self.intern(skill)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, skill: str) -> bool:
+        return _canonical(skill) in self._ids
+
+    @property
+    def words(self) -> int:
+        """Number of 64-bit words needed to pack one skill set"""
+        return max(1, (len(self._names) + 63) // 64)
+
+    def intern(self, skill: str) -> int:
+        """Return the id of a skill, assigning the next free id if it is new"""
+        key = _canonical(skill)
+        skill_id = self._ids.get(key)
+        if skill_id is None:
+            skill_id = len(self._names)
+            self._ids[key] = skill_id
+            self._names.append(key)
+        return skill_id
+
+    def id_of(self, skill: str) -> Optional[int]:
+        """Return the id of a known skill, or None without interning it"""
+        return self._ids.get(_canonical(skill))
+
+    def name_of(self, skill_id: int) -> str:
+        return self._names[skill_id]
+
+    def encode(self, value: Any, add: bool = True) -> int:
+        """
+        Encode a comma separated string or a list of skills as a bitset
+
+        With ``add=False`` unknown skills are ignored instead of interned, which
+        is only safe when the result is never used as a denominator.
+        """
+        bits = 0
+        for skill in normalize_list(value):
+            skill_id = self.intern(skill) if add else self.id_of(skill)
+            if skill_id is not None:
+                bits |= 1 << skill_id
+        return bits
+
+    def decode(self, bits: int) -> List[str]:
+        """Return the skill names contained in a bitset, in id order"""
+        return [self._names[i] for i in bit_ids(bits)]
+
+    def pack(self, bitsets: List[int], words: Optional[int] = None) -> np.ndarray:
+        """Pack Python int bitsets into a (len(bitsets), words) uint64 matrix"""
+        words = words or self.words
+        packed = np.zeros((len(bitsets), words), dtype=np.uint64)
+        mask = (1 << 64) - 1
+        for row, bits in enumerate(bitsets):
+            word = 0
+            while bits and word < words:
+                packed[row, word] = bits & mask
+                bits >>= 64
+                word += 1
+        return packed
+
+
+def match_count(a: int, b: int) -> int:
+    """Number of skills shared by two bitsets"""
+    return (a & b).bit_count()
+
+
+def bit_ids(bits: int) -> List[int]:
+    """Ids of the skills contained in a bitset, ascending"""
+    ids = []
+    while bits:
+        low = bits & -bits
+        ids.append(low.bit_length() - 1)
+        bits ^= low
+    return ids
+
+
+def skill_match_score(student_bits: int, required_bits: int) -> float:
+    """Bitset equivalent of `_skill_match_score`"""
+    if not required_bits:
+        return 100.0
+    return (match_count(student_bits, required_bits) / required_bits.bit_count()) * 100.0
+
+
+def packed_match_counts(packed: np.ndarray, bits: int) -> np.ndarray:
+    """Count, for every packed row, the skills it shares with one bitset"""
+    counts = np.zeros(packed.shape[0], dtype=np.int64)
+    word = 0
+    while bits and word < packed.shape[1]:
+        mask = bits & ((1 << 64) - 1)
+        if mask:
+            counts += _popcount(packed[:, word] & np.uint64(mask))
+        bits >>= 64
+        word += 1
+    return counts
+
+
+def normalize_list(value: Any) -> List[str]:
+    """Normalize various input formats to a list of strings"""
+    if not value:
+        return []
+
+    try:
+        if isinstance(value, str):
+            return [s.strip() for s in value.split(",") if s.strip()]
+        if isinstance(value, list):
+            return [str(s).strip() for s in value if str(s).strip()]
+        return [str(value).strip()] if str(value).strip() else []
+    except Exception as e:
+        logger.warning("Error normalizing list: %s", e)
+        return []
+
+
+def _canonical(skill: str) -> str:
+    return skill.lower().strip()
+
+
+if hasattr(np, "bitwise_count"):
+    def _popcount(words: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(words)
+else:
+    _BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(words: np.ndarray) -> np.ndarray:
+        return _BYTE_POPCOUNT[words.view(np.uint8)].reshape(len(words), 8).sum(axis=1)
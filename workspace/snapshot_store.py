@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+Columnar snapshots of the students and internships tables, opened with mmap
+
+    python snapshot_store.py snapshots/ --local-db local.db
+    python snapshot_store.py snapshots/ --inspect
+
+A snapshot file holds one table: a JSON manifest (row count, columns, the
+table_version it was taken at) followed by one aligned buffer per column.
+Numeric and boolean columns are typed arrays, strings and JSON values are
+dictionary encoded, and skill columns are lists of interned skill ids.
+Opening a snapshot maps the file and views the buffers in place, so nothing
+is parsed until rows are asked for. SnapshotStore keeps one file per table
+and refetches a table only when its table_version has moved on.
+"""
+import argparse
+import json
+import logging
+import mmap
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from http_caching import table_version
+from skill_vocab import SkillVocabulary
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"OPTSNAP1"
+FORMAT_VERSION = 1
+# Buffers start on this boundary so every typed view is aligned
+ALIGNMENT = 64
+# Columns of comma separated (or listed) skill names, stored as interned skill ids
+SKILL_COLUMNS = ("skills", "required_skills", "skills_required")
+
+# Per-row state of a column
+ABSENT, NULL, PRESENT = 0, 1, 2
+# How a skills value was written, so rows come back exactly as stored
+SKILLS_LIST, SKILLS_COMMA_SPACE, SKILLS_COMMA, SKILLS_RAW = 1, 2, 3, 4
+_SKILL_SEPARATORS = {SKILLS_COMMA_SPACE: ", ", SKILLS_COMMA: ","}
+_MISSING = object()
+
+
+class Snapshot:
+    """
+    One table's snapshot file, mapped read-only
+
+    ``column`` returns NumPy views straight into the mapping (numeric
+    values, or codes and skill ids), so reading a column copies nothing.
+    ``rows`` decodes the whole table into dicts once and keeps them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if self._map[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a snapshot file")
+            length = int.from_bytes(self._map[8:16], "little")
+            self.manifest = json.loads(self._map[16:16 + length])
+            if self.manifest.get("format") != FORMAT_VERSION:
+                raise ValueError(f"{path} has snapshot format {self.manifest.get('format')}, expected {FORMAT_VERSION}")
+        except BaseException:
+            self._map.close()
+            raise
+        self.table = self.manifest["table"]
+        self.version = self.manifest["version"]
+        self.row_count = self.manifest["rows"]
+        self.columns = {column["name"]: column for column in self.manifest["columns"]}
+        self._rows: Optional[List[Dict[str, Any]]] = None
+        self._cohort: Any = _MISSING
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def buffer(self, column: str, name: str) -> np.ndarray:
+        offset, dtype, count = self.columns[column]["buffers"][name]
+        return np.frombuffer(self._map, dtype=dtype, count=count, offset=offset)
+
+    def column(self, name: str) -> Dict[str, np.ndarray]:
+        """Zero-copy views of a column's buffers: ``state`` plus ``values``, ``codes`` or ``offsets`` and ``ids``"""
+        return {buffer: self.buffer(name, buffer) for buffer in self.columns[name]["buffers"]}
+
+    def dictionary(self, column: str, name: str = "dictionary") -> List[str]:
+        offsets = self.buffer(column, f"{name}_offsets").tolist()
+        data = self.buffer(column, f"{name}_data").tobytes()
+        return [data[start:end].decode() for start, end in zip(offsets, offsets[1:])]
+
+    def skill_bits(self, column: str, vocab: SkillVocabulary) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pack a skill column into ``vocab``'s ``(rows, words)`` bitset matrix without decoding rows
+
+        Returns the matrix and a mask of the rows that have skills. Names are
+        interned into ``vocab`` once per distinct skill, not once per row.
+        """
+        names = self.dictionary(column)
+        # Blank list entries are not skills, as normalize_list drops them
+        mapped = np.array([vocab.intern(name) if name.strip() else -1 for name in names] + [-1], dtype=np.int64)
+        ids = mapped[self.buffer(column, "ids")]
+        rows = np.repeat(np.arange(self.row_count), np.diff(self.buffer(column, "offsets")))[ids >= 0]
+        ids = ids[ids >= 0]
+        packed = np.zeros((self.row_count, vocab.words), dtype=np.uint64)
+        np.bitwise_or.at(packed, (rows, ids // 64), np.left_shift(np.uint64(1), (ids % 64).astype(np.uint64)))
+        return packed, self.buffer(column, "state") == PRESENT
+
+    def student_cohort(self) -> Optional[Dict[str, Any]]:
+        """
+        The cohort allocation_fixed._encode_students would build from these rows, built from the columns
+
+        Computed once per snapshot; every caller gets its own skill vocabulary,
+        since the engines intern internship skills into it. None when a column
+        holds values only the row-by-row encoder knows how to read.
+        """
+        with self._lock:
+            if self._cohort is _MISSING:
+                self._cohort = self._encode_cohort()
+            cohort = self._cohort
+        if cohort is None:
+            return None
+        vocab = cohort["vocab"]
+        return dict(cohort, vocab=SkillVocabulary(vocab.name_of(i) for i in range(len(vocab))))
+
+    def rows(self) -> "SnapshotRows":
+        """The table as the dicts it was written from, decoded on first use"""
+        with self._lock:
+            if self._rows is None:
+                self._rows = self._decode_rows()
+            return SnapshotRows(self._rows, self)
+
+    def close(self):
+        # Decoded rows stay usable; only reading columns needs the mapping
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # NumPy views handed out still use the mapping; it closes when they are gone
+
+    def _encode_cohort(self) -> Optional[Dict[str, Any]]:
+        kinds = {name: column["kind"] for name, column in self.columns.items()}
+        expected = {"marks": ("int", "float"), "sector_pref": ("str",), "location_pref": ("str",), "category": ("str",), "skills": ("skills",), "id": ("str", "int", "float")}
+        if any(name in kinds and kinds[name] not in allowed for name, allowed in expected.items()):
+            return None
+        count = self.row_count
+        if "marks" in kinds:
+            # float(marks or 0.0): a missing or null mark scores as 0
+            marks = np.where(self.buffer("marks", "state") == PRESENT, self.buffer("marks", "values"), 0).astype(np.float64)
+        else:
+            marks = np.zeros(count, dtype=np.float64)
+        sector_prefs, sector_ids = self._first_seen("sector_pref", lambda value: value.strip().lower())
+        location_prefs, location_ids = self._first_seen("location_pref", lambda value: value.strip().lower())
+        categories, category_ids = self._first_seen("category", lambda value: value, keep_blank=True)
+        # Students sharing an id are one group; every null or missing id is the single key None
+        if kinds.get("id") in ("int", "float"):
+            present = self.buffer("id", "state") == PRESENT
+            keys = np.full(count, -1, dtype=np.int64)
+            keys[present] = np.unique(self.buffer("id", "values")[present], return_inverse=True)[1]
+        else:
+            keys = self.buffer("id", "codes") if "id" in kinds else np.full(count, -1, dtype=np.int32)
+        groups, group_keys = _first_seen_keys(keys)
+        vocab = SkillVocabulary()
+        skills = self.skill_bits("skills", vocab)[0] if "skills" in kinds else np.zeros((count, 1), dtype=np.uint64)
+        return {
+            "count": count,
+            "marks": marks,
+            "scorable": np.ones(count, dtype=bool),
+            "sector_prefs": sector_prefs,
+            "sector_ids": sector_ids,
+            "location_prefs": location_prefs,
+            "location_ids": location_ids,
+            "categories": categories,
+            "category_ids": category_ids,
+            "groups": groups,
+            "group_count": len(group_keys),
+            "vocab": vocab,
+            "skills": skills,
+        }
+
+    def _first_seen(self, column: str, canonical, keep_blank: bool = False) -> Tuple[np.ndarray, Dict[str, int]]:
+        """Per-row ids of a string column's canonical values in order of first appearance, with the name -> id map; blank is -1 unless kept"""
+        names: Dict[str, int] = {}
+
+        def code_of(value: str) -> int:
+            value = canonical(value)
+            return names.setdefault(value, len(names)) if value or keep_blank else -1
+
+        dictionary = self.dictionary(column) if column in self.columns else []
+        # Null and absent rows (code -1) pick the last entry, the blank value
+        canonical_codes = np.array([code_of(value) for value in dictionary] + [code_of("")], dtype=np.int64)
+        row_codes = self.buffer(column, "codes") if column in self.columns else np.full(self.row_count, -1, dtype=np.int32)
+        ids, keys = _first_seen_keys(canonical_codes[row_codes], skip=-1)
+        by_code = list(names)
+        return ids, {by_code[key]: i for i, key in enumerate(keys.tolist())}
+
+    def _decode_rows(self) -> List[Dict[str, Any]]:
+        names = list(self.columns)
+        values = [self._decode_column(name) for name in names]
+        rows = [dict(zip(names, row)) for row in zip(*values)]
+        for row in (rows if any(self.columns[name]["sparse"] for name in names) else ()):
+            for name in [name for name, value in row.items() if value is _MISSING]:
+                del row[name]
+        return rows
+
+    def _decode_column(self, name: str) -> List[Any]:
+        kind = self.columns[name]["kind"]
+        state = self.buffer(name, "state")
+        if kind in ("int", "float", "bool"):
+            decoded = self.buffer(name, "values").tolist()
+            if kind == "bool":
+                decoded = [bool(value) for value in decoded]
+            elif kind == "float" and self.buffer(name, "ints").any():
+                for i in np.flatnonzero(self.buffer(name, "ints")).tolist():
+                    decoded[i] = int(decoded[i])
+        elif kind in ("str", "json"):
+            dictionary = self.dictionary(name)
+            if kind == "json":
+                dictionary = [json.loads(text) for text in dictionary]
+            decoded = [dictionary[code] if code >= 0 else None for code in self.buffer(name, "codes").tolist()]
+        else:
+            decoded = self._decode_skills(name)
+        if not (state == PRESENT).all():
+            for i in np.flatnonzero(state != PRESENT).tolist():
+                decoded[i] = None if state[i] == NULL else _MISSING
+        return decoded
+
+    def _decode_skills(self, name: str) -> List[Any]:
+        names = self.dictionary(name)
+        raw = self.dictionary(name, "raw")
+        forms = self.buffer(name, "forms").tolist()
+        offsets = self.buffer(name, "offsets").tolist()
+        ids = self.buffer(name, "ids").tolist()
+        raw_codes = self.buffer(name, "raw_codes").tolist()
+        decoded = []
+        for i, form in enumerate(forms):
+            skills = [names[skill_id] for skill_id in ids[offsets[i]:offsets[i + 1]]]
+            if form == SKILLS_LIST:
+                decoded.append(skills)
+            elif form == SKILLS_RAW:
+                decoded.append(raw[raw_codes[i]])
+            else:
+                decoded.append(_SKILL_SEPARATORS.get(form, ", ").join(skills))
+        return decoded
+
+
+class SnapshotRows(list):
+    """Rows decoded from a snapshot; allocation_fixed takes the encoded cohort from ``encoded_cohort`` instead of the rows"""
+
+    def __init__(self, rows: List[Dict[str, Any]], snapshot: Snapshot):
+        super().__init__(rows)
+        self.snapshot = snapshot
+
+    def encoded_cohort(self) -> Optional[Dict[str, Any]]:
+        return self.snapshot.student_cohort()
+
+
+def _first_seen_keys(keys: np.ndarray, skip: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Number the distinct keys in order of first appearance, as dict.setdefault does
+
+    Returns the id of every row (-1 for ``skip`` keys) and the keys in id order.
+    """
+    ids = np.full(len(keys), -1, dtype=np.int64)
+    kept = keys != skip if skip is not None else np.ones(len(keys), dtype=bool)
+    unique, first, inverse = np.unique(keys[kept], return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty(len(unique), dtype=np.int64)
+    rank[order] = np.arange(len(unique))
+    ids[kept] = rank[inverse.reshape(-1)]
+    return ids, unique[order]
+
+
+def write_snapshot(path: str, table: str, rows: List[Dict[str, Any]], version: str) -> Dict[str, Any]:
+    """Write ``rows`` of ``table`` as a snapshot stamped with ``version``; readers of an older file keep their mapping"""
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    columns = []
+    for name in names:
+        values = [row.get(name, _MISSING) for row in rows]
+        column, arrays = _encode_column(name, values)
+        column["buffers"] = {}
+        columns.append((column, arrays))
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "table": table,
+        "version": version,
+        "rows": len(rows),
+        "written_at": time.time(),
+        "columns": [column for column, _ in columns],
+    }
+    # Buffer offsets depend on the manifest's length, which depends on the offsets: repeat until it settles
+    header = -1
+    encoded = b""
+    while len(encoded) != header:
+        header = len(encoded)
+        offset = _align(16 + header)
+        for column, arrays in columns:
+            for buffer_name, array in arrays.items():
+                column["buffers"][buffer_name] = [offset, array.dtype.str, len(array)]
+                offset = _align(offset + array.nbytes)
+        encoded = json.dumps(manifest).encode()
+
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC + len(encoded).to_bytes(8, "little") + encoded)
+        for column, arrays in columns:
+            for buffer_name, array in arrays.items():
+                f.write(b"\0" * (column["buffers"][buffer_name][0] - f.tell()))
+                f.write(array.tobytes())
+    os.replace(temporary, path)
+    return manifest
+
+
+def _encode_column(name: str, values: List[Any]) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    state = np.array([ABSENT if value is _MISSING else NULL if value is None else PRESENT for value in values], dtype=np.uint8)
+    present = [value for value in values if value is not _MISSING and value is not None]
+    column = {"name": name, "sparse": bool((state == ABSENT).any())}
+    arrays = {"state": state}
+
+    if name in SKILL_COLUMNS and all(isinstance(value, str) or (isinstance(value, list) and all(isinstance(s, str) for s in value)) for value in present):
+        column["kind"] = "skills"
+        arrays.update(_encode_skills(values))
+    elif present and all(isinstance(value, bool) for value in present):
+        column["kind"] = "bool"
+        arrays["values"] = np.array([value is True for value in values], dtype=np.uint8)
+    elif present and all(isinstance(value, int) and not isinstance(value, bool) and -2 ** 63 <= value < 2 ** 63 for value in present):
+        column["kind"] = "int"
+        arrays["values"] = np.array([value if s == PRESENT else 0 for value, s in zip(values, state)], dtype=np.int64)
+    elif present and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present) and any(isinstance(value, float) for value in present):
+        column["kind"] = "float"
+        arrays["values"] = np.array([value if s == PRESENT else 0.0 for value, s in zip(values, state)], dtype=np.float64)
+        # Whole numbers written as ints among floats come back as ints
+        arrays["ints"] = np.array([isinstance(value, int) for value in values], dtype=np.uint8)
+    else:
+        column["kind"] = "str" if all(isinstance(value, str) for value in present) else "json"
+        texts = [value if column["kind"] == "str" else json.dumps(value) for value in present]
+        codes, dictionary = _dictionary_encode(texts)
+        codes_iter = iter(codes)
+        arrays["codes"] = np.array([next(codes_iter) if s == PRESENT else -1 for s in state], dtype=np.int32)
+        arrays.update(_dictionary_arrays("dictionary", dictionary))
+    return column, arrays
+
+
+def _encode_skills(values: List[Any]) -> Dict[str, np.ndarray]:
+    skill_ids: Dict[str, int] = {}
+    raw_ids: Dict[str, int] = {}
+    forms, offsets, ids, raw_codes = [], [0], [], []
+    for value in values:
+        raw_code = -1
+        if isinstance(value, list):
+            form, skills = SKILLS_LIST, value
+        elif isinstance(value, str):
+            skills = [skill.strip() for skill in value.split(",")]
+            if all(skills) and ", ".join(skills) == value:
+                form = SKILLS_COMMA_SPACE
+            elif all(skills) and ",".join(skills) == value:
+                form = SKILLS_COMMA
+            else:
+                # Odd spacing or empty entries: keep the text as written, and its skills for scoring
+                form, raw_code = SKILLS_RAW, raw_ids.setdefault(value, len(raw_ids))
+                skills = [skill for skill in skills if skill]
+        else:
+            form, skills = 0, []
+        forms.append(form)
+        raw_codes.append(raw_code)
+        ids.extend(skill_ids.setdefault(skill, len(skill_ids)) for skill in skills)
+        offsets.append(len(ids))
+    arrays = {
+        "forms": np.array(forms, dtype=np.uint8),
+        "offsets": np.array(offsets, dtype=np.int64),
+        "ids": np.array(ids, dtype=np.int32),
+        "raw_codes": np.array(raw_codes, dtype=np.int32),
+    }
+    arrays.update(_dictionary_arrays("dictionary", list(skill_ids)))
+    arrays.update(_dictionary_arrays("raw", list(raw_ids)))
+    return arrays
+
+
+def _dictionary_encode(texts: List[str]) -> Tuple[List[int], List[str]]:
+    ids: Dict[str, int] = {}
+    codes = [ids.setdefault(text, len(ids)) for text in texts]
+    return codes, list(ids)
+
+
+def _dictionary_arrays(name: str, texts: List[str]) -> Dict[str, np.ndarray]:
+    encoded = [text.encode() for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(text) for text in encoded], out=offsets[1:])
+    return {f"{name}_offsets": offsets, f"{name}_data": np.frombuffer(b"".join(encoded), dtype=np.uint8)}
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class SnapshotStore:
+    """
+    Snapshot files of whole tables under ``directory``, one per table
+
+    ``rows`` answers from the snapshot while its stamp equals the table's
+    current ``table_version`` (one single-row request); otherwise it fetches
+    the table, writes a new snapshot and answers with that. Processes
+    sharing the directory (serve.py workers) reuse each other's snapshots: a
+    rewritten file is noticed by its changed inode and mapped again.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._open: Dict[str, Snapshot] = {}
+
+    def path(self, table: str) -> str:
+        return os.path.join(self.directory, f"{table}.snap")
+
+    def open(self, table: str) -> Optional[Snapshot]:
+        """The table's current snapshot file, mapped, or None when there is none"""
+        path = self.path(table)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            snapshot = self._open.get(table)
+            if snapshot is not None and snapshot.identity == (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+                return snapshot
+            try:
+                fresh = Snapshot(path)
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable snapshot %s: %s", path, e)
+                return None
+            # The replaced snapshot is not closed: a reader may hold it still, and its mapping goes when they let go
+            self._open[table] = fresh
+            return fresh
+
+    def snapshot(self, supabase, table: str, version: Optional[str] = None) -> Optional[Snapshot]:
+        """A snapshot of ``table`` as of ``version`` (looked up when not given), taken now if the stored one is stale"""
+        version = version if version is not None else table_version(supabase, table)
+        snapshot = self._current(table, version)
+        if snapshot is None and self._refresh(supabase, table, version):
+            snapshot = self.open(table)
+        return snapshot
+
+    def rows(self, supabase, table: str, version: Optional[str] = None) -> List[Dict[str, Any]]:
+        """All rows of ``table``: decoded from a current snapshot, or fetched and snapshotted for the next call"""
+        version = version if version is not None else table_version(supabase, table)
+        snapshot = self._current(table, version)
+        if snapshot is not None:
+            return snapshot.rows()
+        return self._refresh(supabase, table, version)
+
+    def _current(self, table: str, version: Optional[str]) -> Optional[Snapshot]:
+        snapshot = self.open(table)
+        if snapshot is not None and version is not None and snapshot.version == version:
+            return snapshot
+        return None
+
+    def _refresh(self, supabase, table: str, version: Optional[str]) -> List[Dict[str, Any]]:
+        # The version was read before the rows, so a write in between leaves an older stamp, which only costs a refetch
+        rows = supabase.table(table).select("*").execute_all().data
+        # An empty answer is only kept when the version agrees the table is empty; a failed fetch also comes back empty
+        if version is not None and (rows or version.startswith(f"{table}:0:")):
+            started = time.perf_counter()
+            write_snapshot(self.path(table), table, rows, version)
+            logger.info("Wrote %s snapshot of %s rows at %s in %.3f s", table, len(rows), version, time.perf_counter() - started)
+        return rows
+
+    def close(self):
+        with self._lock:
+            for snapshot in self._open.values():
+                snapshot.close()
+            self._open.clear()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Write or inspect snapshots of the students and internships tables")
+    parser.add_argument("directory", help="snapshot directory, as SNAPSHOT_DIR")
+    parser.add_argument("--local-db", help="take the tables from this local SQLite database instead of get_supabase()")
+    parser.add_argument("--inspect", action="store_true", help="print the manifests of the existing snapshots")
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore(args.directory)
+    supabase = None
+    if args.local_db:
+        from supabase_local import LocalSupabaseClient
+        supabase = LocalSupabaseClient(args.local_db)
+    elif not args.inspect:
+        from supabase_client import get_supabase
+        supabase = get_supabase()
+    for table in ("students", "internships"):
+        if args.inspect:
+            snapshot = store.open(table)
+            if snapshot is None:
+                print(f"❌ No {table} snapshot in {args.directory}")
+                continue
+            kinds = ", ".join(f"{name}:{column['kind']}" for name, column in snapshot.columns.items())
+            print(f"📦 {table}: {len(snapshot)} rows at {snapshot.version}, {os.path.getsize(snapshot.path)} bytes ({kinds})")
+            continue
+        started = time.perf_counter()
+        snapshot = store.snapshot(supabase, table)
+        if snapshot is None:
+            print(f"❌ Could not snapshot {table}", file=sys.stderr)
+            return 1
+        print(f"✅ {table}: {len(snapshot)} rows at {snapshot.version} in {time.perf_counter() - started:.3f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
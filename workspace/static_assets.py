@@ -0,0 +1,148 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+from typing import Dict, Optional
+
+from flask import Response, request, send_file
+
+from http_caching import DEFAULT_COMPRESS_MIN_BYTES, brotli, negotiate_encoding
+
+logger = logging.getLogger(__name__)
+
+# Files up to this size are kept in memory, together with their compressed variants
+DEFAULT_MEMORY_MAX_BYTES = 256 * 1024
+# Bytes kept in memory across the whole bundle; files past it are read from disk
+DEFAULT_MEMORY_BUDGET_BYTES = 32 * 1024 * 1024
+# Vite emits build output under assets/ as name-<8 character content hash>.ext
+HASHED_NAME = re.compile(r"assets/.+-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+")
+# A hashed file's content never changes under its name, so browsers and CDNs keep it for a year
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# index.html and unhashed files change with a deploy, so they are revalidated by ETag on every use
+REVALIDATE_CACHE_CONTROL = "no-cache"
+# Precompressed variants a build step may write next to a file, by Content-Encoding
+VARIANT_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+# Content types compressed in memory at startup when the build wrote no variant
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "application/manifest+json", "image/svg+xml")
+# Compression happens once per file at startup, so it can afford the slowest settings
+STARTUP_GZIP_LEVEL = 9
+STARTUP_BROTLI_QUALITY = 11
+
+
+class StaticFile:
+    """One file of the bundle: its encoded variants on disk and, when it is small, their bytes"""
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self.immutable = HASHED_NAME.fullmatch(name) is not None
+        self.paths: Dict[Optional[str], str] = {None: path}  # Content-Encoding (None for identity) -> file
+        self.bodies: Dict[Optional[str], bytes] = {}
+        for encoding, suffix in VARIANT_SUFFIXES.items():
+            if os.path.isfile(path + suffix):
+                self.paths[encoding] = path + suffix
+        stat = os.stat(path)
+        self.size = stat.st_size
+        self.last_modified = stat.st_mtime
+        self.etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+    @property
+    def encodings(self):
+        return [encoding for encoding in set(self.paths) | set(self.bodies) if encoding]
+
+    def load(self) -> int:
+        """Read the file and its variants into memory, compressing what the build left uncompressed; returns the bytes held"""
+        for encoding, path in self.paths.items():
+            with open(path, "rb") as f:
+                self.bodies[encoding] = f.read()
+        data = self.bodies[None]
+        # Content-addressed, so the tag survives a rebuild that leaves the file unchanged
+        self.etag = hashlib.sha1(data).hexdigest()
+        if self.mimetype.startswith(COMPRESSIBLE_TYPES) and len(data) >= DEFAULT_COMPRESS_MIN_BYTES:
+            if "gzip" not in self.bodies:
+                self._keep_if_smaller("gzip", gzip.compress(data, compresslevel=STARTUP_GZIP_LEVEL, mtime=0))
+            if "br" not in self.bodies and brotli is not None:
+                self._keep_if_smaller("br", brotli.compress(data, quality=STARTUP_BROTLI_QUALITY))
+        return sum(len(body) for body in self.bodies.values())
+
+    def unload(self):
+        self.bodies.clear()
+
+    def response(self) -> Response:
+        """The variant the request accepts best, answered 304 or partially when the request asks for that"""
+        encodings = self.encodings
+        encoding = negotiate_encoding(encodings)
+        body = self.bodies.get(encoding)
+        if body is not None:
+            response = Response(body, mimetype=self.mimetype)
+            length = len(body)
+        else:
+            response = send_file(self.paths[encoding], mimetype=self.mimetype, conditional=False, etag=False)
+            length = os.path.getsize(self.paths[encoding])
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        if encodings:
+            response.vary.add("Accept-Encoding")
+        # Each encoding is a different byte sequence, so each gets its own strong ETag
+        response.set_etag(f"{self.etag}-{encoding}" if encoding else self.etag)
+        response.last_modified = self.last_modified
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL if self.immutable else REVALIDATE_CACHE_CONTROL
+        return response.make_conditional(request, accept_ranges=True, complete_length=length)
+
+    def _keep_if_smaller(self, encoding: str, body: bytes):
+        if len(body) < len(self.bodies[None]):
+            self.bodies[encoding] = body
+
+
+class DistAssets:
+    """
+    Index of the built frontend in ``root``, taken at startup
+
+    Serving a file is a dict lookup. Each file goes out in the best encoding
+    the client accepts among the precompressed ``.br``/``.gz`` variants the
+    build wrote next to it. Files up to ``memory_max_bytes`` (index.html
+    among them) are kept in memory with their variants, up to
+    ``memory_budget_bytes`` in all; compressible ones the build left
+    uncompressed are compressed once here. Larger files stream from disk.
+    Hashed files under assets/ are marked immutable; everything else is
+    revalidated by ETag. Call ``scan`` again after a rebuild.
+    """
+
+    def __init__(self, root: str, memory_max_bytes: int = DEFAULT_MEMORY_MAX_BYTES, memory_budget_bytes: int = DEFAULT_MEMORY_BUDGET_BYTES):
+        self.root = root
+        self.memory_max_bytes = memory_max_bytes
+        self.memory_budget_bytes = memory_budget_bytes
+        self.files: Dict[str, StaticFile] = {}
+        self.memory_bytes = 0
+        self.scan()
+
+    def scan(self):
+        files: Dict[str, StaticFile] = {}
+        memory = 0
+        for directory, _, filenames in os.walk(self.root):
+            for filename in sorted(filenames):
+                path = os.path.join(directory, filename)
+                if any(path.endswith(suffix) and os.path.isfile(path[:-len(suffix)]) for suffix in VARIANT_SUFFIXES.values()):
+                    continue  # a variant, served through the file it compresses
+                name = os.path.relpath(path, self.root).replace(os.sep, "/")
+                static_file = StaticFile(name, path)
+                if static_file.size <= self.memory_max_bytes:
+                    held = static_file.load()
+                    if memory + held <= self.memory_budget_bytes:
+                        memory += held
+                    else:
+                        static_file.unload()
+                files[name] = static_file
+        self.files = files
+        self.memory_bytes = memory
+        if files:
+            logger.info("Indexed %s files under %s, %s bytes in memory", len(files), self.root, memory)
+        else:
+            logger.warning("No frontend build under %s; run `npm run build` to serve the SPA", self.root)
+
+    def response(self, name: str) -> Optional[Response]:
+        """The response for ``name`` (a path relative to the root), or None when the bundle has no such file"""
+        static_file = self.files.get(name)
+        return static_file.response() if static_file is not None else None
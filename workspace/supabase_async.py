@@ -0,0 +1,156 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, List, Optional
+
+from supabase_client import DEFAULT_POOL_SIZE, MockSupabaseClient, get_supabase, submit_in_context
+
+# Queries in flight at once across the process; matches the HTTP client's keep-alive pool
+DEFAULT_ASYNC_WORKERS = int(os.getenv("SUPABASE_ASYNC_WORKERS", DEFAULT_POOL_SIZE))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def query_executor() -> ThreadPoolExecutor:
+    """Shared pool the async client and execute_concurrently run blocking queries on"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DEFAULT_ASYNC_WORKERS, thread_name_prefix="supabase-query")
+        return _executor
+
+
+def _forget_executor():
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+# The pool's threads do not survive a fork, so a forked worker starts a pool of its own
+os.register_at_fork(after_in_child=_forget_executor)
+
+
+class AsyncSupabaseClient:
+    """
+    Awaitable counterpart of the HTTP, mock or cached Supabase clients
+
+    ``await client.table(name).select(...).eq(...).execute()`` builds the same
+    query as the wrapped client and runs it on a thread pool, so independent
+    reads can be gathered. The wrapped client keeps its pooled keep-alive
+    session, read cache and paging; requests has no asyncio transport, so the
+    pool provides the concurrency.
+    """
+
+    def __init__(self, client, executor: Optional[ThreadPoolExecutor] = None):
+        self.client = client
+        self.executor = executor
+
+    def table(self, table_name):
+        return AsyncSupabaseTable(self.client.table(table_name), self._run)
+
+    async def _run(self, call, *args, **kwargs):
+        future = submit_in_context(self.executor or query_executor(), partial(call, *args, **kwargs))
+        return await asyncio.wrap_future(future)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+class AsyncMockSupabaseClient(AsyncSupabaseClient):
+    """Async client over MockSupabaseClient; rows are in memory, so queries run inline on the event loop"""
+
+    def __init__(self, tables=None):
+        super().__init__(MockSupabaseClient(tables))
+
+    async def _run(self, call, *args, **kwargs):
+        return call(*args, **kwargs)
+
+
+class AsyncSupabaseTable:
+    def __init__(self, table, run):
+        self.table = table
+        self._run = run
+
+    def select(self, columns="*", count=None, head=False):
+        return AsyncSupabaseQuery(self.table.select(columns, count, head), self._run)
+
+    def select_all(self, columns="*", count=None):
+        return AsyncSupabaseQuery(self.table.select(columns, count), self._run, "execute_all")
+
+    def insert(self, data):
+        # The sync insert sends on call, so hold it back until execute is awaited
+        return AsyncSupabaseQuery(_Deferred(self.table.insert, data), self._run)
+
+    async def bulk_insert(self, rows, *args, **kwargs):
+        return await self._run(self.table.bulk_insert, rows, *args, **kwargs)
+
+    async def bulk_upsert(self, rows, *args, **kwargs):
+        return await self._run(self.table.bulk_upsert, rows, *args, **kwargs)
+
+    def update(self, data):
+        return AsyncSupabaseQuery(self.table.update(data), self._run)
+
+    def delete(self):
+        return AsyncSupabaseQuery(self.table.delete(), self._run)
+
+
+class AsyncSupabaseQuery:
+    """Forwards builder calls (eq, order, range, ...) to the sync query; execute is awaitable"""
+
+    def __init__(self, query, run, method="execute"):
+        self._query = query
+        self._run = run
+        self._method = method
+
+    def __getattr__(self, name):
+        attr = getattr(self._query, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return self if result is self._query else result
+        return call
+
+    async def execute(self):
+        return await self._run(getattr(self._query, self._method))
+
+    async def execute_all(self):
+        return await self._run(self._query.execute_all)
+
+
+class _Deferred:
+    def __init__(self, call, *args):
+        self._call = call
+        self._args = args
+
+    def execute(self):
+        return self._call(*self._args).execute()
+
+
+async def gather_queries(*queries) -> List[Any]:
+    """Await the execute of every query at once; responses come back in argument order"""
+    return list(await asyncio.gather(*(query.execute() for query in queries)))
+
+
+def execute_concurrently(*queries) -> List[Any]:
+    """
+    Sync helper for Flask views: execute a batch of sync queries on the shared pool
+
+    Pass built queries, or a bound ``execute_all`` for full-table reads. The
+    total wait is the slowest query rather than the sum. Responses come back
+    in argument order, and the first exception raised is re-raised.
+    """
+    calls = [query if callable(query) else query.execute for query in queries]
+    if len(calls) < 2:
+        return [call() for call in calls]
+    futures = [submit_in_context(query_executor(), call) for call in calls]
+    return [future.result() for future in futures]
+
+
+def get_async_supabase() -> AsyncSupabaseClient:
+    """Async client over the process-wide client from get_supabase(), sharing its pool and cache"""
+    return AsyncSupabaseClient(get_supabase())
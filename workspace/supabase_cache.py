@@ -0,0 +1,226 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Seconds a query result stays fresh, per table; tables left out are never cached
+DEFAULT_CACHE_TTLS = {"internships": 30.0, "students": 10.0}
+# Cached queries per table before the least recently used one is evicted
+DEFAULT_MAX_ENTRIES = 1024
+
+_BUILDER = object()  # marks builder calls in a cache key
+
+
+class TableCache:
+    """
+    Read-through cache of query results, kept per table
+
+    Each table has its own TTL and an LRU of at most ``max_entries`` queries,
+    so per-key lookups such as ``eq("id", ...)`` cannot grow without bound.
+    ``invalidate`` drops a table's entries and bumps its generation: a read
+    that started before the invalidation still returns its result but does
+    not store it, so a concurrent write can never be hidden by a stale entry.
+    Every caller gets its own copy of the ``data`` list and its rows, so
+    filtering the list or editing a row's fields never reaches the cache;
+    values nested inside a row are still shared and must not be changed.
+    """
+
+    def __init__(self, ttls: Dict[str, float], max_entries: int = DEFAULT_MAX_ENTRIES, clock: Callable[[], float] = time.monotonic):
+        self.ttls = dict(ttls)
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[str, "OrderedDict[Tuple, Tuple[float, Any]]"] = {}
+        self._generations: Dict[str, int] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def caches(self, table: str) -> bool:
+        return self.ttls.get(table, 0) > 0
+
+    def read(self, table: str, key: Tuple, fetch: Callable[[], Any]) -> Any:
+        """Return the fresh cached response for ``key``, or fetch, store and return it"""
+        with self._lock:
+            stats = self._table_stats(table)
+            entries = self._entries.setdefault(table, OrderedDict())
+            entry = entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                entries.move_to_end(key)
+                stats["hits"] += 1
+                return _copy_response(entry[1])
+            stats["misses"] += 1
+            generation = self._generations.get(table, 0)
+
+        response = fetch()
+        # The clients answer a failed request with an empty response, which must not be kept
+        if not response.data:
+            return response
+
+        with self._lock:
+            if self._generations.get(table, 0) == generation:
+                entries = self._entries.setdefault(table, OrderedDict())
+                entries[key] = (self.clock() + self.ttls[table], response)
+                entries.move_to_end(key)
+                while len(entries) > self.max_entries:
+                    entries.popitem(last=False)
+                    self._table_stats(table)["evictions"] += 1
+        # The stored response is never handed out, so the caller may edit this one
+        return _copy_response(response)
+
+    def invalidate(self, table: str):
+        with self._lock:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            self._entries.pop(table, None)
+            self._table_stats(table)["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit, miss, eviction and invalidation counters and current entries, per table"""
+        with self._lock:
+            return {table: dict(stats, entries=len(self._entries.get(table, ()))) for table, stats in self._stats.items()}
+
+    def _table_stats(self, table: str) -> Dict[str, int]:
+        if table not in self._stats:
+            self._stats[table] = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        return self._stats[table]
+
+
+def _copy_response(response: Any) -> Any:
+    """The response with its own ``data`` list and row dicts"""
+    copied = copy.copy(response)
+    data = response.data
+    if isinstance(data, list):
+        copied.data = [dict(row) if isinstance(row, dict) else row for row in data]
+    elif isinstance(data, dict):
+        copied.data = dict(data)
+    return copied
+
+
+class CachedSupabaseClient:
+    """Wraps an HTTP or mock Supabase client so reads of cached tables go through a TableCache"""
+
+    def __init__(self, client, ttls: Optional[Dict[str, float]] = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.client = client
+        self.cache = TableCache(DEFAULT_CACHE_TTLS if ttls is None else ttls, max_entries)
+
+    def table(self, table_name):
+        table = self.client.table(table_name)
+        if not self.cache.caches(table_name):
+            return table
+        return CachedSupabaseTable(self.cache, table_name, table)
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        return self.cache.stats()
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+class CachedSupabaseTable:
+    """Table whose select queries are answered from the cache and whose writes invalidate it"""
+
+    def __init__(self, cache: TableCache, table_name: str, table):
+        self.cache = cache
+        self.table_name = table_name
+        self.table = table
+
+    def select(self, columns="*", count=None, head=False):
+        return _CachedQuery(self, self.table.select(columns, count, head), ("select", columns, count, head))
+
+    def select_all(self, columns="*", count=None):
+        return self.select(columns, count).execute_all()
+
+    def insert(self, data):
+        return self._write(lambda: self.table.insert(data))
+
+    def bulk_insert(self, rows, *args, **kwargs):
+        return self._write(lambda: self.table.bulk_insert(rows, *args, **kwargs))
+
+    def bulk_upsert(self, rows, *args, **kwargs):
+        return self._write(lambda: self.table.bulk_upsert(rows, *args, **kwargs))
+
+    def update(self, data):
+        return _InvalidatingQuery(self, self.table.update(data))
+
+    def delete(self):
+        return _InvalidatingQuery(self, self.table.delete())
+
+    def __getattr__(self, name):
+        return getattr(self.table, name)
+
+    def _write(self, write):
+        try:
+            return write()
+        finally:
+            self.cache.invalidate(self.table_name)
+
+
+class _Builder:
+    """Forwards query builder calls to the wrapped query, returning itself where the query would"""
+
+    def __init__(self, query):
+        self._query = query
+
+    def __getattr__(self, name):
+        attr = getattr(self._query, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if result is self._query:
+                self._record(name, args, kwargs)
+                return self
+            return result
+        return call
+
+    def _record(self, name, args, kwargs):
+        pass
+
+
+class _CachedQuery(_Builder):
+    def __init__(self, table: CachedSupabaseTable, query, key: Tuple):
+        super().__init__(query)
+        self._table = table
+        self._key = key
+
+    def _record(self, name, args, kwargs):
+        self._key += (_BUILDER, name, _freeze(args), _freeze(kwargs))
+
+    def execute(self):
+        return self._table.cache.read(self._table.table_name, self._key + ("execute",), self._query.execute)
+
+    def execute_all(self):
+        return self._table.cache.read(self._table.table_name, self._key + ("execute_all",), self._query.execute_all)
+
+
+class _InvalidatingQuery(_Builder):
+    def __init__(self, table: CachedSupabaseTable, query):
+        super().__init__(query)
+        self._table = table
+
+    def execute(self):
+        return self._table._write(self._query.execute)
+
+
+def parse_ttls(text: Optional[str]) -> Optional[Dict[str, float]]:
+    """
+    Read per-table TTLs written as ``table=seconds,table=seconds``
+
+    None keeps the defaults; an empty string or "off" turns caching off.
+    """
+    if text is None:
+        return None
+    ttls = {}
+    for item in text.split(","):
+        if "=" in item:
+            table, seconds = item.split("=", 1)
+            ttls[table.strip()] = float(seconds)
+    return ttls
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
@@ -1,112 +1,441 @@
 import os
+import json
+import atexit
+import logging
 import requests
+from requests.adapters import HTTPAdapter
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
 from functools import lru_cache
 from dotenv import load_dotenv
 
+from supabase_cache import CachedSupabaseClient, DEFAULT_MAX_ENTRIES, parse_ttls
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Rows per page; keep it at or below the PostgREST max-rows setting (1000 on Supabase) or pages come back short
+DEFAULT_PAGE_SIZE = 1000
+# Keep-alive connections a client holds open to Supabase, at least the page concurrency
+DEFAULT_POOL_SIZE = 10
+# Rows per POST of a bulk write, and chunks in flight at once
+DEFAULT_WRITE_CHUNK_SIZE = 500
+DEFAULT_WRITE_CONCURRENCY = 4
+
+# Calls and bytes of the unit of work in progress (one Flask request, say); see track_calls
+_call_stats: ContextVar = ContextVar("supabase_call_stats", default=None)
+# Callables given (method, status_code, bytes_sent, bytes_received) after every pooled request
+call_observers = []
+
+def start_call_tracking():
+    """Start counting Supabase requests in this context; returns the stats dict and a token for stop_call_tracking"""
+    stats = {"calls": 0, "bytes_sent": 0, "bytes_received": 0}
+    return stats, _call_stats.set(stats)
+
+def stop_call_tracking(token):
+    _call_stats.reset(token)
+
+@contextmanager
+def track_calls():
+    """Count the Supabase requests made inside the block, including those made by its worker threads"""
+    stats, token = start_call_tracking()
+    try:
+        yield stats
+    finally:
+        stop_call_tracking(token)
+
+def submit_in_context(executor, fn, *args):
+    """executor.submit that runs ``fn`` in a copy of the caller's context, so its calls are tracked"""
+    return executor.submit(copy_context().run, fn, *args)
+
+def _record_call(response, *args, **kwargs):
+    sent = len(response.request.body or b"")
+    received = len(response.content or b"")
+    stats = _call_stats.get()
+    if stats is not None:
+        stats["calls"] += 1
+        stats["bytes_sent"] += sent
+        stats["bytes_received"] += received
+    for observer in call_observers:
+        observer(response.request.method, response.status_code, sent, received)
+
 # HTTP-based Supabase client using REST API
 class HttpSupabaseTable:
-    def __init__(self, table_name, base_url, headers):
+    def __init__(self, table_name, base_url, headers, page_size=DEFAULT_PAGE_SIZE, page_concurrency=1, session=None,
+                 write_chunk_size=DEFAULT_WRITE_CHUNK_SIZE, write_concurrency=DEFAULT_WRITE_CONCURRENCY):
         self.table_name = table_name
         self.base_url = base_url
         self.headers = headers
+        self.page_size = page_size
+        self.page_concurrency = page_concurrency
+        self.write_chunk_size = write_chunk_size
+        self.write_concurrency = write_concurrency
+        # Without a client session every call opens its own connection
+        self.session = session or requests
     
-    def select(self, columns="*", count=None):
-        try:
-            url = f"{self.base_url}/rest/v1/{self.table_name}"
-            params = {"select": columns}
-            if count == "exact":
-                self.headers["Prefer"] = "count=exact"
-            
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            response_count = None
-            if count == "exact":
-                response_count = int(response.headers.get("Content-Range", "0").split("/")[-1])
-            
-            return HttpSupabaseResponse(data, response_count)
-        except Exception as e:
-            print(f"Error fetching from {self.table_name}: {e}")
-            print(f"Error type: {type(e)}")
-            print(f"URL was: {url}")
-            return HttpSupabaseResponse([], 0)
+    def select(self, columns="*", count=None, head=False):
+        return HttpSupabaseQuery(self, columns, count, head)
+    
+    def select_all(self, columns="*", count=None):
+        """Like select, but reads the table page by page so no single response holds it all"""
+        return self.select(columns, count).execute_all()
+    
+    def pages(self, columns="*", page_size=None, concurrency=None, key="id"):
+        return self.select(columns).pages(page_size, concurrency, key)
     
     def insert(self, data):
         try:
             url = f"{self.base_url}/rest/v1/{self.table_name}"
-            print(f"INSERT URL: {url}")
-            print(f"INSERT DATA: {data}")
-            print(f"INSERT HEADERS: {self.headers}")
+            logger.debug("INSERT URL: %s", url)
+            logger.debug("INSERT DATA: %s", data)
+            logger.debug("INSERT HEADERS: %s", self.headers)
             
-            response = requests.post(url, headers=self.headers, json=data)
-            print(f"INSERT RESPONSE STATUS: {response.status_code}")
-            print(f"INSERT RESPONSE HEADERS: {dict(response.headers)}")
-            print(f"INSERT RESPONSE CONTENT: {response.text}")
+            response = self.session.post(url, headers=self.headers, json=data)
+            logger.debug("INSERT RESPONSE STATUS: %s", response.status_code)
+            logger.debug("INSERT RESPONSE HEADERS: %s", dict(response.headers))
+            logger.debug("INSERT RESPONSE CONTENT: %s", response.text)
             
             response.raise_for_status()
             result_data = response.json() if response.content else []
-            print(f"INSERT RESULT DATA: {result_data}")
+            logger.debug("INSERT RESULT DATA: %s", result_data)
             return HttpSupabaseResponse(result_data, None)
         except requests.exceptions.HTTPError as e:
-            print(f"HTTP Error inserting into {self.table_name}: {e}")
-            print(f"Response status: {response.status_code}")
-            print(f"Response text: {response.text}")
+            logger.error("HTTP Error inserting into %s: %s", self.table_name, e)
+            logger.debug("Response status: %s", response.status_code)
+            logger.debug("Response text: %s", response.text)
             return HttpSupabaseResponse([], None)
         except Exception as e:
-            print(f"Error inserting into {self.table_name}: {e}")
-            print(f"Error type: {type(e)}")
+            logger.error("Error inserting into %s: %s", self.table_name, e)
+            logger.error("Error type: %s", type(e))
             return HttpSupabaseResponse([], None)
     
+    def bulk_insert(self, rows, chunk_size=None, concurrency=None, returning="minimal"):
+        """Insert rows in chunks; see bulk_upsert"""
+        return self._bulk_write(rows, None, chunk_size, concurrency, returning)
+    
+    def bulk_upsert(self, rows, on_conflict, chunk_size=None, concurrency=None, returning="minimal"):
+        """
+        Insert rows in chunks, merging rows that clash on the ``on_conflict`` columns
+        
+        Chunks of ``chunk_size`` rows are posted ``concurrency`` at a time. With
+        ``returning="minimal"`` PostgREST does not echo the rows back. A failed
+        chunk does not stop the others: the response counts the rows written
+        and lists every failed chunk in ``errors``.
+        """
+        return self._bulk_write(rows, on_conflict, chunk_size, concurrency, returning)
+    
+    def _bulk_write(self, rows, on_conflict, chunk_size, concurrency, returning):
+        chunk_size = chunk_size or self.write_chunk_size
+        concurrency = concurrency or self.write_concurrency
+        url = f"{self.base_url}/rest/v1/{self.table_name}"
+        headers = dict(self.headers)
+        prefer = [f"return={returning}"]
+        params = {}
+        if on_conflict:
+            prefer.append("resolution=merge-duplicates")
+            params["on_conflict"] = on_conflict
+        headers["Prefer"] = ",".join(prefer)
+        
+        def write(start):
+            chunk = rows[start:start + chunk_size]
+            try:
+                response = self.session.post(url, headers=headers, params=params, json=chunk)
+                response.raise_for_status()
+                return start, len(chunk), response.json() if response.content else [], None
+            except requests.exceptions.HTTPError as e:
+                return start, len(chunk), [], f"{e}: {response.text[:500]}"
+            except Exception as e:
+                return start, len(chunk), [], str(e)
+        
+        data, written, errors = [], 0, []
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            futures = [submit_in_context(executor, write, start) for start in range(0, len(rows), chunk_size)]
+            for start, size, chunk_data, error in (future.result() for future in futures):
+                if error is None:
+                    written += size
+                    data.extend(chunk_data)
+                else:
+                    errors.append({"start": start, "rows": size, "error": error})
+                    logger.error("Error writing rows %s-%s to %s: %s", start, start + size - 1, self.table_name, error)
+        return HttpSupabaseResponse(data, written, errors)
+    
+    def update(self, data):
+        return HttpSupabaseUpdateQuery(self.table_name, self.base_url, self.headers, self.session, data)
+    
     def delete(self):
-        return HttpSupabaseDeleteQuery(self.table_name, self.base_url, self.headers)
+        return HttpSupabaseDeleteQuery(self.table_name, self.base_url, self.headers, self.session)
+
+class HttpSupabaseFilters:
+    """PostgREST row filters shared by select, update and delete queries; each call adds one condition"""
+    
+    def _add_filter(self, column, operator, value):
+        self.conditions.append((column, f"{operator}.{_postgrest_value(value)}"))
+        return self
+    
+    def eq(self, column, value):
+        return self._add_filter(column, "eq", value)
+    
+    def neq(self, column, value):
+        return self._add_filter(column, "neq", value)
+    
+    def gt(self, column, value):
+        return self._add_filter(column, "gt", value)
+    
+    def gte(self, column, value):
+        return self._add_filter(column, "gte", value)
+    
+    def lt(self, column, value):
+        return self._add_filter(column, "lt", value)
+    
+    def lte(self, column, value):
+        return self._add_filter(column, "lte", value)
+    
+    def in_(self, column, values):
+        quoted = ",".join(_postgrest_value(v, quote=True) for v in values)
+        self.conditions.append((column, f"in.({quoted})"))
+        return self
+
+class HttpSupabaseQuery(HttpSupabaseFilters):
+    """
+    Lazy select on a table, sent as a single GET when executed
+    
+    Filters, ordering, limits and the column projection become PostgREST
+    query parameters, so only the matching rows leave the database. With
+    ``head`` the request is a HEAD and only the count comes back.
+    """
+    
+    def __init__(self, table, columns="*", count=None, head=False):
+        self.table = table
+        self.columns = columns
+        self.count = count
+        self.head = head
+        self.conditions = []
+        self.ordering = []
+        self.row_limit = None
+        self.row_offset = None
+    
+    def order(self, column, desc=False):
+        self.ordering.append(f"{column}.{'desc' if desc else 'asc'}")
+        return self
+    
+    def limit(self, count):
+        self.row_limit = count
+        return self
+    
+    def range(self, start, end):
+        """Rows ``start`` to ``end`` inclusive, counted from 0"""
+        self.row_offset = start
+        self.row_limit = end - start + 1
+        return self
+    
+    def params(self):
+        params = [("select", self.columns)] + list(self.conditions)
+        if self.ordering:
+            params.append(("order", ",".join(self.ordering)))
+        if self.row_limit is not None:
+            params.append(("limit", self.row_limit))
+        if self.row_offset:
+            params.append(("offset", self.row_offset))
+        return params
+    
+    def execute(self):
+        if self.head:
+            return self._execute_head()
+        try:
+            data, response_count = self._get(self.params(), self.count == "exact")
+            return HttpSupabaseResponse(data, response_count)
+        except Exception as e:
+            logger.error("Error fetching from %s: %s", self.table.table_name, e)
+            logger.error("Error type: %s", type(e))
+            logger.debug("Query was: %s", self.params())
+            # No count: callers such as table_version must not mistake an outage for an empty table
+            return HttpSupabaseResponse([], None)
+    
+    def execute_all(self):
+        """Like execute, but reads the matching rows page by page"""
+        if self.head:
+            return self._execute_head()
+        try:
+            rows = []
+            for page in self.pages():
+                rows.extend(page)
+            return HttpSupabaseResponse(rows, len(rows) if self.count == "exact" else None)
+        except Exception as e:
+            logger.error("Error paging through %s: %s", self.table.table_name, e)
+            return HttpSupabaseResponse([], None)
+    
+    def pages(self, page_size=None, concurrency=None, key="id"):
+        """
+        Yield the matching rows in pages ordered by ``key``
+        
+        One request at a time pages by keyset (``key=gt.<last key>``), which
+        stays fast deep into the table. With ``concurrency`` above 1 the row
+        count is read with the first page and the remaining pages are fetched
+        by offset, that many at a time, and still yielded in order; rows
+        written meanwhile can then shift between pages.
+        """
+        if self.ordering or self.row_limit is not None or self.row_offset:
+            raise ValueError("pages() orders by its key and cannot be combined with order, limit or range")
+        page_size = page_size or self.table.page_size
+        concurrency = concurrency or self.table.page_concurrency
+        columns = self.columns
+        if columns != "*" and key not in [c.strip() for c in columns.split(",")]:
+            columns = f"{columns},{key}"
+        params = [("select", columns)] + list(self.conditions) + [("order", f"{key}.asc"), ("limit", page_size)]
+        
+        if concurrency <= 1:
+            last = None
+            while True:
+                page_params = params if last is None else params + [(key, f"gt.{_postgrest_value(last)}")]
+                rows, _ = self._get(page_params)
+                if rows:
+                    yield rows
+                if len(rows) < page_size:
+                    return
+                last = rows[-1][key]
+        
+        rows, total = self._get(params + [("offset", 0)], count=True)
+        if rows:
+            yield rows
+        offsets = iter(range(page_size, total if total is not None else 0, page_size))
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = deque()
+            for offset in offsets:
+                pending.append(submit_in_context(executor, self._get, params + [("offset", offset)]))
+                if len(pending) == concurrency:
+                    break
+            while pending:
+                rows, _ = pending.popleft().result()
+                offset = next(offsets, None)
+                if offset is not None:
+                    pending.append(submit_in_context(executor, self._get, params + [("offset", offset)]))
+                if rows:
+                    yield rows
+    
+    def _execute_head(self):
+        try:
+            _, response_count = self._get(self.params(), self.count == "exact", method="head")
+            return HttpSupabaseResponse([], response_count)
+        except Exception as e:
+            logger.error("Error counting %s: %s", self.table.table_name, e)
+            return HttpSupabaseResponse([], None)
+    
+    def _get(self, params, count=False, method="get"):
+        table = self.table
+        url = f"{table.base_url}/rest/v1/{table.table_name}"
+        headers = dict(table.headers)
+        if count:
+            headers["Prefer"] = "count=exact"
+        response = getattr(table.session, method)(url, headers=headers, params=params)
+        response.raise_for_status()
+        total = None
+        if count:
+            content_range = response.headers.get("Content-Range", "")
+            if content_range.split("/")[-1].isdigit():
+                total = int(content_range.split("/")[-1])
+        return (response.json() if method == "get" else []), total
 
-class HttpSupabaseDeleteQuery:
-    def __init__(self, table_name, base_url, headers):
+class HttpSupabaseUpdateQuery(HttpSupabaseFilters):
+    def __init__(self, table_name, base_url, headers, session, data):
         self.table_name = table_name
         self.base_url = base_url
         self.headers = headers
+        self.session = session or requests
+        self.data = data
         self.conditions = []
     
-    def neq(self, column, value):
-        self.conditions.append(f"{column}=neq.{value}")
-        return self
+    def execute(self):
+        try:
+            url = f"{self.base_url}/rest/v1/{self.table_name}"
+            response = self.session.patch(url, headers=self.headers, params=self.conditions, json=self.data)
+            response.raise_for_status()
+            return HttpSupabaseResponse(response.json() if response.content else [], None)
+        except Exception as e:
+            logger.error("Error updating %s: %s", self.table_name, e)
+            return HttpSupabaseResponse([], None)
+
+class HttpSupabaseDeleteQuery(HttpSupabaseFilters):
+    def __init__(self, table_name, base_url, headers, session=None):
+        self.table_name = table_name
+        self.base_url = base_url
+        self.headers = headers
+        self.session = session or requests
+        self.conditions = []
     
     def execute(self):
         try:
             url = f"{self.base_url}/rest/v1/{self.table_name}"
-            if self.conditions:
-                url += "?" + "&".join(self.conditions)
-            response = requests.delete(url, headers=self.headers)
+            response = self.session.delete(url, headers=self.headers, params=self.conditions)
             response.raise_for_status()
             return HttpSupabaseResponse([], None)
         except Exception as e:
-            print(f"Error deleting from {self.table_name}: {e}")
+            logger.error("Error deleting from %s: %s", self.table_name, e)
             return HttpSupabaseResponse([], None)
 
+def _postgrest_value(value, quote=False):
+    """Format a filter value the way PostgREST parses it; inside in.(...) lists reserved characters need quotes"""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    text = str(value)
+    if quote and any(c in text for c in ',()"\\ '):
+        text = '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    return text
+
 class HttpSupabaseResponse:
-    def __init__(self, data, count=None):
+    def __init__(self, data, count=None, errors=None):
         self.data = data
         self.count = count
+        # Failed chunks of a bulk write: {"start", "rows", "error"}
+        self.errors = errors or []
     
     def execute(self):
         return self
 
 class HttpSupabaseClient:
-    def __init__(self, base_url, headers):
+    def __init__(self, base_url, headers, page_size=DEFAULT_PAGE_SIZE, page_concurrency=1, pool_size=DEFAULT_POOL_SIZE,
+                 write_chunk_size=DEFAULT_WRITE_CHUNK_SIZE, write_concurrency=DEFAULT_WRITE_CONCURRENCY):
         self.base_url = base_url
         self.headers = headers
+        self.page_size = page_size
+        self.page_concurrency = page_concurrency
+        self.write_chunk_size = write_chunk_size
+        self.write_concurrency = write_concurrency
+        # One keep-alive pool for every table handed out; urllib3 pools are thread-safe
+        # and requests never sets cookies on PostgREST calls, so threads share the session
+        self.session = requests.Session()
+        self.session.hooks["response"].append(_record_call)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, page_concurrency, write_concurrency))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
     
     def table(self, table_name):
-        return HttpSupabaseTable(table_name, self.base_url, self.headers.copy())
+        return HttpSupabaseTable(table_name, self.base_url, self.headers.copy(), self.page_size, self.page_concurrency, self.session,
+                                 self.write_chunk_size, self.write_concurrency)
+    
+    def close(self):
+        """Close the pooled connections"""
+        self.session.close()
+    
+    def after_fork(self):
+        """Drop the connections inherited from the parent process; the pool reconnects on the next request"""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
 
 # Mock Supabase client for testing purposes
 class MockSupabaseTable:
-    def __init__(self, table_name):
+    def __init__(self, table_name, rows=None):
         self.table_name = table_name
-        self.mock_data = self._get_mock_data()
+        self.mock_data = rows if rows is not None else self._get_mock_data()
     
     def _get_mock_data(self):
         if self.table_name == "students":
@@ -129,38 +458,199 @@ class MockSupabaseTable:
             ]
         return []
     
-    def select(self, columns="*", count=None):
-        return MockSupabaseResponse(self.mock_data, len(self.mock_data) if count == "exact" else None)
+    def select(self, columns="*", count=None, head=False):
+        return MockSupabaseQuery(self.mock_data, columns, count, head)
+    
+    def select_all(self, columns="*", count=None):
+        return self.select(columns, count).execute_all()
+    
+    def pages(self, columns="*", page_size=None, concurrency=None, key="id"):
+        return self.select(columns).pages(page_size, concurrency, key)
     
     def insert(self, data):
-        print(f"Mock insert into {self.table_name}: {data}")
+        logger.debug("Mock insert into %s: %s", self.table_name, data)
         return MockSupabaseResponse([], None)
     
+    def bulk_insert(self, rows, chunk_size=None, concurrency=None, returning="minimal"):
+        return self.bulk_upsert(rows, None, chunk_size, concurrency, returning)
+    
+    def bulk_upsert(self, rows, on_conflict, chunk_size=None, concurrency=None, returning="minimal"):
+        """Store the rows, replacing fields of existing rows that match on the ``on_conflict`` columns"""
+        keys = [c.strip() for c in on_conflict.split(",")] if on_conflict else []
+        existing = {tuple(str(r.get(k)) for k in keys): r for r in self.mock_data} if keys else {}
+        for row in rows:
+            key = tuple(str(row.get(k)) for k in keys)
+            if keys and key in existing:
+                existing[key].update(row)
+            else:
+                self.mock_data.append(dict(row))
+                if keys:
+                    existing[key] = self.mock_data[-1]
+        logger.debug("Mock bulk write of %s rows into %s", len(rows), self.table_name)
+        return MockSupabaseResponse(list(rows) if returning == "representation" else [], len(rows))
+    
+    def update(self, data):
+        return MockSupabaseUpdateQuery(self.mock_data, data)
+    
     def delete(self):
         return MockSupabaseDeleteQuery()
 
-class MockSupabaseDeleteQuery:
+class MockSupabaseFilters:
+    """The filters of HttpSupabaseFilters, evaluated in Python on the mock rows"""
+    
+    def _add_filter(self, column, test):
+        self.conditions.append(lambda row: test(row.get(column)))
+        return self
+    
+    def eq(self, column, value):
+        return self._add_filter(column, lambda v: _mock_compare(v, value) == 0)
+    
     def neq(self, column, value):
+        return self._add_filter(column, lambda v: _mock_compare(v, value) != 0)
+    
+    def gt(self, column, value):
+        return self._add_filter(column, lambda v: _mock_compare(v, value) == 1)
+    
+    def gte(self, column, value):
+        return self._add_filter(column, lambda v: _mock_compare(v, value) in (0, 1))
+    
+    def lt(self, column, value):
+        return self._add_filter(column, lambda v: _mock_compare(v, value) == -1)
+    
+    def lte(self, column, value):
+        return self._add_filter(column, lambda v: _mock_compare(v, value) in (-1, 0))
+    
+    def in_(self, column, values):
+        values = list(values)
+        return self._add_filter(column, lambda v: any(_mock_compare(v, value) == 0 for value in values))
+    
+    def _matching(self, rows):
+        return [row for row in rows if all(condition(row) for condition in self.conditions)]
+
+class MockSupabaseQuery(MockSupabaseFilters):
+    def __init__(self, rows, columns="*", count=None, head=False):
+        self.rows = rows
+        self.columns = columns
+        self.count = count
+        self.head = head
+        self.conditions = []
+        self.ordering = []
+        self.row_limit = None
+        self.row_offset = 0
+    
+    def order(self, column, desc=False):
+        self.ordering.append((column, desc))
+        return self
+    
+    def limit(self, count):
+        self.row_limit = count
+        return self
+    
+    def range(self, start, end):
+        self.row_offset = start
+        self.row_limit = end - start + 1
         return self
     
     def execute(self):
-        print("Mock delete executed")
+        rows = self._matching(self.rows)
+        total = len(rows)
+        for column, desc in reversed(self.ordering):
+            # PostgREST puts nulls last ascending and first descending
+            rows = sorted(rows, key=lambda r: (r.get(column) is None, _mock_sort_key(r.get(column))), reverse=desc)
+        end = None if self.row_limit is None else self.row_offset + self.row_limit
+        rows = [] if self.head else [self._project(row) for row in rows[self.row_offset:end]]
+        return MockSupabaseResponse(rows, total if self.count == "exact" else None)
+    
+    def execute_all(self):
+        return self.execute()
+    
+    def pages(self, page_size=None, concurrency=None, key="id"):
+        rows = self._matching(self.rows)
+        page_size = page_size or DEFAULT_PAGE_SIZE
+        for start in range(0, len(rows), page_size):
+            yield [self._project(row) for row in rows[start:start + page_size]]
+    
+    def _project(self, row):
+        if self.columns == "*":
+            return row
+        return {c.strip(): row.get(c.strip()) for c in self.columns.split(",")}
+
+class MockSupabaseUpdateQuery(MockSupabaseFilters):
+    def __init__(self, rows, data):
+        self.rows = rows
+        self.data = data
+        self.conditions = []
+    
+    def execute(self):
+        updated = self._matching(self.rows)
+        for row in updated:
+            row.update(self.data)
+        logger.debug("Mock update of %s rows: %s", len(updated), self.data)
+        return MockSupabaseResponse(updated, None)
+
+class MockSupabaseDeleteQuery(MockSupabaseFilters):
+    def __init__(self):
+        self.conditions = []
+    
+    def execute(self):
+        logger.debug("Mock delete executed")
         return MockSupabaseResponse([], None)
 
+def _mock_sort_key(value):
+    return (0, value, "") if isinstance(value, (int, float)) and not isinstance(value, bool) else (1, 0, str(value))
+
+def _mock_compare(row_value, value):
+    """Compare like PostgREST does once the filter value has been cast to the column type: -1, 0, 1, or None for null"""
+    if row_value is None or value is None:
+        return None
+    if isinstance(row_value, (int, float)) and not isinstance(row_value, bool):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+    else:
+        row_value, value = _postgrest_value(row_value), _postgrest_value(value)
+    return (row_value > value) - (row_value < value)
+
 class MockSupabaseResponse:
-    def __init__(self, data, count=None):
+    def __init__(self, data, count=None, errors=None):
         self.data = data
         self.count = count
+        self.errors = errors or []
     
     def execute(self):
         return self
 
 class MockSupabaseClient:
+    def __init__(self, tables=None):
+        # Optional rows per table name; tables left out serve the built-in sample rows
+        self.tables = tables or {}
+    
     def table(self, table_name):
-        return MockSupabaseTable(table_name)
+        return MockSupabaseTable(table_name, self.tables.get(table_name))
 
 @lru_cache(maxsize=1)
 def get_supabase():
+    client = _create_client()
+    # Per-table TTLs as "internships=30,students=10"; empty or "off" turns the read cache off
+    ttls = parse_ttls(os.getenv("SUPABASE_CACHE_TTLS"))
+    if ttls is None or ttls:
+        client = CachedSupabaseClient(client, ttls, int(os.getenv("SUPABASE_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)))
+    return client
+
+def _create_client():
+    # A local SQLite database takes precedence over credentials, so load tests never reach Supabase
+    local_db = os.getenv("SUPABASE_LOCAL_DB")
+    if local_db:
+        from supabase_local import LocalSupabaseClient
+        logger.info("Using local Supabase database %s", local_db)
+        client = LocalSupabaseClient(local_db)
+        data_file = os.getenv("MOCK_SUPABASE_DATA")
+        if data_file and client.is_empty():
+            with open(data_file) as f:
+                client.load(json.load(f))
+        return client
+
     url = os.getenv("SUPABASE_URL")
     key = (
         os.getenv("SUPABASE_SERVICE_ROLE_KEY")
@@ -175,9 +665,24 @@ def get_supabase():
             "Content-Type": "application/json",
             "Prefer": "return=representation"
         }
-        print(f"Using HTTP Supabase client for {url}")
-        return HttpSupabaseClient(url, headers)
+        logger.info("Using HTTP Supabase client for %s", url)
+        client = HttpSupabaseClient(
+            url,
+            headers,
+            page_size=int(os.getenv("SUPABASE_PAGE_SIZE", DEFAULT_PAGE_SIZE)),
+            page_concurrency=int(os.getenv("SUPABASE_PAGE_CONCURRENCY", 1)),
+            pool_size=int(os.getenv("SUPABASE_POOL_SIZE", DEFAULT_POOL_SIZE)),
+            write_chunk_size=int(os.getenv("SUPABASE_WRITE_CHUNK_SIZE", DEFAULT_WRITE_CHUNK_SIZE)),
+            write_concurrency=int(os.getenv("SUPABASE_WRITE_CONCURRENCY", DEFAULT_WRITE_CONCURRENCY)),
+        )
+        atexit.register(client.close)
+        return client
     
-    # Fallback to mock client
-    print("Using mock Supabase client - no credentials found")
+    # Fallback to mock client, optionally seeded from a JSON file of {table: rows}
+    data_file = os.getenv("MOCK_SUPABASE_DATA")
+    if data_file:
+        logger.info("Using mock Supabase client with data from %s", data_file)
+        with open(data_file) as f:
+            return MockSupabaseClient(json.load(f))
+    logger.info("Using mock Supabase client - no credentials found")
     return MockSupabaseClient()
@@ -0,0 +1,640 @@
+#!/usr/bin/env python3
+"""
+SQLite stand-in for the Supabase REST API, for running the app and its load tests offline
+
+    SUPABASE_LOCAL_DB=local.db python app.py
+    python supabase_local.py local.db --students 100000
+
+Set SUPABASE_LOCAL_DB to a file (or ":memory:") and get_supabase() serves
+every table from SQLite instead of PostgREST. The tables are created from
+the SQL files in supabase/migrations; run as a script to seed a database
+with a synthetic cohort from benchmark_allocation.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from supabase_client import DEFAULT_PAGE_SIZE, HttpSupabaseResponse
+
+logger = logging.getLogger(__name__)
+
+# Migrations the tables are created from, applied in file name order
+DEFAULT_MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "supabase", "migrations")
+# Rows per transaction of a bulk write; one failed chunk does not undo the others
+DEFAULT_WRITE_CHUNK_SIZE = 5000
+# JSON object column holding the fields a row has beyond the migration schema
+EXTRA_COLUMN = "_extra"
+
+_IDENTIFIER = re.compile(r"\w+")
+_SQLITE_TYPES = {"text": "TEXT", "integer": "INTEGER", "real": "REAL", "boolean": "INTEGER", "json": "TEXT"}
+
+
+class LocalColumn:
+    def __init__(self, name: str, kind: str, default: Any = None, primary_key: bool = False):
+        self.name = name
+        self.kind = kind  # text, integer, real, boolean or json
+        self.default = default  # a literal, or "uuid" / "now" for gen_random_uuid() / now()
+        self.primary_key = primary_key
+
+    def default_value(self, now: str) -> Any:
+        """The default for a new row; ``now`` is the statement's timestamp, as now() is in Postgres"""
+        if self.default == "uuid":
+            return str(uuid.uuid4())
+        if self.default == "now":
+            return now
+        return self.default
+
+
+class LocalTableSchema:
+    def __init__(self, name: str):
+        self.name = name
+        self.columns: Dict[str, LocalColumn] = {}
+        self.unique: List[Tuple[str, ...]] = []
+        # Tables with an update_updated_at_column trigger get updated_at set on every update
+        self.touch_updated_at = False
+
+    def create_sql(self) -> str:
+        columns = [f'"{c.name}" {_SQLITE_TYPES[c.kind]}{" PRIMARY KEY" if c.primary_key else ""}' for c in self.columns.values()]
+        columns.append(f'"{EXTRA_COLUMN}" TEXT')
+        columns += ["UNIQUE (" + ", ".join(f'"{c}"' for c in unique) + ")" for unique in self.unique]
+        return f'CREATE TABLE IF NOT EXISTS "{self.name}" ({", ".join(columns)})'
+
+
+def load_schema(migrations_dir: str = DEFAULT_MIGRATIONS_DIR) -> Dict[str, LocalTableSchema]:
+    """
+    Read the public tables of the migrations: columns, types, defaults, primary and unique keys
+
+    CREATE TABLE, ALTER TABLE ... ADD COLUMN, CREATE UNIQUE INDEX and the
+    updated_at triggers are understood; row level security, CHECK, NOT NULL
+    and foreign keys are not enforced, so partial fixture rows still load.
+    """
+    tables: Dict[str, LocalTableSchema] = {}
+    for name in sorted(os.listdir(migrations_dir)):
+        if not name.endswith(".sql"):
+            continue
+        with open(os.path.join(migrations_dir, name)) as f:
+            sql = re.sub(r"--[^\n]*", "", f.read())
+
+        for match in re.finditer(r"CREATE TABLE (?:IF NOT EXISTS )?(?:public\.)?(\w+)\s*\(", sql, re.IGNORECASE):
+            table = tables.setdefault(match.group(1), LocalTableSchema(match.group(1)))
+            for definition in _split_top_level(_balanced(sql, match.end() - 1)):
+                _add_definition(table, definition)
+        for match in re.finditer(r"ALTER TABLE (?:ONLY )?(?:public\.)?(\w+)\s+ADD COLUMN (?:IF NOT EXISTS )?([^;]+);", sql, re.IGNORECASE):
+            if match.group(1) in tables:
+                _add_definition(tables[match.group(1)], match.group(2))
+        for match in re.finditer(r"CREATE UNIQUE INDEX [^;]*?ON (?:public\.)?(\w+)\s*(?:USING \w+\s*)?\(([^)]*)\)", sql, re.IGNORECASE):
+            if match.group(1) in tables:
+                tables[match.group(1)].unique.append(tuple(c.strip() for c in match.group(2).split(",")))
+        for match in re.finditer(r"BEFORE UPDATE ON (?:public\.)?(\w+)\s+FOR EACH ROW\s+EXECUTE (?:FUNCTION|PROCEDURE) (?:public\.)?update_updated_at_column", sql, re.IGNORECASE):
+            if match.group(1) in tables:
+                tables[match.group(1)].touch_updated_at = True
+    return tables
+
+
+def _balanced(sql: str, start: int) -> str:
+    """Text inside the parenthesis opening at ``start``"""
+    depth = 0
+    for i in range(start, len(sql)):
+        if sql[i] == "(":
+            depth += 1
+        elif sql[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return sql[start + 1:i]
+    raise ValueError("Unbalanced parenthesis in migration")
+
+
+def _split_top_level(body: str) -> List[str]:
+    parts, depth, current = [], 0, []
+    for char in body:
+        if char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        depth += (char == "(") - (char == ")")
+        current.append(char)
+    parts.append("".join(current).strip())
+    return [part for part in parts if part]
+
+
+def _add_definition(table: LocalTableSchema, definition: str):
+    keys = re.match(r"(?:CONSTRAINT \w+\s+)?(UNIQUE|PRIMARY KEY)\s*\(([^)]*)\)", definition, re.IGNORECASE)
+    if keys:
+        columns = tuple(c.strip() for c in keys.group(2).split(","))
+        if keys.group(1).upper() == "UNIQUE" or len(columns) > 1:
+            table.unique.append(columns)
+        elif columns[0] in table.columns:
+            table.columns[columns[0]].primary_key = True
+        return
+    if re.match(r"(CONSTRAINT|CHECK|FOREIGN KEY|EXCLUDE)\b", definition, re.IGNORECASE):
+        return
+
+    name, sql_type = definition.split(None, 2)[:2]
+    column = LocalColumn(name, _column_kind(sql_type), primary_key=bool(re.search(r"\bPRIMARY KEY\b", definition, re.IGNORECASE)))
+    default = re.search(r"\bDEFAULT\s+('(?:[^']|'')*'|gen_random_uuid\(\)|uuid_generate_v4\(\)|now\(\)|CURRENT_TIMESTAMP|true|false|-?[\d.]+)", definition, re.IGNORECASE)
+    if default:
+        column.default = _default_value(default.group(1), column.kind)
+    table.columns[name] = column
+    if re.search(r"\bUNIQUE\b", definition, re.IGNORECASE):
+        table.unique.append((name,))
+
+
+def _column_kind(sql_type: str) -> str:
+    sql_type = sql_type.lower()
+    if sql_type.endswith("[]") or sql_type in ("json", "jsonb"):
+        return "json"
+    if sql_type in ("integer", "int", "int4", "int8", "bigint", "smallint", "serial", "bigserial"):
+        return "integer"
+    if sql_type.startswith(("numeric", "decimal", "real", "double", "float")):
+        return "real"
+    if sql_type in ("boolean", "bool"):
+        return "boolean"
+    return "text"
+
+
+def _default_value(literal: str, kind: str) -> Any:
+    lowered = literal.lower()
+    if lowered in ("gen_random_uuid()", "uuid_generate_v4()"):
+        return "uuid"
+    if lowered in ("now()", "current_timestamp"):
+        return "now"
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    if literal.startswith("'"):
+        return literal[1:-1].replace("''", "'")
+    return int(literal) if kind == "integer" else float(literal)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class LocalSupabaseClient:
+    """
+    Supabase client over an embedded SQLite database, with the tables of the migrations
+
+    Queries support the same builder as HttpSupabaseClient (eq, neq, gt, gte,
+    lt, lte, in_, order, limit, range, count and head), bulk inserts and
+    upserts, update and delete, and report failures the same way: reads and
+    single writes log and come back empty, bulk writes list failed chunks.
+    Fields a row has beyond the schema (the app writes org_name, seats and
+    quota_json to internships) are kept in a JSON column and can be
+    filtered on. Rows persist for the life of the client, or in ``path``.
+    One connection serves every thread, guarded by a lock.
+    """
+
+    def __init__(self, path: str = ":memory:", migrations_dir: str = DEFAULT_MIGRATIONS_DIR, page_size: int = DEFAULT_PAGE_SIZE,
+                 write_chunk_size: int = DEFAULT_WRITE_CHUNK_SIZE):
+        self.path = path
+        self.page_size = page_size
+        self.write_chunk_size = write_chunk_size
+        self.schema = load_schema(migrations_dir)
+        self.lock = threading.RLock()
+        self.connection = self._connect()
+        for table in self.schema.values():
+            self.connection.execute(table.create_sql())
+
+    def table(self, table_name):
+        return LocalSupabaseTable(self, table_name)
+
+    def load(self, tables: Dict[str, List[Dict[str, Any]]]) -> Dict[str, int]:
+        """Bulk insert ``{table: rows}``; returns the rows written per table"""
+        return {name: self.table(name).bulk_insert(rows).count for name, rows in tables.items()}
+
+    @contextmanager
+    def transaction(self):
+        """Hold the lock and run the block as one transaction, rolled back if it raises"""
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                yield self.connection
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+
+    def is_empty(self) -> bool:
+        return all(not self.table(name).select("*", count="exact", head=True).execute().count for name in self.schema)
+
+    def close(self):
+        self.connection.close()
+
+    def after_fork(self):
+        """
+        Give this process its own connection; SQLite connections must not be used across a fork
+
+        An in-memory database cannot be reopened, so a forked child keeps its
+        own copy of it: writes in one process are not seen by the others.
+        """
+        self.lock = threading.RLock()
+        if self.path == ":memory:":
+            return
+        self.connection = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        if self.path != ":memory:":
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            # Forked workers share the file; wait out another process's write instead of failing
+            connection.execute("PRAGMA busy_timeout=5000")
+        return connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class LocalSupabaseTable:
+    def __init__(self, client: LocalSupabaseClient, table_name: str):
+        self.client = client
+        self.table_name = table_name
+        self.page_size = client.page_size
+
+    @property
+    def schema(self) -> LocalTableSchema:
+        schema = self.client.schema.get(self.table_name)
+        if schema is None:
+            # PostgREST answers 404 for a table missing from the schema cache
+            raise LookupError(f"Table {self.table_name} is not in the migrations")
+        return schema
+
+    def select(self, columns="*", count=None, head=False):
+        return LocalSupabaseQuery(self, columns, count, head)
+
+    def select_all(self, columns="*", count=None):
+        return self.select(columns, count).execute_all()
+
+    def pages(self, columns="*", page_size=None, concurrency=None, key="id"):
+        return self.select(columns).pages(page_size, concurrency, key)
+
+    def insert(self, data):
+        rows = data if isinstance(data, list) else [data]
+        try:
+            with self.client.transaction():
+                inserted = [self._write_returning(row, None) for row in rows]
+            return HttpSupabaseResponse(inserted, None)
+        except (sqlite3.Error, LookupError, ValueError) as e:
+            logger.error("Error inserting into %s: %s", self.table_name, e)
+            return HttpSupabaseResponse([], None)
+
+    def bulk_insert(self, rows, chunk_size=None, concurrency=None, returning="minimal"):
+        """Insert rows in chunks; see bulk_upsert"""
+        return self._bulk_write(rows, None, chunk_size, returning)
+
+    def bulk_upsert(self, rows, on_conflict, chunk_size=None, concurrency=None, returning="minimal"):
+        """
+        Insert rows in chunks, merging rows that clash on the ``on_conflict`` columns
+
+        Like PostgREST's merge-duplicates, a clashing row gets the fields the
+        new row sends and keeps the rest. ``on_conflict`` must name a primary
+        or unique key. Each chunk is one transaction; ``concurrency`` is
+        accepted for compatibility, as SQLite takes one writer at a time.
+        """
+        return self._bulk_write(rows, on_conflict, chunk_size, returning)
+
+    def update(self, data):
+        return LocalSupabaseUpdateQuery(self, data)
+
+    def delete(self):
+        return LocalSupabaseDeleteQuery(self)
+
+    def _bulk_write(self, rows, on_conflict, chunk_size, returning):
+        chunk_size = chunk_size or self.client.write_chunk_size
+        keys = tuple(c.strip() for c in on_conflict.split(",")) if on_conflict else None
+        data, written, errors = [], 0, []
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            try:
+                with self.client.transaction():
+                    if returning == "representation":
+                        data.extend(self._write_returning(row, keys) for row in chunk)
+                    else:
+                        self._write_many(chunk, keys)
+                written += len(chunk)
+            except (sqlite3.Error, LookupError, ValueError) as e:
+                errors.append({"start": start, "rows": len(chunk), "error": str(e)})
+                logger.error("Error writing rows %s-%s to %s: %s", start, start + len(chunk) - 1, self.table_name, e)
+        return HttpSupabaseResponse(data, written, errors)
+
+    def _write_many(self, rows, keys):
+        # Rows sending the same fields share one statement, so a merge only touches the fields sent
+        by_fields: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for row in rows:
+            by_fields.setdefault(tuple(row), []).append(row)
+        for fields, group in by_fields.items():
+            sql, columns = self._insert_sql(fields, keys)
+            self.client.connection.executemany(sql, self._encode_rows(group, fields, columns))
+
+    def _write_returning(self, row, keys):
+        sql, columns = self._insert_sql(tuple(row), keys)
+        cursor = self.client.connection.execute(sql + " RETURNING *", self._encode_rows([row], tuple(row), columns)[0])
+        return _decode_rows(self.schema, cursor)[0]
+
+    def _insert_sql(self, fields: Tuple[str, ...], keys: Optional[Tuple[str, ...]]) -> Tuple[str, List[str]]:
+        schema = self.schema
+        for field in fields:
+            _check_identifier(field)
+        sent = [c for c in schema.columns if c in fields]
+        # Columns left out get their default, as with Prefer: missing=default
+        columns = sent + [c for c, column in schema.columns.items() if c not in fields and column.default is not None]
+        sql = f'INSERT INTO "{schema.name}" (' + ", ".join(f'"{c}"' for c in columns + [EXTRA_COLUMN]) + ") VALUES (" + ", ".join("?" * (len(columns) + 1)) + ")"
+        if keys:
+            for key in keys:
+                _check_identifier(key)
+            updates = [f'"{c}" = excluded."{c}"' for c in sent if c not in keys]
+            updates.append(f'"{EXTRA_COLUMN}" = CASE WHEN excluded."{EXTRA_COLUMN}" IS NULL THEN "{EXTRA_COLUMN}" '
+                           f'ELSE json_patch(coalesce("{EXTRA_COLUMN}", \'{{}}\'), excluded."{EXTRA_COLUMN}") END')
+            sql += " ON CONFLICT (" + ", ".join(f'"{k}"' for k in keys) + ") DO UPDATE SET " + ", ".join(updates)
+        return sql, columns
+
+    def _encode_rows(self, rows: List[Dict[str, Any]], fields: Tuple[str, ...], columns: List[str]) -> List[List[Any]]:
+        """Parameters of ``rows``, which all send ``fields``, for the columns of _insert_sql"""
+        schema_columns = self.schema.columns
+        now = _now()
+        sent = [(c, schema_columns[c]) for c in columns if c in fields]
+        defaults = [schema_columns[c] for c in columns if c not in fields]
+        extra_fields = [f for f in fields if f not in schema_columns]
+        encoded = []
+        for row in rows:
+            values = [_encode(column, row[name]) for name, column in sent]
+            values += [column.default_value(now) for column in defaults]
+            values.append(json.dumps({f: row[f] for f in extra_fields}) if extra_fields else None)
+            encoded.append(values)
+        return encoded
+
+    def expression(self, column: str) -> str:
+        """SQL for a column, reaching into the JSON column for fields outside the schema"""
+        _check_identifier(column)
+        if column in self.schema.columns:
+            return f'"{column}"'
+        return f"json_extract(\"{EXTRA_COLUMN}\", '$.\"{column}\"')"
+
+
+class LocalSupabaseFilters:
+    """The filters of HttpSupabaseFilters, compiled to a SQL WHERE clause"""
+
+    def _add_filter(self, column, operator, value):
+        self.conditions.append((column, operator, value))
+        return self
+
+    def eq(self, column, value):
+        return self._add_filter(column, "=", value)
+
+    def neq(self, column, value):
+        return self._add_filter(column, "<>", value)
+
+    def gt(self, column, value):
+        return self._add_filter(column, ">", value)
+
+    def gte(self, column, value):
+        return self._add_filter(column, ">=", value)
+
+    def lt(self, column, value):
+        return self._add_filter(column, "<", value)
+
+    def lte(self, column, value):
+        return self._add_filter(column, "<=", value)
+
+    def in_(self, column, values):
+        return self._add_filter(column, "IN", list(values))
+
+    def _where(self) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        for column, operator, value in self.conditions:
+            expression = self.table.expression(column)
+            if operator == "IN":
+                clauses.append(f"{expression} IN ({', '.join('?' * len(value))})" if value else "0")
+                params.extend(_filter_value(v) for v in value)
+            else:
+                # A null filter value matches nothing, as in MockSupabaseFilters
+                clauses.append(f"{expression} {operator} ?")
+                params.append(_filter_value(value))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+class LocalSupabaseQuery(LocalSupabaseFilters):
+    """Lazy select on a table, run as one SQL query when executed; ``head`` returns only the count"""
+
+    def __init__(self, table: LocalSupabaseTable, columns="*", count=None, head=False):
+        self.table = table
+        self.columns = columns
+        self.count = count
+        self.head = head
+        self.conditions = []
+        self.ordering = []
+        self.row_limit = None
+        self.row_offset = None
+
+    def order(self, column, desc=False):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def range(self, start, end):
+        """Rows ``start`` to ``end`` inclusive, counted from 0"""
+        self.row_offset = start
+        self.row_limit = end - start + 1
+        return self
+
+    def execute(self):
+        try:
+            where, params = self._where()
+            with self.table.client.lock:
+                total = None
+                if self.count or self.head:
+                    total = self.table.client.connection.execute(f'SELECT COUNT(*) FROM "{self.table.schema.name}"{where}', params).fetchone()[0]
+                rows = [] if self.head else self._fetch(where, params)
+            return HttpSupabaseResponse(rows, total if self.count else None)
+        except (sqlite3.Error, LookupError, ValueError) as e:
+            logger.error("Error fetching from %s: %s", self.table.table_name, e)
+            return HttpSupabaseResponse([], None)
+
+    def execute_all(self):
+        """Same as execute: a local query has no max-rows cap to page around"""
+        return self.execute()
+
+    def pages(self, page_size=None, concurrency=None, key="id"):
+        """Yield the matching rows in pages ordered by ``key``, fetched by keyset"""
+        if self.ordering or self.row_limit is not None or self.row_offset:
+            raise ValueError("pages() orders by its key and cannot be combined with order, limit or range")
+        page_size = page_size or self.table.page_size
+        columns = self._requested()
+        if columns is not None and key not in columns:
+            columns.append(key)
+        where, params = self._where()
+        key_expression = self.table.expression(key)
+        last = None
+        while True:
+            page_where, page_params = where, params
+            if last is not None:
+                page_where = f"{where} AND {key_expression} > ?" if where else f" WHERE {key_expression} > ?"
+                page_params = params + [last]
+            with self.table.client.lock:
+                rows = self._fetch(page_where, page_params, f" ORDER BY {key_expression} LIMIT {int(page_size)}", columns)
+            if rows:
+                yield rows
+            if len(rows) < page_size:
+                return
+            last = rows[-1][key]
+
+    def _requested(self) -> Optional[List[str]]:
+        """The projected columns, or None for all of them"""
+        return None if self.columns == "*" else [c.strip() for c in self.columns.split(",")]
+
+    def _fetch(self, where, params, tail=None, columns=None):
+        schema = self.table.schema
+        if tail is None:
+            tail = ""
+            if self.ordering:
+                # PostgREST puts nulls last ascending and first descending
+                tail += " ORDER BY " + ", ".join(f"{self.table.expression(c)} {'DESC NULLS FIRST' if desc else 'ASC NULLS LAST'}" for c, desc in self.ordering)
+            if self.row_limit is not None or self.row_offset:
+                tail += f" LIMIT {int(self.row_limit) if self.row_limit is not None else -1} OFFSET {int(self.row_offset or 0)}"
+            columns = self._requested()
+
+        selected = "*"
+        if columns is not None:
+            for column in columns:
+                _check_identifier(column)
+            known = [c for c in dict.fromkeys(columns) if c in schema.columns]
+            if len(known) < len(set(columns)):
+                known.append(EXTRA_COLUMN)
+            selected = ", ".join(f'"{c}"' for c in known)
+        cursor = self.table.client.connection.execute(f'SELECT {selected} FROM "{schema.name}"{where}{tail}', params)
+        rows = _decode_rows(schema, cursor)
+        if columns is None:
+            return rows
+        return [{c: row.get(c) for c in columns} for row in rows]
+
+
+class LocalSupabaseUpdateQuery(LocalSupabaseFilters):
+    def __init__(self, table: LocalSupabaseTable, data):
+        self.table = table
+        self.data = data
+        self.conditions = []
+
+    def execute(self):
+        try:
+            schema = self.table.schema
+            data = dict(self.data)
+            if schema.touch_updated_at and "updated_at" in schema.columns and "updated_at" not in data:
+                data["updated_at"] = _now()
+            assignments, params = [], []
+            for column, value in data.items():
+                if column in schema.columns:
+                    assignments.append(f"{self.table.expression(column)} = ?")
+                    params.append(_encode(schema.columns[column], value))
+            extra = {k: v for k, v in data.items() if k not in schema.columns}
+            if extra:
+                for column in extra:
+                    _check_identifier(column)
+                assignments.append(f'"{EXTRA_COLUMN}" = json_patch(coalesce("{EXTRA_COLUMN}", \'{{}}\'), ?)')
+                params.append(json.dumps(extra))
+            if not assignments:
+                return HttpSupabaseResponse([], None)
+            where, where_params = self._where()
+            with self.table.client.transaction():
+                cursor = self.table.client.connection.execute(f'UPDATE "{schema.name}" SET {", ".join(assignments)}{where} RETURNING *', params + where_params)
+                return HttpSupabaseResponse(_decode_rows(schema, cursor), None)
+        except (sqlite3.Error, LookupError, ValueError) as e:
+            logger.error("Error updating %s: %s", self.table.table_name, e)
+            return HttpSupabaseResponse([], None)
+
+
+class LocalSupabaseDeleteQuery(LocalSupabaseFilters):
+    def __init__(self, table: LocalSupabaseTable):
+        self.table = table
+        self.conditions = []
+
+    def execute(self):
+        try:
+            where, params = self._where()
+            with self.table.client.transaction():
+                self.table.client.connection.execute(f'DELETE FROM "{self.table.schema.name}"{where}', params)
+            return HttpSupabaseResponse([], None)
+        except (sqlite3.Error, LookupError, ValueError) as e:
+            logger.error("Error deleting from %s: %s", self.table.table_name, e)
+            return HttpSupabaseResponse([], None)
+
+
+def _check_identifier(name: str):
+    if not _IDENTIFIER.fullmatch(name or ""):
+        raise ValueError(f"Invalid column name '{name}'")
+
+
+def _encode(column: LocalColumn, value: Any) -> Any:
+    if value is None or (isinstance(value, (str, int, float)) and column.kind != "json" and column.kind != "boolean"):
+        return value
+    if column.kind == "json" or isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if column.kind == "boolean":
+        return int(value in (True, "true", "t", 1))
+    return value
+
+
+def _filter_value(value: Any) -> Any:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def _decode_rows(schema: LocalTableSchema, cursor) -> List[Dict[str, Any]]:
+    """Turn result tuples into PostgREST-shaped dicts, decoding JSON and boolean columns and merging the extra fields"""
+    names = [d[0] for d in cursor.description]
+    converters = [(i, schema.columns[name].kind) for i, name in enumerate(names) if name in schema.columns and schema.columns[name].kind in ("json", "boolean")]
+    extra_index = names.index(EXTRA_COLUMN) if EXTRA_COLUMN in names else None
+    fields = [name for name in names if name != EXTRA_COLUMN]
+    rows = []
+    for values in cursor.fetchall():
+        if converters:
+            values = list(values)
+            for i, kind in converters:
+                if values[i] is not None:
+                    values[i] = json.loads(values[i]) if kind == "json" else bool(values[i])
+        if extra_index is None:
+            rows.append(dict(zip(names, values)))
+            continue
+        row = dict(zip(fields, values[:extra_index] + values[extra_index + 1:]))
+        if values[extra_index]:
+            row.update(json.loads(values[extra_index]))
+        rows.append(row)
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Create a local Supabase database and seed it with a synthetic cohort")
+    parser.add_argument("path", help="SQLite database file")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--internships", type=int, help="defaults to one per 20 students")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from benchmark_allocation import generate_cohort
+
+    students, internships = generate_cohort(args.students, args.internships, args.seed)
+    with LocalSupabaseClient(args.path) as client:
+        start = time.perf_counter()
+        written = client.load({"students": students, "internships": internships})
+        print(f"💾 Loaded {written['students']} students and {written['internships']} internships into {args.path} in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
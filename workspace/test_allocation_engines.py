@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from allocation_fixed import run_allocation
+
+CATEGORIES = ["GEN", "OBC", "SC", "ST", "EWS"]
+SECTORS = ["Technology", "Finance", "Healthcare", "Energy", "Retail"]
+LOCATIONS = ["Delhi", "Mumbai", "Pune", "Chennai"]
+SKILLS = ["Python", "SQL", "Java", "Excel", "React", "ML", "Statistics", "Design", "Sales", "C++"]
+
+
+def _random_cohort(seed, student_count=120, internship_count=15):
+    rng = random.Random(seed)
+    students = []
+    for i in range(student_count):
+        skills = rng.sample(SKILLS, rng.randint(0, 4))
+        students.append({
+            "id": i if rng.random() > 0.03 else max(i - 1, 0),  # a few duplicated ids
+            "name": f"Student {i}",
+            "marks": rng.choice([rng.randint(40, 100), rng.randint(40, 100), "oops", None, "75.5"]),
+            "skills": ", ".join(skills) if rng.random() < 0.5 else [s.lower() for s in skills],
+            "category": rng.choice(CATEGORIES + [None]),
+            "sector_pref": rng.choice(SECTORS + ["", " technology "]),
+            "location_pref": rng.choice(LOCATIONS + [None, " delhi"]),
+        })
+    internships = []
+    for j in range(internship_count):
+        seats = rng.randint(0, 8)
+        internship = {
+            "id": f"int-{j}",
+            "org_name": f"Org {j}",
+            "sector": rng.choice(SECTORS),
+            "required_skills": ",".join(rng.sample(SKILLS, rng.randint(0, 3))),
+            "seats": seats,
+            "location": rng.choice(LOCATIONS),
+        }
+        if rng.random() < 0.5:
+            internship["quota_json"] = {c: rng.randint(0, 3) for c in rng.sample(CATEGORIES, 3)}
+        else:
+            internship.update({f"quota_{c.lower()}": rng.randint(0, 2) for c in CATEGORIES})
+        internships.append(internship)
+    return students, internships
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_vectorized_engine_matches_greedy(seed):
+    students, internships = _random_cohort(seed)
+    assert run_allocation(students, internships, engine="vectorized") == run_allocation(students, internships)
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        run_allocation([], [], engine="quantum")
@@ -0,0 +1,72 @@
+import itertools
+import random
+
+import pytest
+
+from allocation_fixed import run_allocation, allocation_objective
+from allocation_flow import solve_assignment, UNASSIGNED
+from test_allocation_engines import _random_cohort
+
+
+def _brute_force(edges, capacities):
+    best = 0
+    options = [[UNASSIGNED] + [j for j, _ in student_edges] for student_edges in edges]
+    for choice in itertools.product(*options):
+        used = [0] * len(capacities)
+        total = 0
+        for s, j in enumerate(choice):
+            if j != UNASSIGNED:
+                used[j] += 1
+                total += dict(edges[s])[j]
+        if all(u <= c for u, c in zip(used, capacities)):
+            best = max(best, total)
+    return best
+
+
+def test_solve_assignment_is_optimal_on_small_instances():
+    rng = random.Random(1)
+    for _ in range(300):
+        slot_count = rng.randint(1, 4)
+        capacities = [rng.randint(1, 2) for _ in range(slot_count)]
+        edges = [[(j, rng.randint(-3, 20)) for j in rng.sample(range(slot_count), rng.randint(0, slot_count))] for _ in range(rng.randint(1, 6))]
+
+        assignment = solve_assignment(edges, capacities)
+
+        used = [0] * slot_count
+        total = 0
+        for s, j in enumerate(assignment):
+            if j != UNASSIGNED:
+                used[j] += 1
+                total += dict(edges[s])[j]
+        assert all(u <= c for u, c in zip(used, capacities))
+        assert total == _brute_force(edges, capacities)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_optimal_engine_respects_seats_and_quotas(seed):
+    students, internships = _random_cohort(seed, student_count=400, internship_count=30)
+    allocations = run_allocation(students, internships, engine="optimal")
+
+    _assert_respects_seats_and_quotas(students, internships, allocations)
+    assert allocation_objective(allocations) >= allocation_objective(run_allocation(students, internships))
+
+
+def _assert_respects_seats_and_quotas(students, internships, allocations):
+    student_ids = [a["student_id"] for a in allocations]
+    assert len(student_ids) == len(set(student_ids))
+
+    categories = {s["id"]: s["category"] for s in reversed(students)}
+    for internship in internships:
+        placed = [a for a in allocations if a["internship_id"] == internship["id"]]
+        quotas = {c: int(q) for c, q in (internship.get("quota_json") or {}).items() if int(q) > 0}
+        if "quota_json" not in internship:
+            quotas = {c: internship[f"quota_{c.lower()}"] for c in ("GEN", "OBC", "SC", "ST", "EWS") if internship[f"quota_{c.lower()}"] > 0}
+        if internship["seats"] <= 0:
+            assert not placed
+            continue
+        quota_placed = [a for a in placed if a["allocation_type"] == "quota"]
+        for category, count in quotas.items():
+            in_category = [a for a in quota_placed if a["reason"] == f"quota for {category}"]
+            assert len(in_category) <= count
+            assert all(categories[a["student_id"]] == category for a in in_category)
+        assert len(placed) <= max(internship["seats"], len(quota_placed))
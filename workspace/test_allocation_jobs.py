@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import allocation_jobs
+import app as app_module
+from allocation_jobs import AllocationJobRunner
+from supabase_client import MockSupabaseClient
+
+
+@pytest.fixture
+def client(monkeypatch):
+    supabase = MockSupabaseClient({
+        "students": [{"id": i, "name": f"Student {i}", "marks": 60 + i, "category": "GEN", "skills": "python"} for i in range(1, 7)],
+        "internships": [{"id": 1, "org_name": "Tech Corp", "sector": "Technology", "seats": 3, "skills_required": "python"}],
+        "allocations": [],
+    })
+    monkeypatch.setattr(app_module, "get_supabase", lambda: supabase)
+    flask_app = app_module.create_app()
+    test_client = flask_app.test_client()
+    with test_client.session_transaction() as session:
+        session["logged_in"] = True
+    test_client.jobs = flask_app.extensions["allocation_jobs"]
+    return test_client
+
+
+def _poll(client, status_url):
+    for _ in range(200):
+        job = client.get(status_url).json
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError("allocation job did not finish")
+
+
+def test_run_allocation_returns_a_job_to_poll(client):
+    started = client.post("/run_allocation", json={"engine": "vectorized"})
+    assert started.status_code == 202 and started.json["status_url"] == f"/allocation_jobs/{started.json['job_id']}"
+
+    job = _poll(client, started.json["status_url"])
+    assert job["status"] == "succeeded" and job["phase"] == "done" and job["percent"] == 100
+    assert job["result"]["engine"] == "vectorized" and len(job["result"]["allocations"]) == 3
+    assert job["result"]["stats"]["seats_filled_by_category"] == {"open": 3}
+    listed = client.get("/allocation_jobs").json["jobs"]
+    assert [j["job_id"] for j in listed] == [job["job_id"]] and listed[0]["stats"] == job["result"]["stats"]
+    assert client.get("/allocation_jobs/unknown").status_code == 404
+
+
+def test_wait_returns_the_result_directly(client):
+    response = client.post("/run_allocation", json={"wait": True})
+    assert response.status_code == 200 and response.json["message"] == "Allocation complete"
+
+
+def test_concurrent_runs_share_one_job(client, monkeypatch):
+    release = threading.Event()
+    original = app_module.run_allocation_with_stats
+    monkeypatch.setattr(app_module, "run_allocation_with_stats", lambda *args, **kwargs: release.wait(5) and original(*args, **kwargs))
+
+    first = client.post("/run_allocation", json={}).json
+    second = client.post("/run_allocation", json={"engine": "optimal"}).json
+    assert second["job_id"] == first["job_id"] and second["message"] == "Allocation already running"
+    for _ in range(200):
+        if client.get(first["status_url"]).json["phase"] == "allocating":
+            break
+        time.sleep(0.01)
+    assert client.get(first["status_url"]).json["status"] == "running"
+
+    release.set()
+    assert _poll(client, first["status_url"])["status"] == "succeeded"
+    third = client.post("/run_allocation", json={}).json
+    assert third["job_id"] != first["job_id"]
+    _poll(client, third["status_url"])
+
+
+def test_failed_work_finishes_the_job_and_old_jobs_are_forgotten():
+    runner = AllocationJobRunner(kept_jobs=2)
+
+    def broken(progress):
+        progress("fetching", 5)
+        raise RuntimeError("database unreachable")
+
+    job, created = runner.submit("greedy", broken)
+    assert created and job.wait(5)
+    assert job.status == "failed" and job.status_code == 500 and "unreachable" in job.result["message"]
+
+    for _ in range(3):
+        runner.submit("greedy", lambda progress: ({}, 200))[0].wait(5)
+    assert runner.get(job.id) is None and len(runner.jobs()) == 3
+    runner.shutdown()
+
+
+def test_a_job_whose_state_cannot_be_saved_still_finishes(tmp_path, monkeypatch):
+    runner = AllocationJobRunner(state_dir=str(tmp_path))
+
+    def unwritable(job):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(runner, "_save", unwritable)
+    job, created = runner.submit("greedy", lambda progress: ({}, 200))
+    assert created and job.wait(5)
+    assert job.status == "failed" and "No space left" in job.result["message"]
+
+    monkeypatch.undo()
+    follow_up, created = runner.submit("greedy", lambda progress: ({"message": "Allocation complete"}, 200))
+    assert created and follow_up.wait(5) and follow_up.status == "succeeded"
+    runner.shutdown()
+
+
+def test_runners_sharing_a_state_dir_run_one_job_between_them(tmp_path):
+    first, second = AllocationJobRunner(state_dir=str(tmp_path)), AllocationJobRunner(state_dir=str(tmp_path))
+    release = threading.Event()
+
+    def work(progress):
+        progress("allocating", 20)
+        release.wait(5)
+        return {"message": "Allocation complete"}, 200
+
+    job, created = first.submit("greedy", work)
+    elsewhere, started = second.submit("optimal", lambda progress: ({}, 200))
+    assert created and not started and elsewhere.id == job.id and elsewhere.engine == "greedy"
+
+    release.set()
+    assert elsewhere.wait(5) and elsewhere.status == "succeeded" and elsewhere.result == {"message": "Allocation complete"}
+    assert second.get(job.id).status_code == 200 and [j.id for j in second.jobs()] == [job.id]
+    assert second.get("../active") is None
+
+    # Once the first run is over the next one can start in either process
+    job.wait(5)
+    for _ in range(50):
+        follow_up, created = second.submit("greedy", lambda progress: ({}, 200))
+        if created:
+            break
+        time.sleep(0.02)
+    assert created and follow_up.wait(5)
+    first.shutdown()
+    second.shutdown()
+
+
+def test_results_are_stored_apart_and_read_only_when_fetched(tmp_path, monkeypatch):
+    first, second = AllocationJobRunner(state_dir=str(tmp_path)), AllocationJobRunner(state_dir=str(tmp_path))
+    result = {"message": "Allocation complete", "allocations": [{"student_id": str(i)} for i in range(1000)], "stats": {"engine": "greedy"}}
+    job, _ = first.submit("greedy", lambda progress: (result, 200))
+    first.shutdown()  # returns once the finished state is written
+
+    state = json.loads((tmp_path / f"{job.id}.json").read_text())
+    assert "result" not in state and state["stats"] == {"engine": "greedy"} and state["status_code"] == 200
+    reads = []
+    original = allocation_jobs._read_state
+    monkeypatch.setattr(allocation_jobs, "_read_state", lambda path: reads.append(os.path.basename(path)) or original(path))
+    assert [j.to_dict(include_result=False)["stats"] for j in second.jobs()] == [{"engine": "greedy"}]
+    assert reads == [f"{job.id}.json"]
+    assert second.get(job.id).to_dict()["result"] == result and reads[-1] == f"{job.id}.result.json"
+    second.shutdown()
+
+
+def test_waiting_on_another_process_does_not_block_lookups(tmp_path, monkeypatch):
+    runner = AllocationJobRunner(state_dir=str(tmp_path))
+    claiming, release = threading.Event(), threading.Event()
+    monkeypatch.setattr(runner, "_claim_runs", lambda: claiming.set() or release.wait(5) and None)
+    submitter = threading.Thread(target=runner.submit, args=("greedy", lambda progress: ({}, 200)))
+    submitter.start()
+    assert claiming.wait(5)
+    started = time.monotonic()
+    assert runner.jobs() == [] and runner.get("b" * 32) is None and time.monotonic() - started < 1
+    release.set()
+    submitter.join(5)
+    runner.shutdown()
+
+
+def test_a_job_left_running_by_an_exited_process_is_failed(tmp_path):
+    (tmp_path / ("a" * 32 + ".json")).write_text(
+        '{"job_id": "' + "a" * 32 + '", "engine": "greedy", "status": "running", "phase": "allocating", "percent": 20, "created_at": 1}')
+    runner = AllocationJobRunner(state_dir=str(tmp_path))
+
+    job, created = runner.submit("greedy", lambda progress: ({}, 200))
+    assert created and job.wait(5)
+    stale = runner.get("a" * 32)
+    assert stale.status == "failed" and "exited" in stale.result["message"]
+    runner.shutdown()
@@ -0,0 +1,27 @@
+import logging
+
+import pytest
+
+import allocation_parallel
+from allocation_fixed import run_allocation
+from allocation_parallel import run_allocation_parallel
+from test_allocation_engines import _random_cohort
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_parallel_engine_matches_vectorized(seed):
+    students, internships = _random_cohort(seed, student_count=300, internship_count=40)
+    expected = run_allocation(students, internships, engine="vectorized")
+    assert run_allocation_parallel(students, internships, workers=2) == expected
+    assert run_allocation(students, internships, engine="parallel") == expected
+
+
+def test_short_rankings_fall_back_to_rescoring(monkeypatch, caplog):
+    monkeypatch.setattr(allocation_parallel, "PARALLEL_CANDIDATES_PER_SEAT", 1)
+    students, internships = _random_cohort(3, student_count=150, internship_count=40)
+    with caplog.at_level(logging.DEBUG, logger="allocation_parallel"):
+        allocations = run_allocation_parallel(students, internships, workers=1)
+
+    assert allocations == run_allocation(students, internships, engine="vectorized")
+    scored = [record for record in caplog.records if record.msg.startswith("Scored ")]
+    assert len(scored) == 1 and scored[0].args[-1] > 0  # passes rescored
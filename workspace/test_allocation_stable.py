@@ -0,0 +1,54 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+import allocation_fixed
+from allocation_fixed import run_allocation, _deferred_acceptance, _encode_students, _score_vector, _slot_plans
+from test_allocation_engines import _random_cohort
+from test_allocation_flow import _assert_respects_seats_and_quotas
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_deferred_acceptance_leaves_no_blocking_pair(seed, monkeypatch):
+    # With complete preference lists stability holds against every internship
+    monkeypatch.setattr(allocation_fixed, "STABLE_PREFERENCES_PER_STUDENT", 1000)
+    students, internships = _random_cohort(seed, student_count=200, internship_count=20)
+    with contextlib.redirect_stdout(io.StringIO()):
+        cohort = _encode_students(students)
+        plans, slots = _slot_plans(internships)
+    available = np.zeros(cohort["count"], dtype=bool)
+    available[np.unique(cohort["groups"], return_index=True)[1]] = True
+
+    placed = _deferred_acceptance(cohort, plans, slots, available)
+
+    scores = np.array([_score_vector(cohort, plan["sector"], plan["required_skills"]) for plan in plans])
+    at_location = np.array([cohort["location_prefs"] == cohort["location_ids"].get(plan["location"], -2) for plan in plans])
+    utility = scores + np.where(at_location, allocation_fixed.LOCATION_BONUS, 0.0)
+    held = {j: placed.get((p, category), []) for j, (p, category, _) in enumerate(slots)}
+    match = {i: p for (p, _), members in placed.items() for i, _ in members}
+    category_names = {code: name for name, code in cohort["category_ids"].items()}
+
+    for j, (_, _, seats) in enumerate(slots):
+        assert len(held[j]) <= seats
+    for i in np.flatnonzero(available):
+        category = category_names.get(int(cohort["categories"][i]))
+        for p in range(len(plans)):
+            if i in match and (-utility[p, i], p) >= (-utility[match[i], i], match[i]):
+                continue
+            for j, (slot_plan, slot_category, seats) in enumerate(slots):
+                if slot_plan != p or slot_category not in (category, None):
+                    continue
+                # An internship with room, or holding someone it ranks below i, would take i
+                weakest = min(((score, -k) for k, score in held[j]), default=None)
+                assert len(held[j]) == seats and weakest > (scores[p, i], -i)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_stable_engine_respects_seats_and_quotas(seed):
+    students, internships = _random_cohort(seed, student_count=400, internship_count=30)
+    allocations = run_allocation(students, internships, engine="stable")
+
+    _assert_respects_seats_and_quotas(students, internships, allocations)
+    assert allocations
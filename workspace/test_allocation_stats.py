@@ -0,0 +1,63 @@
+import contextlib
+import io
+from collections import Counter
+
+import pytest
+
+from allocation_fixed import ALLOCATION_ENGINES, run_allocation, run_allocation_with_stats
+from allocation_parallel import run_allocation_parallel
+from allocation_stats import collect_stats
+from test_allocation_engines import _random_cohort
+
+
+@pytest.mark.parametrize("engine", ALLOCATION_ENGINES)
+def test_stats_come_back_with_unchanged_allocations(engine):
+    students, internships = _random_cohort(1, student_count=200, internship_count=30)
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = run_allocation(students, internships, engine=engine)
+        allocations, stats = run_allocation_with_stats(students, internships, engine=engine)
+
+    assert allocations == expected
+    assert stats["engine"] == engine
+    assert (stats["students"], stats["internships"], stats["allocations"]) == (200, 30, len(allocations))
+    assert stats["score_evaluations"] > 0
+    assert stats["candidates_pruned"] >= 0
+    phases = stats["normalization_seconds"] + stats["scoring_seconds"] + stats["selection_seconds"]
+    assert stats["normalization_seconds"] > 0 and stats["scoring_seconds"] > 0
+    assert phases == pytest.approx(stats["total_seconds"], abs=1e-5)
+
+    seat_categories = Counter(a["reason"][len("quota for "):] if a["allocation_type"] == "quota" else "open" for a in allocations)
+    assert stats["seats_filled_by_category"] == dict(seat_categories)
+
+
+def test_greedy_counts_every_candidate_as_scored_or_pruned():
+    students, internships = _random_cohort(2, student_count=300, internship_count=20)
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, greedy = run_allocation_with_stats(students, internships, engine="greedy")
+        _, vectorized = run_allocation_with_stats(students, internships, engine="vectorized")
+
+    # The vectorized engine scores the whole cohort per internship; the greedy bound skips most of it
+    assert vectorized["score_evaluations"] == 300 * sum(1 for i in internships if int(i["seats"]) > 0)
+    assert 0 < greedy["score_evaluations"] < vectorized["score_evaluations"]
+    assert greedy["candidates_pruned"] > 0
+
+
+def test_parallel_workers_are_counted_in_the_parent():
+    students, internships = _random_cohort(3, student_count=200, internship_count=30)
+    with contextlib.redirect_stdout(io.StringIO()):
+        with collect_stats("parallel") as inline:
+            run_allocation_parallel(students, internships, workers=1)
+        with collect_stats("parallel") as pooled:
+            run_allocation_parallel(students, internships, workers=2)
+
+    assert pooled.counters["score_evaluations"] >= inline.counters["score_evaluations"] > 0
+    assert pooled.seconds["scoring"] > 0
+
+
+def test_runs_outside_collect_stats_record_nothing():
+    students, internships = _random_cohort(4, student_count=50, internship_count=5)
+    with contextlib.redirect_stdout(io.StringIO()):
+        with collect_stats("vectorized") as stats:
+            pass
+        run_allocation(students, internships, engine="vectorized")
+    assert not stats.counters and stats.seconds["scoring"] == 0.0
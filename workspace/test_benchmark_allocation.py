@@ -0,0 +1,42 @@
+import json
+
+from benchmark_allocation import generate_cohort, run_benchmarks, compare_reports, main, CATEGORY_WEIGHTS
+
+
+def test_generated_cohort_is_seeded_and_valid():
+    students, internships = generate_cohort(500, seed=4)
+    assert (students, internships) == generate_cohort(500, seed=4)
+    assert generate_cohort(500, seed=5)[0] != students
+    assert len(internships) == 25
+
+    assert all(35 <= s["marks"] <= 100 and s["category"] in CATEGORY_WEIGHTS for s in students)
+    assert len({s["id"] for s in students}) == len(students)
+    for internship in internships:
+        quotas = internship.get("quota_json") or {c: internship[f"quota_{c.lower()}"] for c in CATEGORY_WEIGHTS}
+        assert sum(quotas.values()) <= internship["seats"] == internship["total_positions"]
+    assert any("quota_json" in i for i in internships) and any("quota_gen" in i for i in internships)
+
+
+def test_benchmark_runs_offline_through_the_route(tmp_path):
+    output = tmp_path / "bench.json"
+    assert main(["--scales", "300", "--engines", "greedy", "vectorized", "--route", "--output", str(output)]) == 0
+
+    report = json.loads(output.read_text())
+    greedy, vectorized = report["results"]
+    assert greedy["route"]["status"] == 200
+    assert greedy["peak_mb"] > 0
+    assert greedy["objective"] == vectorized["objective"] and greedy["allocations"] > 0
+
+    # Comparing a run with itself passes
+    assert main(["--scales", "300", "--engines", "vectorized", "--no-memory", "--baseline", str(output), "--tolerance", "100"]) == 0
+
+
+def test_comparison_flags_slowdowns_and_changed_results():
+    baseline = run_benchmarks([200], ["vectorized"], memory=False)
+    current = json.loads(json.dumps(baseline))
+    assert compare_reports(baseline, current) == []
+
+    current["results"][0]["seconds"] = baseline["results"][0]["seconds"] * 2 + 1
+    current["results"][0]["objective"] += 1
+    regressions = compare_reports(baseline, current)
+    assert len(regressions) == 2 and all(r.startswith("vectorized @ 200") for r in regressions)
@@ -0,0 +1,86 @@
+import contextlib
+import io
+import random
+
+import allocation_fixed
+from allocation_fixed import _profile_score, _student_profile
+from candidate_pool import CandidatePool
+from skill_vocab import SkillVocabulary
+
+SKILLS = [f"skill{i}" for i in range(40)]
+SECTORS = ["Technology", "Finance", "Healthcare", "Energy", "Retail", "Education"]
+
+
+def _cohort(student_count, seed=11):
+    rng = random.Random(seed)
+    students = [{
+        "id": i,
+        "name": f"Student {i}",
+        "marks": round(rng.uniform(35, 100), 1),
+        "skills": ",".join(rng.sample(SKILLS, 4)),
+        "category": rng.choice(["GEN"] * 5 + ["OBC"] * 3 + ["SC", "ST", "EWS"]),
+        "sector_pref": rng.choice(SECTORS),
+    } for i in range(student_count)]
+    internships = [{
+        "id": j,
+        "org_name": f"Org {j}",
+        "sector": rng.choice(SECTORS),
+        "required_skills": ",".join(rng.sample(SKILLS, 3)),
+        "seats": 5,
+        "quota_gen": 2,
+        "quota_obc": 1,
+        "quota_sc": 1,
+    } for j in range(student_count // 25)]
+    return students, internships
+
+
+def test_select_matches_stable_sort_with_assignments():
+    rng = random.Random(5)
+    students, _ = _cohort(300)
+    for s in rng.sample(students, 20):
+        s["marks"] = rng.choice(["n/a", 100, 0])
+    vocab = SkillVocabulary()
+    profiles = [_student_profile(s, vocab) for s in students]
+    pool = CandidatePool(students, profiles)
+    assigned = set()
+
+    for _ in range(40):
+        category = rng.choice(["GEN", "OBC", "SC", None])
+        sector = rng.choice(SECTORS).lower()
+        required_bits = vocab.encode(rng.sample(SKILLS, rng.choice([0, 1, 2])))
+        k = rng.randint(1, 6)
+
+        def score(i):
+            return _profile_score(profiles[i], sector, required_bits)
+
+        candidates = [i for i, s in enumerate(students) if i not in assigned and (category is None or s["category"] == category)]
+        expected = sorted(((i, score(i)) for i in candidates), key=lambda x: x[1], reverse=True)[:k]
+        chosen = pool.select(category, k, sector, score, required_bits)
+        assert chosen == expected
+        for i, _ in chosen:
+            pool.assign(i)
+            assigned.add(i)
+        assert pool.available(category) == len(candidates) - len(chosen)
+
+
+def test_greedy_selection_is_sub_quadratic(monkeypatch):
+    pools = []
+    original_init = CandidatePool.__init__
+
+    def recording_init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        pools.append(self)
+
+    monkeypatch.setattr(CandidatePool, "__init__", recording_init)
+
+    evaluations = {}
+    for student_count in (1000, 4000):
+        students, internships = _cohort(student_count)
+        with contextlib.redirect_stdout(io.StringIO()):
+            allocation_fixed.run_allocation(students, internships)
+        evaluations[student_count] = pools[-1].evaluations
+        # Exhaustive rescoring scores the whole pool at least once per internship
+        assert evaluations[student_count] < student_count * len(internships)
+
+    # Students and internships both grow 4x: quadratic work would grow 16x
+    assert evaluations[4000] / evaluations[1000] < 12
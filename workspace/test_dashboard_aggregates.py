@@ -0,0 +1,126 @@
+import pytest
+
+import app as app_module
+from dashboard_aggregates import DashboardAggregates
+from supabase_client import MockSupabaseClient, MockSupabaseQuery
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def tables():
+    return {
+        "students": [{"id": i, "name": f"Student {i}", "category": "SC" if i % 3 == 0 else "GEN"} for i in range(1, 13)],
+        "internships": [
+            {"id": 1, "org_name": "Tech Corp", "sector": "Technology", "seats": 4, "quota_json": {"SC": 2, "GEN": 1}},
+            {"id": 2, "org_name": "Finance Ltd", "sector": "Finance", "seats": 2, "quota_sc": 1},
+        ],
+        "allocations": [
+            {"id": 1, "student_id": 3, "internship_id": 1, "reason": "quota - quota for SC"},
+            {"id": 2, "student_id": 1, "internship_id": 2, "reason": "open - open seat"},
+        ],
+    }
+
+
+def _aggregates(tables):
+    aggregates = DashboardAggregates(reconcile_seconds=60, clock=_Clock())
+    aggregates.rebuild(MockSupabaseClient(tables))
+    return aggregates
+
+
+def test_rebuild_computes_totals_and_breakdowns(tables):
+    snapshot = _aggregates(tables).snapshot()
+    assert snapshot["stats"] == {"total_students": 12, "total_internships": 2, "total_allocations": 2}
+    assert snapshot["breakdowns"] == {
+        "seats_filled_by_sector": {"Technology": 1, "Finance": 1},
+        "allocated_by_category": {"SC": 1, "GEN": 1},
+        "unfilled_quota_seats": {"1": 2, "2": 1},
+    }
+    assert [s["id"] for s in snapshot["recent_students"]] == list(range(1, 11))
+
+
+def test_recorded_writes_match_a_rebuild(tables):
+    aggregates = _aggregates(tables)
+    written = [
+        {"student_id": "6", "internship_id": "1", "reason": "quota - quota for SC"},
+        {"student_id": "9", "internship_id": "2", "reason": "quota - quota for SC"},
+        {"student_id": "3", "internship_id": "1", "reason": "quota - quota for SC"},
+    ]
+    aggregates.record_allocations(written)
+    aggregates.record_allocations(written)  # a rerun upserts the same pairs
+    aggregates.record_internship({"id": 3, "org_name": "Health Inc", "sector": "Healthcare", "quota_gen": 2})
+
+    tables["allocations"] += [
+        {"id": 3, "student_id": 6, "internship_id": 1, "reason": "quota - quota for SC"},
+        {"id": 4, "student_id": 9, "internship_id": 2, "reason": "quota - quota for SC"},
+    ]
+    tables["internships"].append({"id": 3, "org_name": "Health Inc", "sector": "Healthcare", "quota_gen": 2})
+    assert aggregates.snapshot() == _aggregates(tables).snapshot()
+    assert aggregates.snapshot()["breakdowns"]["unfilled_quota_seats"] == {"1": 1, "2": 0, "3": 2}
+
+
+def test_open_seat_allocations_leave_quota_seats_unfilled(tables):
+    aggregates = _aggregates(tables)
+    written = [
+        {"student_id": "2", "internship_id": "1", "reason": "quota - quota for GEN"},
+        {"student_id": "6", "internship_id": "1", "reason": "open - open seat"},
+        {"student_id": "9", "internship_id": "2", "reason": "open - open seat"},
+    ]
+    aggregates.record_allocations(written)
+    breakdowns = aggregates.snapshot()["breakdowns"]
+    assert breakdowns["unfilled_quota_seats"] == {"1": 1, "2": 1}
+    assert breakdowns["seats_filled_by_sector"] == {"Technology": 3, "Finance": 2}
+
+    tables["allocations"] += [dict(row, id=3 + i) for i, row in enumerate(written)]
+    assert _aggregates(tables).snapshot() == aggregates.snapshot()
+
+
+def test_rebuild_reads_whole_rows_only_for_the_recent_lists(monkeypatch, tables):
+    tables["students"] += [{"id": i, "name": f"Student {i}", "category": "GEN", "skills": "Python"} for i in range(13, 40)]
+    queries = []
+    original = MockSupabaseQuery.execute
+    monkeypatch.setattr(MockSupabaseQuery, "execute", lambda self: queries.append((self.columns, self.row_limit)) or original(self))
+    snapshot = _aggregates(tables).snapshot()
+
+    assert all(limit == 10 for columns, limit in queries if columns == "*") and ("id,category", None) in queries
+    assert snapshot["stats"]["total_students"] == 39 and [s["id"] for s in snapshot["recent_students"]] == list(range(1, 11))
+    assert snapshot["recent_students"][0]["name"] == "Student 1" and snapshot["recent_internships"][0]["org_name"] == "Tech Corp"
+
+
+def test_reconcile_rebuilds_only_when_counts_drift(tables):
+    aggregates = _aggregates(tables)
+    supabase = MockSupabaseClient(tables)
+    aggregates.clock.now = 30
+    aggregates.refresh(supabase)
+    assert aggregates.rebuilds == 1
+
+    aggregates.clock.now = 61
+    aggregates.refresh(supabase)
+    assert aggregates.rebuilds == 1 and aggregates.reconciled_at == 61
+
+    tables["students"].append({"id": 13, "name": "Student 13", "category": "SC"})  # written by another service
+    aggregates.clock.now = 200
+    aggregates.refresh(supabase)
+    assert aggregates.rebuilds == 2 and aggregates.snapshot()["stats"]["total_students"] == 13
+
+
+def test_dashboard_is_served_without_reading_rows(monkeypatch, tables):
+    supabase = MockSupabaseClient(tables)
+    monkeypatch.setattr(app_module, "get_supabase", lambda: supabase)
+    client = app_module.create_app().test_client()
+    with client.session_transaction() as session:
+        session["logged_in"] = True
+    assert client.get("/admin_dashboard_data").json["stats"]["total_allocations"] == 2
+
+    reads = []
+    original = MockSupabaseQuery.execute
+    monkeypatch.setattr(MockSupabaseQuery, "execute", lambda self: reads.append(self.head) or original(self))
+    response = client.get("/admin_dashboard_data")
+    assert response.status_code == 200 and response.json["breakdowns"]["allocated_by_category"] == {"SC": 1, "GEN": 1}
+    assert reads == []
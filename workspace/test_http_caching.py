@@ -0,0 +1,98 @@
+import gzip
+import json
+
+import pytest
+import requests
+
+import app as app_module
+import http_caching
+from supabase_client import HttpSupabaseClient, MockSupabaseClient, MockSupabaseQuery
+
+
+@pytest.fixture
+def tables():
+    return {
+        "students": [{"id": i, "name": f"Student {i}", "updated_at": f"2025-01-01T00:00:{i % 60:02d}"} for i in range(200)],
+        "internships": [{"id": 1, "org_name": "Tech Corp", "sector": "Technology", "seats": 4, "updated_at": "2025-01-01T00:00:00"}],
+        "allocations": [{"id": 1, "student_id": 3, "internship_id": 1, "score": 80.0, "allocated_at": "2025-01-02T00:00:00"}],
+    }
+
+
+@pytest.fixture
+def client(monkeypatch, tables):
+    supabase = MockSupabaseClient(tables)
+    monkeypatch.setattr(app_module, "get_supabase", lambda: supabase)
+    test_client = app_module.create_app().test_client()
+    with test_client.session_transaction() as session:
+        session["logged_in"] = True
+    return test_client
+
+
+def _count_full_reads(monkeypatch):
+    """Count queries that return more than the single row a version check reads"""
+    reads = []
+    original = MockSupabaseQuery.execute
+
+    def counting_execute(self):
+        response = original(self)
+        if len(response.data) > 1 or "*" in self.columns:
+            reads.append(len(response.data))
+        return response
+
+    monkeypatch.setattr(MockSupabaseQuery, "execute", counting_execute)
+    return reads
+
+
+@pytest.mark.parametrize("path", ["/get_students", "/get_internships", "/get_allocations"])
+def test_unchanged_lists_answer_304_without_building_the_body(client, monkeypatch, path):
+    first = client.get(path)
+    assert first.status_code == 200 and first.headers["Cache-Control"] == "private, no-cache"
+    etag = first.headers["ETag"]
+
+    reads = _count_full_reads(monkeypatch)
+    second = client.get(path, headers={"If-None-Match": etag})
+    assert second.status_code == 304 and second.data == b"" and second.headers["ETag"] == etag
+    assert reads == []
+
+
+def test_writes_change_the_etag(client, tables):
+    etag = client.get("/get_allocations").headers["ETag"]
+    tables["allocations"].append({"id": 2, "student_id": 4, "internship_id": 1, "score": 70.0, "allocated_at": "2025-01-03T00:00:00"})
+    response = client.get("/get_allocations", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+
+    etag = response.headers["ETag"]
+    tables["students"][3]["updated_at"] = "2025-02-01T00:00:00"  # the join shows the student's new name
+    assert client.get("/get_allocations", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_large_bodies_are_compressed_for_clients_that_accept_it(client, monkeypatch):
+    plain = client.get("/get_students")
+    assert "Content-Encoding" not in plain.headers and "Accept-Encoding" in plain.headers["Vary"]
+
+    zipped = client.get("/get_students", headers={"Accept-Encoding": "gzip, deflate"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(zipped.data)) == plain.json
+    assert zipped.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+    # Either variant revalidates
+    assert client.get("/get_students", headers={"If-None-Match": zipped.headers["ETag"]}).status_code == 304
+
+    small = client.get("/get_internships", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+
+    monkeypatch.setattr(http_caching, "brotli", None)
+    assert client.get("/get_students", headers={"Accept-Encoding": "br"}).headers.get("Content-Encoding") is None
+
+
+def test_a_failing_supabase_has_no_version(monkeypatch):
+    def unreachable(*args, **kwargs):
+        raise requests.ConnectionError("Supabase is down")
+
+    with HttpSupabaseClient("http://supabase.invalid", {"apikey": "test"}) as http:
+        monkeypatch.setattr(http.session, "get", unreachable)
+        assert http_caching.table_version(http, "internships") is None
+        monkeypatch.setattr(app_module, "get_supabase", lambda: http)
+        test_client = app_module.create_app().test_client()
+        with test_client.session_transaction() as session:
+            session["logged_in"] = True
+        assert "ETag" not in test_client.get("/get_internships").headers
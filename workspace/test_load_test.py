@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+from werkzeug.serving import make_server
+
+import app as app_module
+from benchmark_allocation import generate_cohort
+from load_test import parse_mix, percentile, run_load, summarize
+from supabase_local import LocalSupabaseClient
+
+
+@pytest.fixture
+def server(monkeypatch):
+    students, internships = generate_cohort(200, 10)
+    supabase = LocalSupabaseClient()
+    supabase.load({"students": students, "internships": internships})
+    monkeypatch.setattr(app_module, "get_supabase", lambda: supabase)
+    monkeypatch.setenv("ADMIN_EMAIL", "admin@example.com")
+    monkeypatch.setenv("ADMIN_PASSWORD", "secret")
+    httpd = make_server("127.0.0.1", 0, app_module.create_app(), threaded=True)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    supabase.close()
+
+
+def test_closed_loop_reports_every_route_of_the_mix(server):
+    report = run_load(server, concurrency=3, duration=0.5)
+
+    assert report["logins"] == {role: {"ok": 3, "failed": 0} for role in ("admin", "company", "student")}
+    assert set(report["routes"]) == {"available_internships", "company_internships", "get_allocations", "run_allocation"}
+    total = report["total"]
+    assert total["requests"] == sum(route["requests"] for route in report["routes"].values()) > 0
+    assert total["error_rate"] == 0.0 and total["p50_ms"] <= total["p95_ms"] <= total["p99_ms"] <= total["max_ms"]
+
+
+def test_run_allocation_waits_for_the_job_and_enqueue_is_reported_apart(server):
+    report = run_load(server, {"run_allocation": 1}, concurrency=1, duration=0.3)
+    assert set(report["routes"]["run_allocation"]["status_codes"]) == {"200"}
+    report = run_load(server, {"run_allocation_enqueue": 1}, concurrency=1, duration=0.3)
+    assert set(report["routes"]["run_allocation_enqueue"]["status_codes"]) == {"202"}
+
+
+def test_rate_schedule_bounds_the_request_count(server):
+    report = run_load(server, {"available_internships": 1}, concurrency=2, duration=0.5, rate=20)
+    assert list(report["routes"]) == ["available_internships"]
+    assert 1 <= report["total"]["requests"] <= 10
+
+
+def test_failed_logins_surface_as_route_errors(server):
+    credentials = {"admin": {"email": "admin@example.com", "password": "wrong"}}
+    report = run_load(server, {"get_allocations": 1}, concurrency=1, duration=0.2, credentials=credentials)
+    assert report["logins"]["admin"] == {"ok": 0, "failed": 1}
+    assert report["routes"]["get_allocations"]["error_rate"] == 1.0 and set(report["total"]["status_codes"]) == {"401"}
+
+
+def test_summary_percentiles_and_mix_parsing():
+    samples = [("r", 200, i / 1000) for i in range(1, 101)] + [("r", None, 0.5)]
+    summary = summarize(samples, 2.0)
+    assert (summary["requests"], summary["errors"], summary["status_codes"]) == (101, 1, {"200": 100, "error": 1})
+    assert summary["p50_ms"] == 51.0 and summary["max_ms"] == 500.0 and summary["throughput_rps"] == 50.5
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.0 and percentile([1.0], 99) == 1.0
+
+    assert parse_mix("available_internships=3,run_allocation") == {"available_internships": 3.0, "run_allocation": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("unknown=1")
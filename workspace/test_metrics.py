@@ -0,0 +1,82 @@
+import gc
+import re
+import weakref
+
+import pytest
+
+import app as app_module
+from benchmark_supabase import StandInServer
+from supabase_cache import CachedSupabaseClient
+import metrics
+import supabase_client
+from supabase_client import HttpSupabaseClient, MockSupabaseClient
+
+
+@pytest.fixture
+def server():
+    with StandInServer(rows=5) as stand_in:
+        yield stand_in
+
+
+def _client(monkeypatch, supabase):
+    monkeypatch.setattr(app_module, "get_supabase", lambda: supabase)
+    test_client = app_module.create_app().test_client()
+    with test_client.session_transaction() as session:
+        session["logged_in"] = True
+    return test_client
+
+
+def _sample(text, name, **labels):
+    wanted = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf"^{re.escape(name)}{{{re.escape(wanted)}}} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def test_requests_record_latency_and_their_supabase_calls(monkeypatch, server):
+    with HttpSupabaseClient(server.url, {"apikey": "test"}) as http:
+        client = _client(monkeypatch, CachedSupabaseClient(http))
+        assert client.get("/get_allocations").status_code == 200
+        assert client.get("/get_allocations").status_code == 200
+        text = client.get("/metrics").get_data(as_text=True)
+
+    assert _sample(text, "http_requests_total", route="/get_allocations", method="GET", status="200") == 2
+    assert _sample(text, "http_request_duration_seconds_count", route="/get_allocations", method="GET") == 2
+    # Versions and reads of three tables, the second time with students and internships from the cache;
+    # the reads run on worker threads and still count towards the request
+    assert _sample(text, "supabase_calls_per_request_sum", route="/get_allocations") == 6 + 2
+    assert _sample(text, "supabase_calls_per_request_bucket", route="/get_allocations", le="2") == 1
+    assert _sample(text, "supabase_requests_total", method="GET", status="200") == 8
+    assert _sample(text, "supabase_bytes_total", direction="received") > 0
+    assert _sample(text, "supabase_cache_hit_ratio", table="students") == 0.5
+
+
+def test_metrics_token_is_required_when_set(monkeypatch, server):
+    monkeypatch.setenv("METRICS_TOKEN", "scrape-me")
+    with HttpSupabaseClient(server.url, {"apikey": "test"}) as http:
+        client = _client(monkeypatch, http)
+        assert client.get("/metrics").status_code == 401
+        response = client.get("/metrics", headers={"Authorization": "Bearer scrape-me"})
+    assert response.status_code == 200 and response.content_type.startswith("text/plain; version=0.0.4")
+
+
+def test_apps_share_one_supabase_observer_and_release_it(monkeypatch, server):
+    first = _client(monkeypatch, MockSupabaseClient({}))
+    observers = len(supabase_client.call_observers)
+    with HttpSupabaseClient(server.url, {"apikey": "test"}) as http:
+        second = _client(monkeypatch, http)
+        assert len(supabase_client.call_observers) == observers
+        assert second.get("/get_students").status_code == 200
+        text = second.get("/metrics").get_data(as_text=True)
+    assert _sample(text, "supabase_requests_total", method="GET", status="200") > 0
+
+    dropped = weakref.ref(first.application.extensions["metrics"])
+    del first
+    gc.collect()
+    assert dropped() is None and second.application.extensions["metrics"] in metrics._installed
+
+
+def test_login_does_not_dump_the_students_table(monkeypatch, capsys):
+    from supabase_client import MockSupabaseClient
+    client = _client(monkeypatch, MockSupabaseClient({"students": [{"id": 1, "name": "Ada", "email": "ada@example.com"}]}))
+    assert client.post("/student_login", json={"email": "ada@example.com", "password": "student123"}).status_code == 200
+    assert "ada@example.com" not in capsys.readouterr().out
@@ -0,0 +1,67 @@
+import app as app_module
+from supabase_client import MockSupabaseClient
+
+
+def _client(monkeypatch, user_type="admin"):
+    monkeypatch.setattr(app_module, "get_supabase", lambda: MockSupabaseClient())
+    flask_app = app_module.create_app()
+    test_client = flask_app.test_client()
+    with test_client.session_transaction() as session:
+        session["logged_in"] = True
+        session["user_type"] = user_type
+    return flask_app, test_client
+
+
+def test_profiling_is_not_installed_by_default(monkeypatch):
+    monkeypatch.delenv("PROFILE_DIR", raising=False)
+    flask_app, client = _client(monkeypatch)
+    assert "profiler" not in flask_app.extensions
+    assert "X-Profile-Id" not in client.get("/get_internships", headers={"X-Profile": "1"}).headers
+
+
+def test_admin_header_writes_a_listed_profile(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    _, client = _client(monkeypatch)
+    assert "X-Profile-Id" not in client.get("/get_internships").headers
+
+    profile_id = client.get("/get_internships", headers={"X-Profile": "1"}).headers["X-Profile-Id"]
+    listed = client.get("/admin/profiles").json["profiles"]
+    assert [p["id"] for p in listed] == [profile_id]
+    assert listed[0]["request"].startswith("GET /get_internships 200")
+
+    summary = client.get(listed[0]["summary"]).get_data(as_text=True)
+    assert "get_internships" in summary and "cumulative" in summary
+    assert client.get(listed[0]["profile"]).status_code == 200
+    assert client.get("/admin/profiles/app.py").status_code == 404
+    assert client.get("/admin/profiles/missing.prof").status_code == 404
+
+
+def test_non_admins_cannot_profile_or_list(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    _, client = _client(monkeypatch, user_type="student")
+    assert "X-Profile-Id" not in client.get("/available_internships", headers={"X-Profile": "1"}).headers
+    assert client.get("/admin/profiles").status_code == 401
+
+
+def test_sampling_profiles_any_request_and_old_profiles_are_pruned(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("PROFILE_SAMPLE_RATE", "1")
+    monkeypatch.setenv("PROFILE_KEEP", "2")
+    _, client = _client(monkeypatch, user_type="student")
+    ids = [client.get("/health").headers["X-Profile-Id"] for _ in range(3)]
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(f"{i}{suffix}" for i in ids[1:] for suffix in (".prof", ".txt"))
+
+
+def test_profiled_run_allocation_profiles_the_job(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    flask_app, client = _client(monkeypatch)
+    response = client.post("/run_allocation", json={"engine": "greedy"}, headers={"X-Profile": "1"})
+    assert response.status_code == 202
+    flask_app.extensions["allocation_jobs"].get(response.json["job_id"]).wait(10)
+
+    job_profile_id = response.headers["X-Job-Profile-Id"]
+    listed = {p["id"]: p for p in client.get("/admin/profiles").json["profiles"]}
+    assert set(listed) == {response.headers["X-Profile-Id"], job_profile_id}
+    assert listed[job_profile_id]["request"].startswith("POST /run_allocation run_allocation_job 200")
+    summary = client.get(listed[job_profile_id]["summary"]).get_data(as_text=True)
+    assert "_run_allocation_job" in summary and "(run_allocation)" in summary
@@ -0,0 +1,83 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+from flask import Flask
+
+from serve import WorkerServer, _listen
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _slow_app(release):
+    app = Flask(__name__)
+
+    @app.route("/slow")
+    def slow():
+        release.wait(5)
+        return "done"
+    return app
+
+
+def test_worker_drains_requests_in_flight():
+    listener = _listen("127.0.0.1:0", 16)
+    release = threading.Event()
+    server = WorkerServer(listener, _slow_app(release), threads=2)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:%s/slow" % listener.getsockname()[1]
+    responses = []
+    client = threading.Thread(target=lambda: responses.append(requests.get(url, timeout=5)))
+    client.start()
+    time.sleep(0.2)
+
+    server.shutdown()
+    assert not server.drain(0.1)
+    release.set()
+    client.join(5)
+    assert responses[0].text == "done" and server.drain(5)
+    listener.close()
+
+
+def test_prefork_server_probes_reloads_and_drains(tmp_path):
+    port, health_port = _free_port(), _free_port()
+    env = dict(os.environ, SUPABASE_LOCAL_DB=str(tmp_path / "serve.db"), ALLOCATION_JOB_DIR=str(tmp_path / "jobs"), LOG_LEVEL="ERROR")
+    process = subprocess.Popen([sys.executable, "serve.py", "--bind", f"127.0.0.1:{port}", "--workers", "2", "--threads", "2",
+                                "--health-bind", f"127.0.0.1:{health_port}", "--graceful-timeout", "5"],
+                               cwd=os.path.dirname(os.path.abspath(__file__)), env=env, stdout=subprocess.DEVNULL)
+    probe = f"http://127.0.0.1:{health_port}"
+    try:
+        for _ in range(100):
+            try:
+                if requests.get(probe + "/readyz", timeout=1).status_code == 200:
+                    break
+            except requests.RequestException:
+                pass
+            time.sleep(0.1)
+        ready = requests.get(probe + "/readyz", timeout=1).json()
+        assert ready["workers"] == 2 and ready["generation"] == 0 and not ready["draining"]
+        assert requests.get(probe + "/livez", timeout=1).json()["pid"] == process.pid
+        assert all(requests.get(f"http://127.0.0.1:{port}/health", timeout=5).json() == {"status": "ok"} for _ in range(6))
+
+        process.send_signal(signal.SIGHUP)
+        for _ in range(50):
+            ready = requests.get(probe + "/readyz", timeout=1).json()
+            if ready["generation"] == 1:
+                break
+            time.sleep(0.1)
+        assert ready["generation"] == 1 and ready["workers"] == 2
+        assert requests.get(f"http://127.0.0.1:{port}/health", timeout=5).status_code == 200
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(10) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
@@ -0,0 +1,40 @@
+import random
+
+import numpy as np
+
+import skill_vocab
+from allocation_fixed import _skill_match_score
+from skill_vocab import SkillVocabulary, match_count, packed_match_counts, skill_match_score
+
+
+def test_string_and_list_columns_encode_the_same():
+    vocab = SkillVocabulary()
+    assert vocab.encode("Python, SQL ,python,,Excel") == vocab.encode([" sql", "EXCEL", "Python"])
+    assert len(vocab) == 3
+    assert vocab.decode(vocab.encode("excel,python")) == ["python", "excel"]
+    assert vocab.encode("Rust", add=False) == 0 and "rust" not in vocab
+
+
+def test_bitset_score_matches_set_score():
+    rng = random.Random(7)
+    names = [f"Skill{i}" for i in range(150)]
+    vocab = SkillVocabulary()
+    for _ in range(200):
+        student = rng.sample(names, rng.randint(0, 12))
+        required = rng.sample(names, rng.randint(0, 6))
+        expected = _skill_match_score(student, required)
+        assert skill_match_score(vocab.encode(student), vocab.encode(required)) == expected
+
+
+def test_packed_counts_match_python_popcount():
+    rng = random.Random(3)
+    vocab = SkillVocabulary(f"s{i}" for i in range(200))
+    rows = [vocab.encode(rng.sample([f"s{i}" for i in range(200)], rng.randint(0, 30))) for _ in range(50)]
+    packed = vocab.pack(rows)
+    assert packed.shape == (50, 4)
+    required = vocab.encode(["s0", "s63", "s64", "s199", "brand new"])
+    expected = [match_count(bits, required) for bits in rows]
+    assert packed_match_counts(packed, required).tolist() == expected
+
+    words = packed[:, 1] & np.uint64(12345678901234)
+    assert skill_vocab._popcount(words).tolist() == [bin(int(w)).count("1") for w in words]
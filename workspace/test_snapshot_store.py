@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+import app as app_module
+from allocation_fixed import _encode_students, run_allocation
+from benchmark_allocation import generate_cohort
+from skill_vocab import SkillVocabulary
+from snapshot_store import Snapshot, SnapshotRows, SnapshotStore, write_snapshot
+from supabase_local import LocalSupabaseClient
+
+ROWS = [
+    {"id": "s1", "marks": 81.5, "skills": "Python, SQL", "category": "GEN", "active": True, "quota_json": {"GEN": 2}},
+    {"id": "s2", "marks": 70, "skills": ["Excel", " Tally", " "], "category": None, "active": False},
+    {"id": "s3", "marks": None, "skills": "python,,sql ", "category": "", "quota_json": [1, "two"], "seats": 3},
+    {"id": "s4", "skills": "java,C++", "active": None, "seats": None, "extra": "only here"},
+]
+
+
+@pytest.fixture
+def local():
+    students, internships = generate_cohort(300, 15, seed=4)
+    with LocalSupabaseClient() as client:
+        client.load({"students": students, "internships": internships})
+        yield client
+
+
+def test_rows_come_back_exactly_as_written(tmp_path):
+    path = str(tmp_path / "students.snap")
+    manifest = write_snapshot(path, "students", ROWS, "students:4:v1")
+    snapshot = Snapshot(path)
+
+    assert snapshot.rows() == ROWS and [list(row) for row in snapshot.rows()] == [list(row) for row in ROWS]
+    assert {column["name"]: column["kind"] for column in manifest["columns"]} == {
+        "id": "str", "marks": "float", "skills": "skills", "category": "str", "active": "bool", "quota_json": "json", "seats": "int", "extra": "str",
+    }
+    assert snapshot.version == "students:4:v1" and len(snapshot) == 4
+    marks = snapshot.column("marks")["values"]
+    assert marks.dtype == np.float64 and not marks.flags.owndata and marks.tolist()[:2] == [81.5, 70.0]
+    assert snapshot.dictionary("skills") == ["Python", "SQL", "Excel", " Tally", " ", "python", "sql", "java", "C++"]
+
+
+def test_cohort_from_columns_matches_the_row_encoder(tmp_path):
+    students, internships = generate_cohort(500, 25, seed=2)
+    students[0]["marks"], students[1]["location_pref"], students[2]["id"] = None, "  ", students[3]["id"]
+    del students[4]["category"]
+    write_snapshot(str(tmp_path / "students.snap"), "students", students, "v")
+    rows = Snapshot(str(tmp_path / "students.snap")).rows()
+
+    fast, slow = rows.encoded_cohort(), _encode_students(list(students))
+    for key, expected in slow.items():
+        if key == "vocab":
+            assert [fast[key].name_of(i) for i in range(len(fast[key]))] == [expected.name_of(i) for i in range(len(expected))]
+        elif isinstance(expected, np.ndarray):
+            assert fast[key].dtype == expected.dtype and np.array_equal(fast[key], expected), key
+        else:
+            assert fast[key] == expected, key
+    assert rows.encoded_cohort()["vocab"] is not fast["vocab"]
+    assert run_allocation(rows, internships, "vectorized") == run_allocation(students, internships, "vectorized")
+
+
+def test_skill_bits_pack_without_decoding_rows(tmp_path):
+    write_snapshot(str(tmp_path / "s.snap"), "students", ROWS, "v")
+    vocab = SkillVocabulary(["sql"])
+    packed, has_skills = Snapshot(str(tmp_path / "s.snap")).skill_bits("skills", vocab)
+    assert [vocab.decode(int(word)) for word in packed[:, 0]] == [["sql", "python"], ["excel", "tally"], ["sql", "python"], ["java", "c++"]]
+    assert has_skills.tolist() == [True, True, True, True]
+
+
+def test_store_refetches_only_when_the_table_version_moves(tmp_path, local, monkeypatch):
+    store = SnapshotStore(str(tmp_path))
+    first = store.rows(local, "students")
+    assert not isinstance(first, SnapshotRows) and len(first) == 300
+
+    reads = []
+    original = local.table
+
+    def counting_table(name):
+        reads.append(name)
+        return original(name)
+    monkeypatch.setattr(local, "table", counting_table)
+    second = store.rows(local, "students")
+    assert isinstance(second, SnapshotRows) and second == first and reads == ["students"]  # the version check only
+
+    local.table("students").insert({"id": "late", "name": "Late", "marks": 50})
+    third = store.rows(local, "students")
+    assert len(third) == 301 and not isinstance(third, SnapshotRows)
+    assert store.snapshot(local, "students").version == store.open("students").version and len(store.open("students")) == 301
+
+
+def test_a_replaced_snapshot_stays_readable_and_empty_tables_are_kept(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    write_snapshot(store.path("students"), "students", ROWS, "students:4:v1")
+    held = store.open("students")
+    write_snapshot(store.path("students"), "students", ROWS[:2], "students:2:v2")
+    assert len(store.open("students")) == 2 and held.rows() == ROWS
+
+    with LocalSupabaseClient() as empty:
+        empty.load({"students": []})
+        assert store.rows(empty, "students") == [] and store.open("students").version.startswith("students:0:")
+        assert isinstance(store.rows(empty, "students"), SnapshotRows)
+
+
+def test_unreadable_snapshots_are_ignored(tmp_path):
+    (tmp_path / "students.snap").write_bytes(b"not a snapshot")
+    assert SnapshotStore(str(tmp_path)).open("students") is None
+
+
+def test_app_reads_serve_rows_from_snapshots(tmp_path, local, monkeypatch):
+    monkeypatch.setattr(app_module, "get_supabase", lambda: local)
+    monkeypatch.setenv("SNAPSHOT_DIR", str(tmp_path))
+    client = app_module.create_app().test_client()
+    with client.session_transaction() as session:
+        session["logged_in"] = True
+
+    expected = local.table("students").select("*").execute_all().data
+    assert client.get("/get_students").json["students"] == expected
+    assert (tmp_path / "students.snap").exists()
+    assert client.get("/get_students", headers={"If-None-Match": "stale"}).json["students"] == expected
+    response = client.post("/run_allocation", json={"engine": "vectorized", "wait": True})
+    assert response.status_code == 200 and response.json["stats"]["students"] == 300
@@ -0,0 +1,82 @@
+import gzip
+import os
+
+import pytest
+
+import app as app_module
+from static_assets import IMMUTABLE_CACHE_CONTROL, DistAssets
+from supabase_client import MockSupabaseClient
+
+INDEX = b"<!doctype html><html><body><div id='root'></div>" + b"<script src='/assets/index-BkQ2x7Zc.js'></script>" * 40 + b"</body></html>"
+SCRIPT = b"console.log('optima');\n" * 60
+
+
+@pytest.fixture
+def dist(tmp_path):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "index.html").write_bytes(INDEX)
+    (tmp_path / "assets" / "index-BkQ2x7Zc.js").write_bytes(SCRIPT)
+    (tmp_path / "assets" / "index-BkQ2x7Zc.js.br").write_bytes(b"brotli bytes")
+    (tmp_path / "assets" / "logo-large.png").write_bytes(os.urandom(4096))
+    (tmp_path / "robots.txt").write_bytes(b"User-agent: *\n")
+    return tmp_path
+
+
+@pytest.fixture
+def client(monkeypatch, dist):
+    monkeypatch.setattr(app_module, "get_supabase", lambda: MockSupabaseClient({}))
+    flask_app = app_module.create_app()
+    assets = flask_app.extensions["dist_assets"]
+    assets.root = str(dist)
+    assets.memory_max_bytes = 2048
+    assets.scan()
+    return flask_app.test_client()
+
+
+def test_index_skips_variants_and_keeps_small_files_in_memory(dist):
+    assets = DistAssets(str(dist), memory_max_bytes=2048)
+
+    assert sorted(assets.files) == ["assets/index-BkQ2x7Zc.js", "assets/logo-large.png", "index.html", "robots.txt"]
+    assert assets.files["index.html"].bodies and not assets.files["assets/logo-large.png"].bodies
+    assert assets.files["assets/index-BkQ2x7Zc.js"].immutable and not assets.files["robots.txt"].immutable
+    assert not assets.files["assets/logo-large.png"].immutable
+    assert DistAssets(str(dist / "missing")).files == {}
+
+
+def test_hashed_assets_come_precompressed_and_immutable(client):
+    brotli = client.get("/assets/index-BkQ2x7Zc.js", headers={"Accept-Encoding": "gzip, br"})
+    assert brotli.data == b"brotli bytes" and brotli.headers["Content-Encoding"] == "br"
+    assert brotli.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL and "Accept-Encoding" in brotli.headers["Vary"]
+
+    # Without a .gz from the build, the in-memory copy is gzipped at startup
+    gzipped = client.get("/assets/index-BkQ2x7Zc.js", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["Content-Encoding"] == "gzip" and gzip.decompress(gzipped.data) == SCRIPT
+    assert gzipped.get_etag()[0] != brotli.get_etag()[0]
+    assert client.get("/assets/index-BkQ2x7Zc.js").data == SCRIPT
+
+
+def test_index_html_is_served_from_memory_with_an_etag(client, dist):
+    first = client.get("/student-dashboard-missing-route")
+    assert first.status_code == 200 and first.data == INDEX and first.headers["Cache-Control"] == "no-cache"
+
+    (dist / "index.html").write_bytes(b"changed on disk")
+    etag = first.get_etag()[0]
+    assert client.get("/react").data == INDEX
+    assert client.get("/react", headers={"If-None-Match": f'"{etag}"'}).status_code == 304
+
+
+def test_large_and_root_files_stream_from_disk_and_answer_ranges(client, dist):
+    logo = client.get("/assets/logo-large.png", headers={"Range": "bytes=0-99"})
+    assert logo.status_code == 206 and logo.data == (dist / "assets" / "logo-large.png").read_bytes()[:100]
+    assert client.get("/robots.txt").data == b"User-agent: *\n"
+    assert client.get("/assets/index-missing.js").data == INDEX
+
+
+def test_missing_build_answers_json_404(monkeypatch):
+    monkeypatch.setattr(app_module, "get_supabase", lambda: MockSupabaseClient({}))
+    flask_app = app_module.create_app()
+    flask_app.extensions["dist_assets"].root = "/nonexistent"
+    flask_app.extensions["dist_assets"].scan()
+
+    response = flask_app.test_client().get("/no-such-page")
+    assert response.status_code == 404 and response.json["message"] == "The frontend has not been built"
@@ -0,0 +1,84 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmark_supabase import StandInServer
+from supabase_async import AsyncMockSupabaseClient, AsyncSupabaseClient, execute_concurrently, gather_queries
+from supabase_client import HttpSupabaseClient, MockSupabaseClient, MockSupabaseQuery
+
+ROWS = {
+    "students": [{"id": i, "name": f"Student {i}", "marks": i * 10} for i in range(1, 6)],
+    "internships": [{"id": 1, "org_name": "Tech Corp", "seats": 2}],
+    "allocations": [],
+}
+
+
+@pytest.fixture
+def slow_queries(monkeypatch):
+    """Every mock query takes 0.2 s, like a round trip to Supabase"""
+    original = MockSupabaseQuery.execute
+
+    def slow_execute(self):
+        time.sleep(0.2)
+        return original(self)
+
+    monkeypatch.setattr(MockSupabaseQuery, "execute", slow_execute)
+
+
+def test_async_mock_client_has_the_sync_surface():
+    async def scenario():
+        client = AsyncMockSupabaseClient({name: [dict(r) for r in rows] for name, rows in ROWS.items()})
+        students, internships = await gather_queries(
+            client.table("students").select("id,marks", count="exact").gt("marks", 20).order("marks", desc=True).limit(2),
+            client.table("internships").select_all("*"),
+        )
+        await client.table("allocations").insert({"id": 1, "student_id": 5, "internship_id": 1}).execute()
+        await client.table("internships").update({"seats": 3}).eq("id", 1).execute()
+        written = await client.table("allocations").bulk_upsert([{"student_id": 5, "internship_id": 1, "score": 9.0}], on_conflict="student_id,internship_id")
+        allocations = await client.table("allocations").select("*").execute()
+        seats = await client.table("internships").select("seats").execute()
+        return students, internships, written, allocations, seats
+
+    students, internships, written, allocations, seats = asyncio.run(scenario())
+    assert students.count == 3 and students.data == [{"id": 5, "marks": 50}, {"id": 4, "marks": 40}]
+    assert [i["org_name"] for i in internships.data] == ["Tech Corp"]
+    assert written.count == 1 and [a["score"] for a in allocations.data] == [9.0]
+    assert seats.data == [{"seats": 3}]
+
+
+def test_gathered_reads_overlap(slow_queries):
+    client = AsyncSupabaseClient(MockSupabaseClient(ROWS))
+
+    async def scenario():
+        return await gather_queries(*(client.table(name).select("*") for name in ("students", "internships", "allocations")))
+
+    start = time.perf_counter()
+    students, internships, allocations = asyncio.run(scenario())
+    assert time.perf_counter() - start < 0.45
+    assert (len(students.data), len(internships.data), allocations.data) == (5, 1, [])
+
+
+def test_execute_concurrently_keeps_argument_order(slow_queries):
+    client = MockSupabaseClient(ROWS)
+    start = time.perf_counter()
+    students, internships, allocations = execute_concurrently(
+        client.table("students").select("*").execute_all,
+        client.table("internships").select("*"),
+        client.table("allocations").select("id", count="exact").limit(1),
+    )
+    assert time.perf_counter() - start < 0.45
+    assert len(students.data) == 5 and internships.data == ROWS["internships"] and allocations.count == 0
+
+
+def test_async_client_over_http_shares_the_keep_alive_pool():
+    with StandInServer(rows=3) as server:
+        with HttpSupabaseClient(server.url, {"apikey": "test"}, pool_size=4) as http:
+            client = AsyncSupabaseClient(http, ThreadPoolExecutor(max_workers=4))
+
+            async def scenario():
+                return await gather_queries(*(client.table("students").select("*") for _ in range(12)))
+
+            assert all(len(r.data) == 3 for r in asyncio.run(scenario()))
+        assert server.connections <= 4
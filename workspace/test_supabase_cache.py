@@ -0,0 +1,117 @@
+from supabase_cache import CachedSupabaseClient, TableCache, parse_ttls
+from supabase_client import MockSupabaseClient, MockSupabaseQuery
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _cached_client(ttls=None, max_entries=8):
+    rows = {
+        "internships": [{"id": i, "org_name": f"Org {i}", "seats": i} for i in range(1, 6)],
+        "students": [{"id": i, "name": f"Student {i}"} for i in range(1, 6)],
+        "allocations": [{"id": 1, "student_id": 1, "internship_id": 1}],
+    }
+    client = CachedSupabaseClient(MockSupabaseClient(rows), ttls or {"internships": 30, "students": 10}, max_entries)
+    client.cache.clock = _Clock()
+    return client
+
+
+def _count_selects(monkeypatch, client):
+    """Record the table of every query the mock actually runs"""
+    calls = []
+    original = MockSupabaseQuery.execute
+
+    def counting_execute(self):
+        calls.extend(name for name, rows in client.client.tables.items() if rows is self.rows)
+        return original(self)
+
+    monkeypatch.setattr(MockSupabaseQuery, "execute", counting_execute)
+    return calls
+
+
+def test_reads_are_served_from_cache_until_the_ttl_passes(monkeypatch):
+    client = _cached_client()
+    selects = _count_selects(monkeypatch, client)
+
+    first = client.table("internships").select("*").execute().data
+    assert client.table("internships").select("*").execute().data == first
+    assert client.table("internships").select("*").eq("id", 2).execute().data == [first[1]]
+    assert selects.count("internships") == 2
+
+    client.cache.clock.now = 31
+    client.table("internships").select("*").execute()
+    assert selects.count("internships") == 3
+    assert client.cache_stats()["internships"] == {"hits": 1, "misses": 3, "evictions": 0, "invalidations": 0, "entries": 2}
+
+
+def test_editing_a_cached_response_leaves_the_cache_intact(monkeypatch):
+    client = _cached_client()
+    selects = _count_selects(monkeypatch, client)
+    first = client.table("internships").select("*").execute().data
+    expected = [dict(row) for row in first]
+    first[0]["seats"] = 0
+    first.pop()
+
+    hit = client.table("internships").select("*").execute().data
+    assert hit == expected and selects.count("internships") == 1
+    hit[1].pop("org_name")
+    hit.append({"id": 99})
+    assert client.table("internships").select("*").execute().data == expected
+
+
+def test_tables_without_ttl_are_not_cached(monkeypatch):
+    client = _cached_client()
+    selects = _count_selects(monkeypatch, client)
+    for _ in range(3):
+        client.table("allocations").select("*").execute()
+    assert selects == ["allocations"] * 3
+    assert "allocations" not in client.cache_stats()
+
+
+def test_writes_invalidate_their_table_only():
+    client = _cached_client()
+    internships = client.table("internships")
+    assert internships.select("seats").eq("id", 3).execute().data == [{"seats": 3}]
+    client.table("students").select("*").execute()
+
+    internships.update({"seats": 9}).eq("id", 3).execute()
+    assert internships.select("seats").eq("id", 3).execute().data == [{"seats": 9}]
+    internships.bulk_insert([{"id": 6, "org_name": "Org 6", "seats": 1}])
+    assert len(internships.select_all("*").execute().data) == 6
+
+    stats = client.cache_stats()
+    assert stats["internships"]["invalidations"] == 2
+    assert stats["students"] == {"hits": 0, "misses": 1, "evictions": 0, "invalidations": 0, "entries": 1}
+
+
+def test_per_key_lookups_are_lru_bounded():
+    client = _cached_client(max_entries=3)
+    students = client.table("students")
+    for student_id in (1, 2, 3, 1, 4):
+        students.select("*").eq("id", student_id).execute()
+    students.select("*").eq("id", 1).execute()  # still cached: 2 was least recently used
+    assert client.cache_stats()["students"] == {"hits": 2, "misses": 4, "evictions": 1, "invalidations": 0, "entries": 3}
+
+
+def test_a_read_racing_a_write_is_not_stored():
+    cache = TableCache({"students": 60}, clock=_Clock())
+    client = MockSupabaseClient({"students": [{"id": 1}]})
+
+    def fetch_during_write():
+        response = client.table("students").select("*").execute()
+        cache.invalidate("students")  # a write lands while the read is in flight
+        return response
+
+    cache.read("students", ("q",), fetch_during_write)
+    assert cache.stats()["students"]["entries"] == 0
+
+
+def test_parse_ttls():
+    assert parse_ttls(None) is None
+    assert parse_ttls("off") == {} and parse_ttls("") == {}
+    assert parse_ttls("internships=30, students=2.5") == {"internships": 30.0, "students": 2.5}
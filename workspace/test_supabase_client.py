@@ -0,0 +1,187 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+from benchmark_supabase import StandInServer
+from supabase_client import HttpSupabaseClient, MockSupabaseClient
+
+ROWS = [{"id": f"{i:04d}", "name": f"Student {i}", "marks": i % 100} for i in range(2345)]
+
+
+class _PostgrestHandler(BaseHTTPRequestHandler):
+    """Just enough of PostgREST's GET for paging: select, order on id, limit/offset, id=gt., count=exact"""
+
+    def do_GET(self):
+        query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        self.server.requests.append(query)
+        self.server.request_paths.append(self.path)
+        rows = sorted(ROWS, key=lambda r: r["id"])
+        if query.get("id", "").startswith("gt."):
+            rows = [r for r in rows if r["id"] > query["id"][3:]]
+        total = len(rows)
+        offset = int(query.get("offset", 0))
+        rows = rows[offset:offset + min(int(query.get("limit", self.server.max_rows)), self.server.max_rows)]
+        if query.get("select", "*") != "*":
+            columns = query["select"].split(",")
+            rows = [{c: r[c] for c in columns} for r in rows]
+
+        body = json.dumps(rows).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        count = str(total) if "count=exact" in self.headers.get("Prefer", "") else "*"
+        self.send_header("Content-Range", f"{offset}-{offset + len(rows) - 1}/{count}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.server.requests.append({"HEAD": urlparse(self.path).query})
+        self.send_response(200)
+        self.send_header("Content-Range", f"*/{len(ROWS)}")
+        self.end_headers()
+
+    def do_POST(self):
+        rows = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append({"POST": urlparse(self.path).query, "prefer": self.headers.get("Prefer"), "rows": len(rows)})
+        failed = any(r.get("student_id") == "conflict" for r in rows)
+        body = b'{"message":"duplicate key"}' if failed else b""
+        self.send_response(409 if failed else 201)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_PATCH(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append({"PATCH": urlparse(self.path).query, "body": body})
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def postgrest():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PostgrestHandler)
+    server.requests = []
+    server.request_paths = []
+    server.max_rows = 1000
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _client(server, **kwargs):
+    return HttpSupabaseClient(f"http://127.0.0.1:{server.server_port}", {"apikey": "test"}, **kwargs)
+
+
+def test_keyset_pages_cover_the_table_in_order(postgrest):
+    pages = list(_client(postgrest).table("students").pages(page_size=500))
+
+    assert [len(p) for p in pages] == [500, 500, 500, 500, 345]
+    assert [r["id"] for p in pages for r in p] == [r["id"] for r in ROWS]
+    assert [q.get("id") for q in postgrest.requests] == [None, "gt.0499", "gt.0999", "gt.1499", "gt.1999"]
+    assert all(q["order"] == "id.asc" and q["limit"] == "500" for q in postgrest.requests)
+
+
+def test_concurrent_pages_are_yielded_in_order(postgrest):
+    table = _client(postgrest, page_size=300, page_concurrency=4).table("students")
+    rows = [r for page in table.pages("name") for r in page]
+
+    assert rows == [{"name": r["name"], "id": r["id"]} for r in ROWS]
+    assert sorted(int(q["offset"]) for q in postgrest.requests) == list(range(0, 2345, 300))
+
+
+def test_select_all_reads_past_max_rows(postgrest):
+    response = _client(postgrest).table("students").select_all("*", count="exact").execute()
+    assert response.data == ROWS and response.count == len(ROWS)
+    assert len(postgrest.requests) == 3
+
+
+def test_head_select_reads_only_the_count(postgrest):
+    response = _client(postgrest).table("students").select("id", count="exact", head=True).execute()
+    assert response.data == [] and response.count == len(ROWS)
+    assert postgrest.requests == [{"HEAD": "select=id"}]
+
+
+def test_mock_client_pages_its_rows():
+    table = MockSupabaseClient({"students": ROWS}).table("students")
+    assert [len(p) for p in table.pages(page_size=1000)] == [1000, 1000, 345]
+    assert table.select_all().execute().data == ROWS
+
+
+def test_tables_share_the_client_keep_alive_pool():
+    with StandInServer(rows=5) as server:
+        with HttpSupabaseClient(server.url, {"apikey": "test"}, pool_size=4) as client:
+            for table_name in ("students", "internships", "allocations") * 3:
+                assert len(client.table(table_name).select("*").execute().data) == 5
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                assert all(len(r.data) == 5 for r in executor.map(lambda _: client.table("students").select("*").execute(), range(40)))
+        assert server.connections <= 4
+
+
+def test_query_builder_pushes_filters_down_in_one_request(postgrest):
+    table = _client(postgrest).table("students")
+    query = table.select("name,marks", count="exact").gt("marks", 50).lt("marks", 60).in_("id", ["0051", "a,b"]).eq("active", True).order("marks", desc=True).order("id").range(2, 6)
+    assert postgrest.requests == []
+
+    query.execute()
+    sent = parse_qs(urlparse(postgrest.request_paths[-1]).query)
+    assert sent == {
+        "select": ["name,marks"],
+        "marks": ["gt.50", "lt.60"],
+        "id": ['in.(0051,"a,b")'],
+        "active": ["eq.true"],
+        "order": ["marks.desc,id.asc"],
+        "limit": ["5"],
+        "offset": ["2"],
+    }
+
+    table.update({"marks": 99}).eq("id", "0007").execute()
+    assert postgrest.requests[-1] == {"PATCH": "id=eq.0007", "body": {"marks": 99}}
+
+
+def test_mock_query_builder_filters_orders_and_projects():
+    rows = [dict(r) for r in ROWS[:50]]
+    table = MockSupabaseClient({"students": rows}).table("students")
+
+    response = table.select("id,marks", count="exact").gte("marks", 10).lt("marks", 20).order("marks", desc=True).limit(3).execute()
+    assert response.count == 10
+    assert response.data == [{"id": "0019", "marks": 19}, {"id": "0018", "marks": 18}, {"id": "0017", "marks": 17}]
+    assert [r["id"] for r in table.select("*").in_("id", ["0003", "0001", "9999"]).execute().data] == ["0001", "0003"]
+    assert table.select("*").eq("name", "Student 4").range(0, 0).execute().data == [ROWS[4]]
+
+    table.update({"marks": 100}).eq("id", "0002").execute()
+    assert table.select("marks").eq("id", "0002").execute().data == [{"marks": 100}]
+
+
+def test_bulk_upsert_reports_failed_chunks_and_keeps_the_rest(postgrest):
+    rows = [{"student_id": f"s{i}", "internship_id": "i1", "score": 1.0} for i in range(1050)]
+    rows[620]["student_id"] = "conflict"
+    table = _client(postgrest).table("allocations")
+
+    response = table.bulk_upsert(rows, on_conflict="student_id,internship_id", chunk_size=200, concurrency=3)
+
+    posts = [r for r in postgrest.requests if "POST" in r]
+    assert sorted(r["rows"] for r in posts) == [50] + [200] * 5
+    assert all(r["POST"] == "on_conflict=student_id%2Cinternship_id" for r in posts)
+    assert all(r["prefer"] == "return=minimal,resolution=merge-duplicates" for r in posts)
+    assert response.count == 850 and response.data == []
+    assert len(response.errors) == 1
+    assert response.errors[0]["start"] == 600 and response.errors[0]["rows"] == 200 and "duplicate key" in response.errors[0]["error"]
+
+
+def test_mock_bulk_upsert_merges_on_conflict_columns():
+    table = MockSupabaseClient({"allocations": []}).table("allocations")
+    table.bulk_upsert([{"student_id": 1, "internship_id": 2, "score": 50.0}], on_conflict="student_id,internship_id")
+    response = table.bulk_upsert([{"student_id": 1, "internship_id": 2, "score": 75.0}, {"student_id": 3, "internship_id": 2, "score": 60.0}], on_conflict="student_id,internship_id")
+
+    assert response.count == 2 and not response.errors
+    assert [r["score"] for r in table.select("*").order("student_id").execute().data] == [75.0, 60.0]
@@ -0,0 +1,121 @@
+import json
+
+import pytest
+
+import app as app_module
+import supabase_client
+from supabase_local import LocalSupabaseClient, load_schema
+
+INTERNSHIPS = [
+    {"id": "i1", "company": "Tech Corp", "org_name": "Tech Corp", "sector": "Technology", "required_skills": "python", "seats": 2, "location": "Delhi"},
+    {"id": "i2", "company": "Fin Ltd", "org_name": "Fin Ltd", "sector": "Finance", "required_skills": "excel", "seats": 1, "location": "Mumbai"},
+]
+STUDENTS = [
+    {"id": f"s{i}", "name": f"Student {i}", "marks": 60 + i, "skills": "python, excel", "category": "GEN", "location_pref": "Delhi", "sector_pref": "Technology"}
+    for i in range(5)
+]
+
+
+@pytest.fixture
+def local():
+    with LocalSupabaseClient() as client:
+        client.load({"students": STUDENTS, "internships": INTERNSHIPS})
+        yield client
+
+
+def test_schema_comes_from_the_migrations():
+    schema = load_schema()
+    assert set(schema) == {"students", "internships", "allocations", "profiles"}
+    assert schema["allocations"].unique == [("student_id", "internship_id")]
+    assert schema["students"].touch_updated_at and not schema["allocations"].touch_updated_at
+    assert schema["students"].columns["marks"].kind == "real" and schema["internships"].columns["quota_gen"].default == 0
+
+
+def test_rows_get_defaults_and_keep_fields_outside_the_schema(local):
+    row = local.table("internships").select("*").eq("id", "i1").execute().data[0]
+    assert row["org_name"] == "Tech Corp" and row["seats"] == 2
+    assert row["quota_gen"] == 0 and row["created_at"] == row["updated_at"]
+
+    inserted = local.table("allocations").insert({"student_id": "s0", "internship_id": "i1", "score": 80.0}).data[0]
+    assert len(inserted["id"]) == 36 and inserted["allocated_at"]
+
+
+def test_select_filters_orders_counts_and_projects(local):
+    students = local.table("students")
+    response = students.select("id,marks", count="exact").gte("marks", 61).neq("id", "s3").order("marks", desc=True).limit(2).execute()
+    assert response.count == 3 and response.data == [{"id": "s4", "marks": 64.0}, {"id": "s2", "marks": 62.0}]
+    assert [r["id"] for r in students.select("id").in_("id", ["s1", "s3", "zz"]).order("id").execute().data] == ["s1", "s3"]
+    assert [r["id"] for r in students.select("id").order("marks").range(1, 2).execute().data] == ["s1", "s2"]
+    assert local.table("internships").select("id").eq("org_name", "Fin Ltd").execute().data == [{"id": "i2"}]
+
+    head = students.select("id", count="exact", head=True).lt("marks", 62).execute()
+    assert head.data == [] and head.count == 2
+
+
+def test_pages_cover_the_table_in_key_order(local):
+    pages = list(local.table("students").pages("name", page_size=2))
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [row["id"] for page in pages for row in page] == [f"s{i}" for i in range(5)]
+
+
+def test_bulk_upsert_merges_on_conflict_and_reports_failed_chunks(local):
+    allocations = local.table("allocations")
+    rows = [{"student_id": f"s{i}", "internship_id": "i1", "score": 50.0, "reason": "open"} for i in range(5)]
+    assert allocations.bulk_upsert(rows, on_conflict="student_id,internship_id").count == 5
+    first = allocations.select("*").eq("student_id", "s0").execute().data[0]
+
+    written = allocations.bulk_upsert([{"student_id": "s0", "internship_id": "i1", "score": 90.0}], on_conflict="student_id,internship_id")
+    again = allocations.select("*").eq("student_id", "s0").execute().data[0]
+    assert written.count == 1 and again["score"] == 90.0
+    assert (again["id"], again["reason"], again["allocated_at"]) == (first["id"], "open", first["allocated_at"])
+
+    # score is not a unique key, so like PostgREST every chunk fails
+    failed = allocations.bulk_upsert(rows, on_conflict="score", chunk_size=2)
+    assert failed.count == 0 and [e["start"] for e in failed.errors] == [0, 2, 4]
+    assert allocations.select("id", count="exact", head=True).execute().count == 5
+
+
+def test_update_and_delete_apply_their_filters(local):
+    before = local.table("internships").select("updated_at").eq("id", "i2").execute().data[0]["updated_at"]
+    updated = local.table("internships").update({"seats": 3, "role": "Analyst"}).eq("id", "i2").execute().data
+    assert [(r["id"], r["seats"], r["role"]) for r in updated] == [("i2", 3, "Analyst")]
+    assert updated[0]["updated_at"] > before and updated[0]["org_name"] == "Fin Ltd"
+
+    local.table("students").delete().lt("marks", 62).execute()
+    assert [r["id"] for r in local.table("students").select("id").order("id").execute().data] == ["s2", "s3", "s4"]
+
+
+def test_errors_come_back_as_empty_responses(local):
+    assert local.table("applications").select("*").execute().data == []
+    assert local.table("students").select("*").eq("name; drop", "x").execute().data == []
+    local.table("allocations").insert({"student_id": "s0", "internship_id": "i1", "score": 1.0})
+    assert local.table("allocations").insert({"student_id": "s0", "internship_id": "i1", "score": 2.0}).data == []
+
+
+def test_database_file_persists_across_clients(tmp_path):
+    path = str(tmp_path / "local.db")
+    with LocalSupabaseClient(path) as client:
+        client.load({"students": STUDENTS})
+    with LocalSupabaseClient(path) as client:
+        assert client.table("students").select("id", count="exact", head=True).execute().count == 5
+
+
+def test_get_supabase_serves_the_app_from_the_local_database(tmp_path, monkeypatch):
+    data_file = tmp_path / "tables.json"
+    data_file.write_text(json.dumps({"students": STUDENTS, "internships": INTERNSHIPS}))
+    monkeypatch.setenv("SUPABASE_LOCAL_DB", str(tmp_path / "app.db"))
+    monkeypatch.setenv("MOCK_SUPABASE_DATA", str(data_file))
+    monkeypatch.setenv("SUPABASE_CACHE_TTLS", "off")
+    supabase_client.get_supabase.cache_clear()
+    try:
+        client = app_module.create_app().test_client()
+        with client.session_transaction() as session:
+            session["logged_in"] = True
+        response = client.post("/run_allocation", json={"engine": "vectorized", "wait": True})
+        assert response.status_code == 200 and len(response.json["allocations"]) == 3
+
+        supabase = supabase_client.get_supabase()
+        assert isinstance(supabase, LocalSupabaseClient)
+        assert supabase.table("allocations").select("id", count="exact", head=True).execute().count == 3
+    finally:
+        supabase_client.get_supabase.cache_clear()